@@ -1,8 +1,44 @@
 import tkinter as tk
 from tkinter import messagebox, scrolledtext
-import random
-import json
+import argparse
 import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import api_server
+import batch
+import compiled_catalog
+from canonical import DEFAULT as CANONICAL
+import engine
+import instrumentation
+import planner
+import shopping
+import similarity
+from stall_monitor import DEFAULT_THRESHOLD_MS, StallMonitor
+from meal_store import MealStore, StoreLocked
+from sqlite_store import SQLiteCatalog, SQLiteMealStore
+from text_search import TextIndex
+
+# ---------- Command Line ----------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Meal Planner")
+    batch.add_arguments(parser)
+    api_server.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    parser.add_argument("--stall-report", metavar="FILE",
+                        help="watch the Tk loop for stalls and append a latency report to FILE on exit "
+                             "(env: MEAL_PLANNER_STALL_REPORT)")
+    parser.add_argument("--stall-threshold", type=float, default=DEFAULT_THRESHOLD_MS, metavar="MS",
+                        help="record a stack for stalls longer than this (default: %(default)g)")
+    return parser.parse_args(argv)
+
+cli_args = parse_args() if __name__ == "__main__" else parse_args([])
+# before any instrumented function below is defined
+instrumentation.configure_from_args(cli_args)
 
 # --- Custom Color and Font Settings (Updated) ---
 PASTEL_BG = "#f5f5f5"
@@ -79,24 +115,410 @@ def _bind_mousewheel(widget, command):
     widget.bind("<Button-4>", _on_mousewheel)
     widget.bind("<Button-5>", _on_mousewheel)
 
+class VirtualList(tk.Frame):
+    """Scrollable list that only creates widgets for the visible rows.
+
+    A small pool of buttons (visible rows plus ``overscan`` on each side) is
+    placed at the current scroll offset and reconfigured with new items while
+    scrolling, so the widget count does not grow with the number of items.
+    """
+
+    def __init__(self, master=None, row_height=40, overscan=4, command=None, label=None, **kw):
+        bg = kw.pop('bg', "#ffffff")
+        super().__init__(master, bg=bg, **kw)
+        # rows are placed, not packed, so keep the configured width
+        self.pack_propagate(False)
+        self.row_height = row_height
+        self.overscan = overscan
+        self.command = command
+        self.label = label or (lambda item: str(item))
+        self.items = []
+        self._offset = 0
+        self._rows = []
+
+        self.body = tk.Frame(self, bg=bg)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body.bind("<Configure>", lambda e: self._render())
+        _bind_mousewheel(self.body, self._on_wheel)
+
+    def set_items(self, items):
+        self._offset = 0
+        self.replace_items(items)
+
+    def replace_items(self, items):
+        """Swap in ``items`` while keeping the scroll position."""
+        self.items = list(items)
+        for btn in self._rows:
+            # forces a relabel; btn.shown still says whether it must be hidden
+            btn.item_index = None
+        self._render()
+
+    def extend(self, items):
+        self.items.extend(items)
+        self._render()
+
+    def yview(self, *args):
+        if not args:
+            return
+        height = max(1, self.body.winfo_height())
+        if args[0] == "moveto":
+            self._offset = int(float(args[1]) * len(self.items) * self.row_height)
+        elif args[0] == "scroll":
+            step = self.row_height if args[2] == "units" else height
+            self._offset += int(args[1]) * step
+        self._render()
+
+    def _on_wheel(self, delta):
+        self.yview("scroll", delta * 3, "units")
+
+    def _new_row(self):
+        btn = tk.Button(self.body, font=ELEGANT_FONT, anchor="w", relief=tk.FLAT, bd=0, bg="#ffffff")
+        # one callback per pooled row: re-registering a command on every rebind
+        # would leave a Tcl command behind each time
+        btn.config(command=lambda b=btn: self._on_click(b))
+        btn.item_index = None
+        btn.shown = False
+        _bind_mousewheel(btn, self._on_wheel)
+        self._rows.append(btn)
+        return btn
+
+    def _on_click(self, btn):
+        if self.command and btn.item_index is not None:
+            self.command(self.items[btn.item_index])
+
+    def _render(self):
+        rh = self.row_height
+        height = max(1, self.body.winfo_height())
+        total = len(self.items) * rh
+        self._offset = min(max(0, self._offset), max(0, total - height))
+
+        first = max(0, self._offset // rh - self.overscan)
+        last = min(len(self.items), (self._offset + height) // rh + 1 + self.overscan)
+        while len(self._rows) < last - first:
+            self._new_row()
+
+        for i, btn in enumerate(self._rows):
+            idx = first + i
+            if idx >= last:
+                if btn.shown:
+                    btn.place_forget()
+                    btn.shown = False
+                btn.item_index = None
+                continue
+            if btn.item_index != idx:
+                btn.config(text=self.label(self.items[idx]))
+                btn.item_index = idx
+            btn.place(x=4, y=idx * rh - self._offset + 3, relwidth=1, width=-8, height=rh - 6)
+            btn.shown = True
+
+        if total <= height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self._offset / total, (self._offset + height) / total)
+
+
 # ---------- Load Recipes (from recipes.json) ----------
 script_dir = os.path.dirname(os.path.abspath(__file__))
 recipes_path = os.path.join(script_dir, "recipes.json")
-recipes = []
-if os.path.exists(recipes_path):
+# Optional SQLite backend (see sqlite_store.py) for recipes and saved meals.
+DB_PATH = os.environ.get("MEAL_PLANNER_DB")
+
+if cli_args.batch:
+    # headless: answer the JSONL requests and exit before any Tk window exists
+    if batch.can_fork():
+        sys.exit(batch.run_from_args(cli_args, recipes_path, DB_PATH))
+    # spawned workers would re-run this module (and its GUI), so batch.py takes over
+    sys.exit(subprocess.call([sys.executable, batch.__file__, "--recipes", recipes_path] + sys.argv[1:]))
+
+if cli_args.serve is not None:
+    # headless JSON API (api_server.py) over the same recipes and saved meals
+    if batch.can_fork():
+        sys.exit(api_server.run_from_args(cli_args, recipes_path, DB_PATH))
+    sys.exit(subprocess.call([sys.executable, api_server.__file__, "--recipes", recipes_path] + sys.argv[1:]))
+
+# A fresh compiled catalog (recipes.catalog) is memory-mapped directly. Otherwise
+# records are streamed into the catalog in batches from the Tk loop, so the
+# window shows up straight away, and the compiled file is rebuilt in the
+# background for the next launch.
+RECIPE_LOAD_BATCH = 2000
+catalog = engine.RecipeCatalog()
+recipes = catalog.recipes
+recipe_stream = None
+recipe_load_started = None
+
+def start_recipe_loading():
+    global catalog, recipes, recipe_stream, recipe_load_started
+    recipe_load_started = time.perf_counter()
+    if DB_PATH:
+        try:
+            catalog = SQLiteCatalog(DB_PATH)
+            recipes = catalog.recipes
+            _finish_recipe_load()
+            start_recipe_indexes()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open {DB_PATH}: {e}")
+        return
+    # If no recipes.json, the catalog stays empty; make_meal will handle empty case.
+    if not os.path.exists(recipes_path):
+        return
+    if compiled_catalog.is_fresh(recipes_path):
+        try:
+            catalog = compiled_catalog.open_catalog(recipes_path, rebuild=False)
+            recipes = catalog.recipes
+            _finish_recipe_load()
+            start_recipe_indexes()
+            return
+        except (OSError, ValueError):
+            pass
+    threading.Thread(target=_compile_recipes, daemon=True).start()
+    recipe_stream = engine.iter_recipes(recipes_path)
+    root.after_idle(_pump_recipe_loader)
+
+compile_lock = threading.Lock()
+
+def _compile_recipes():
+    try:
+        # a reload can start a compile while the startup one is still writing
+        with compile_lock:
+            compiled_catalog.compile_catalog(recipes_path)
+    except Exception:
+        # the JSON catalog is already loading; the compiled copy is only a startup cache
+        pass
+
+def _pump_recipe_loader():
+    global recipe_stream
+    if recipe_stream is None:
+        return
     try:
-        with open(recipes_path, "r", encoding="utf-8") as f:
-            recipes = json.load(f)
-            if not isinstance(recipes, list):
-                # if file had dict, try to transform
-                if isinstance(recipes, dict):
-                    # expected list of {"name":..., "ingredients":..., "instructions":...}
-                    recipes = list(recipes.values())
+        for _ in range(RECIPE_LOAD_BATCH):
+            catalog.add(next(recipe_stream))
+    except StopIteration:
+        recipe_stream = None
+        _finish_recipe_load()
+        start_recipe_indexes()
+        return
     except Exception as e:
+        recipe_stream = None
         messagebox.showerror("Error", f"Failed to load recipes.json: {e}")
-else:
-    # If no recipes.json, leave recipes empty; make_meal will handle empty case.
-    recipes = []
+        return
+    root.after(1, _pump_recipe_loader)
+
+def _finish_recipe_load():
+    instrumentation.record("recipe_load", time.perf_counter() - recipe_load_started)
+    instrumentation.count("recipes_loaded", len(catalog))
+
+# ---------- Recipe Text Search ----------
+# The BM25 index is built on a daemon thread once the catalog has loaded; the
+# SQLite backend answers text queries through its own FTS5 table instead.
+TEXT_SEARCH_LIMIT = 200
+text_index = None
+index_threads = []
+
+def start_recipe_indexes():
+    index_threads[:] = [threading.Thread(target=_build_similar_index, args=(catalog,), daemon=True)]
+    if not isinstance(catalog, SQLiteCatalog):
+        index_threads.append(threading.Thread(target=_build_text_index, args=(catalog,), daemon=True))
+    for t in index_threads:
+        t.start()
+
+def _build_text_index(cat):
+    global text_index
+    index = TextIndex(cat)
+    index.finalize()
+    if cat is catalog:
+        text_index = index
+
+def search_recipes_text(event=None):
+    query = text_search_var.get().strip()
+    if not query:
+        return
+    if isinstance(catalog, SQLiteCatalog):
+        results = catalog.search(query, TEXT_SEARCH_LIMIT)
+    elif text_index is None:
+        messagebox.showinfo("Loading", "The recipe search index is still building, please try again in a moment.")
+        return
+    else:
+        results = [catalog.get(key) for key, _ in text_index.search(query, TEXT_SEARCH_LIMIT)]
+    cancel_recipe_search()
+    if not results:
+        messagebox.showinfo("No Recipes", f"No recipes found for \"{query}\".")
+        return
+    display_recipe_list_with_boxes(results, [query], heading="Your Search")
+    show_frame(meal_suggestion_frame)
+
+def cancel_recipe_search():
+    # drop any ingredient search still streaming into the result list
+    global search_generation
+    if search_cancel is not None:
+        search_cancel.set()
+    search_generation += 1
+    make_meal_btn.config(text="Make Meal")
+
+# ---------- Similar Recipes ----------
+# MinHash signatures are loaded from recipes.minhash when it matches
+# recipes.json, otherwise rebuilt in the background and saved for next time.
+SIMILAR_LIMIT = 20
+similar_index = None
+similar_lock = threading.Lock()  # held while a reload edits the index or a worker persists it
+current_recipe = None  # recipe shown in the instruction box or the recipe page
+
+def _build_similar_index(cat):
+    global similar_index
+    source = None if isinstance(cat, SQLiteCatalog) or not os.path.exists(recipes_path) else recipes_path
+    index = similarity.open_index(cat, source)
+    if cat is catalog:
+        similar_index = index
+
+def show_similar_recipes():
+    recipe = current_recipe
+    if recipe is None:
+        messagebox.showinfo("More like this", "Open a recipe first.")
+        return
+    if similar_index is None:
+        messagebox.showinfo("Loading", "Similar recipes are still being indexed, please try again in a moment.")
+        return
+    hits = similar_index.query(recipe.get("ingredients", ()), SIMILAR_LIMIT, exclude=recipe.get("id"))
+    results = [r for r in (catalog.get(key) for key, _ in hits) if r is not None]
+    cancel_recipe_search()
+    if not results:
+        messagebox.showinfo("More like this", f"No recipes similar to {recipe.get('name', 'this one')} found.")
+        return
+    display_recipe_list_with_boxes(results, [recipe.get("name", "")], heading="More Like")
+    show_frame(meal_suggestion_frame)
+
+# ---------- Hot Reload ----------
+# recipes.json is polled with root.after. Once its (mtime, size) stamp has
+# changed and then held still for one poll, the file is re-read on a worker
+# thread and only the added, removed and changed recipes are applied to the
+# catalog and the search indexes; open views are then re-pointed at the new
+# records in place. A memory-mapped compiled catalog is read-only, so the
+# first reload swaps it for an in-memory copy.
+RELOAD_POLL_MS = 1000
+recipes_stamp = None
+pending_stamp = None
+reload_results = queue.Queue()
+reloading = False
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def start_recipe_watcher():
+    global recipes_stamp
+    if DB_PATH:
+        return
+    recipes_stamp = _file_stamp(recipes_path)
+    root.after(RELOAD_POLL_MS, _poll_recipes_file)
+
+def _poll_recipes_file():
+    global recipes_stamp, pending_stamp, reloading
+    root.after(RELOAD_POLL_MS, _poll_recipes_file)
+    try:
+        stamp, records, base, error = reload_results.get_nowait()
+    except queue.Empty:
+        pass
+    else:
+        reloading = False
+        recipes_stamp = stamp
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to reload recipes.json: {error}")
+        else:
+            _apply_recipe_reload(records, base, stamp)
+    if reloading:
+        return
+    stamp = _file_stamp(recipes_path)
+    if stamp is None or stamp == recipes_stamp:
+        # a deleted file keeps the recipes already loaded
+        pending_stamp = None
+        return
+    if stamp != pending_stamp:
+        # wait for one more poll in case the file is still being written
+        pending_stamp = stamp
+        return
+    if recipe_stream is not None or any(t.is_alive() for t in index_threads):
+        return
+    reloading = True
+    threading.Thread(target=_reload_worker, args=(catalog, stamp), daemon=True).start()
+
+def _reload_worker(cat, stamp):
+    try:
+        records = engine.load_recipes(recipes_path)
+        base = None if isinstance(cat, engine.RecipeCatalog) else engine.RecipeCatalog(cat.recipes)
+        reload_results.put((stamp, records, base, None))
+    except Exception as e:
+        reload_results.put((stamp, None, None, e))
+
+@instrumentation.timed("recipe_reload")
+def _apply_recipe_reload(records, base, stamp):
+    global catalog, recipes, meal_planner
+    # a search still streaming from the old records is dropped
+    cancel_recipe_search()
+    if base is not None:
+        catalog = base
+        recipes = catalog.recipes
+    added, removed, changed = catalog.reload(records)
+    if not (added or removed or changed or base is not None):
+        return
+    meal_planner = None
+    if text_index is None or similar_index is None:
+        start_recipe_indexes()
+    else:
+        with similar_lock:
+            for key in removed:
+                text_index.remove(key)
+                similar_index.remove(key)
+            for key in changed + added:
+                recipe = catalog.get(key)
+                text_index.add(key, recipe)
+                similar_index.add(key, recipe.get("ingredients", ()))
+        threading.Thread(target=_persist_similar_index, args=(similar_index, stamp), daemon=True).start()
+    threading.Thread(target=_compile_recipes, daemon=True).start()
+    refresh_recipe_views()
+
+def _persist_similar_index(index, stamp):
+    # appends the new signatures to recipes.minhash (a full rewrite after removals)
+    try:
+        with similar_lock:
+            # stamped with recipes.json's current mtime, so skip if it has moved on again
+            if _file_stamp(recipes_path) != stamp:
+                return
+            index.flush(similarity.default_path(recipes_path), recipes_path)
+    except (OSError, ValueError):
+        # persistence is only a startup cache
+        pass
+
+def _reloaded(recipe):
+    # unchanged recipes keep their dict; None once a recipe has been removed
+    if not isinstance(recipe, dict):
+        return None
+    rid = recipe.get("id")
+    return catalog.get(rid) if rid is not None else catalog.find_by_name(recipe.get("name"))
+
+def refresh_recipe_views():
+    global current_recipe, daily_meals, weekly_plan
+    current_recipe = _reloaded(current_recipe)
+    if recipe_results_list is not None:
+        recipe_results_list.replace_items(r for r in map(_reloaded, recipe_results_list.items) if r is not None)
+    if instruction_recipe is not None:
+        fresh = _reloaded(instruction_recipe)
+        if fresh is not instruction_recipe:
+            update_instruction_box(fresh)
+    if detail_recipe is not None:
+        fresh = _reloaded(detail_recipe)
+        if fresh is not detail_recipe:
+            show_recipe_details((fresh or detail_recipe).get("name", ""), fresh)
+    if daily_meals is not None:
+        # removed meals are replaced with another pick
+        daily_meals = tuple(_reloaded(m) or (random.choice(recipes) if recipes else "No recipes") for m in daily_meals)
+        update_daily_meals_with_recipes(*daily_meals)
+    if weekly_plan is not None:
+        weekly_plan = [tuple(map(_reloaded, row)) for row in weekly_plan]
+        render_weekly_plan()
 
 # --- Core Functions ---
 def show_frame(frame):
@@ -123,95 +545,143 @@ def update_make_meal_button():
         instruction_label.config(text="Please choose at least 2 ingredients")
 
 # ---------- Make Meal ----------
-make_meal_in_progress = False
-
+# Matching runs on a worker thread and streams ranked batches back through a
+# queue polled with root.after. Each search gets a generation number; starting
+# a new one cancels the previous worker and stale batches are dropped.
+SEARCH_POLL_MS = 30
+SEARCH_RESULT_LIMIT = 20000
+search_results = queue.Queue()
+search_generation = 0
+search_cancel = None
+search_shown = 0
+search_selected = []
+search_started = None
+
+@instrumentation.timed("make_meal")
 def make_meal():
-    global make_meal_in_progress
-    if make_meal_in_progress:
+    global search_generation, search_cancel, search_shown, search_selected, search_started
+    selected_ingredients = [name for name, var in ingredient_vars.items() if var.get()]
+    if not recipes:
+        if recipe_stream is not None:
+            messagebox.showinfo("Loading", "Recipes are still loading, please try again in a moment.")
+        else:
+            messagebox.showerror("No Recipes", "No recipes loaded (recipes.json missing or invalid).")
         return
-    make_meal_in_progress = True
-    make_meal_btn.config(state="disabled", text="⏳ Searching...")
-    root.update()
+
+    if search_cancel is not None:
+        search_cancel.set()
+    search_generation += 1
+    search_cancel = threading.Event()
+    search_shown = 0
+    search_selected = selected_ingredients
+    search_started = time.perf_counter()
+    make_meal_btn.config(text="⏳ Searching...")
+    threading.Thread(
+        target=_search_worker,
+        args=(search_generation, catalog, selected_ingredients, search_cancel),
+        daemon=True,
+    ).start()
+    root.after(SEARCH_POLL_MS, _poll_search_results, search_generation)
+
+def _search_worker(generation, cat, selected_ingredients, cancel):
     try:
-        selected_ingredients = [name for name, var in ingredient_vars.items() if var.get()]
-        if not recipes:
-            messagebox.showerror("No Recipes", "No recipes loaded (recipes.json missing or invalid).")
-            return
+        for chunk in engine.iter_match_batches(cat, selected_ingredients, k=SEARCH_RESULT_LIMIT, cancel=cancel):
+            search_results.put((generation, "batch", chunk))
+    except Exception as e:
+        search_results.put((generation, "error", e))
+    search_results.put((generation, "done", None))
 
-        # find matching recipes (any ingredient overlap)
-        matching_recipes = [r for r in recipes if any(ing in selected_ingredients for ing in r.get("ingredients", []))]
-        if not matching_recipes:
-            messagebox.showinfo("No Recipes", "No matching recipes found!")
+def _poll_search_results(generation):
+    global search_shown
+    if generation != search_generation:
+        return
+    while True:
+        try:
+            gen, kind, payload = search_results.get_nowait()
+        except queue.Empty:
+            root.after(SEARCH_POLL_MS, _poll_search_results, generation)
+            return
+        if gen != search_generation:
+            continue
+        if kind == "batch":
+            if search_shown == 0:
+                # top results ranked by ingredient overlap
+                display_recipe_list_with_boxes(payload, search_selected)
+                show_frame(meal_suggestion_frame)
+                instrumentation.record("make_meal.first_results", time.perf_counter() - search_started)
+            else:
+                append_recipe_results(payload)
+            search_shown += len(payload)
+        else:
+            make_meal_btn.config(text="Make Meal")
+            if kind == "error":
+                messagebox.showerror("Search error", f"Search failed:\n\n{payload}")
+            elif search_shown == 0:
+                messagebox.showinfo("No Recipes", "No matching recipes found!")
             return
-
-        display_recipe_list_with_boxes(matching_recipes, selected_ingredients)
-        show_frame(meal_suggestion_frame)
-    finally:
-        make_meal_in_progress = False
-        make_meal_btn.config(state="normal", text="Make Meal")
 
 # ---------- Display matching recipes in the styled meal_suggestion_frame ----------
-instruction_box = None  # scrolledtext for instructions (set in display function)
-def display_recipe_list_with_boxes(recipes_to_show, selected_ingredients):
-    # Clear previous content frames if present
-    for widget in recipe_left_frame.winfo_children():
-        widget.destroy()
-    for widget in recipe_right_frame.winfo_children():
-        widget.destroy()
-
+# The result pane widgets are built once (see build_result_pane) and only
+# reconfigured per search, so long sessions do not churn Tcl widgets.
+result_heading_label = None
+result_selected_label = None
+instruction_box = None  # scrolledtext for instructions
+recipe_results_list = None  # VirtualList of matching recipes (pooled row buttons)
+instruction_recipe = None  # recipe shown in the instruction box
+
+def build_result_pane():
+    global result_heading_label, result_selected_label, recipe_results_list, instruction_box
     # Ingredients box at top of left column
     ing_box = tk.Frame(recipe_left_frame, bg="#ffffff", bd=0)
     ing_box.pack(fill="x", padx=10, pady=(6, 8))
-    tk.Label(ing_box, text="Your Ingredients", font=("Century Gothic", 13, "bold"), bg="#ffffff", fg=TEXT_COLOR).pack(anchor="w")
-    tk.Label(ing_box, text=", ".join(selected_ingredients), font=ELEGANT_FONT, wraplength=320, justify="left", bg="#ffffff").pack(anchor="w", pady=(4,0))
-
-    # Available recipes list
-    list_frame = tk.Frame(recipe_left_frame, bg="#ffffff", bd=0)
-    list_frame.pack(fill="both", expand=True, padx=10, pady=(0,8))
-    list_canvas = tk.Canvas(list_frame, bg="#ffffff", highlightthickness=0)
-    scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=list_canvas.yview)
-    scrollable_frame = tk.Frame(list_canvas, bg="#ffffff")
-    scrollable_frame.bind("<Configure>", lambda e: list_canvas.configure(scrollregion=list_canvas.bbox("all")))
-    window = list_canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-    list_canvas.configure(yscrollcommand=scrollbar.set)
-    list_canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    # Fill buttons
-    for r in recipes_to_show:
-        btn = tk.Button(scrollable_frame, text=r.get("name", "Unnamed"), font=ELEGANT_FONT, width=36, anchor="w",
-                        relief=tk.FLAT, bd=0,
-                        command=lambda recipe=r: update_instruction_box(recipe))
-        btn.pack(pady=6, anchor="w", fill="x", padx=4)
+    result_heading_label = tk.Label(ing_box, font=("Century Gothic", 13, "bold"), bg="#ffffff", fg=TEXT_COLOR)
+    result_heading_label.pack(anchor="w")
+    result_selected_label = tk.Label(ing_box, font=ELEGANT_FONT, wraplength=320, justify="left", bg="#ffffff")
+    result_selected_label.pack(anchor="w", pady=(4,0))
+
+    # Available recipes list (virtualized: only the visible rows have widgets)
+    recipe_results_list = VirtualList(
+        recipe_left_frame, width=360,
+        label=lambda r: r.get("name", "Unnamed"),
+        command=update_instruction_box,
+    )
+    recipe_results_list.pack(fill="both", expand=True, padx=10, pady=(0,8))
 
     # Right side: Instructions area (scrolledtext)
-    global instruction_box
+    RoundedButton(recipe_right_frame, text="More like this", font=ELEGANT_FONT,
+                  command=show_similar_recipes).pack(anchor="e", padx=8, pady=(8, 0))
     instruction_box = scrolledtext.ScrolledText(recipe_right_frame, wrap=tk.WORD, width=50, height=25, font=ELEGANT_FONT)
     instruction_box.pack(fill="both", expand=True, padx=8, pady=8)
+
+@instrumentation.timed("display_recipe_list_with_boxes")
+def display_recipe_list_with_boxes(recipes_to_show, selected_ingredients, heading="Your Ingredients"):
+    global current_recipe, instruction_recipe
+    result_heading_label.config(text=heading)
+    result_selected_label.config(text=", ".join(selected_ingredients))
+    recipe_results_list.set_items(recipes_to_show)
+
+    current_recipe = None
+    instruction_recipe = None
+    instruction_box.config(state=tk.NORMAL)
+    instruction_box.delete(1.0, tk.END)
     instruction_box.insert(tk.END, "Select a recipe to view instructions")
     instruction_box.config(state=tk.DISABLED)
 
+def append_recipe_results(recipes_to_show):
+    if recipe_results_list is not None:
+        recipe_results_list.extend(recipes_to_show)
+
 def update_instruction_box(recipe):
+    global current_recipe, instruction_recipe
     if instruction_box is None:
         return
+    current_recipe = instruction_recipe = recipe
     instruction_box.config(state=tk.NORMAL)
     instruction_box.delete(1.0, tk.END)
-    instruction_box.insert(tk.END, f"{recipe.get('name','')}:\n\n")
-    instruction_box.insert(tk.END, "Ingredients:\n")
-    for ing in recipe.get('ingredients', []):
-        instruction_box.insert(tk.END, f"• {ing}\n")
-    instruction_box.insert(tk.END, "\nInstructions:\n")
-    instr = recipe.get('instructions', "")
-    if isinstance(instr, list):
-        for step in instr:
-            step = step.strip()
-            if step:
-                instruction_box.insert(tk.END, f"• {step}\n")
+    if recipe is None:
+        instruction_box.insert(tk.END, "(This recipe was removed from recipes.json)")
     else:
-        for step in str(instr).split("\n"):
-            step = step.strip()
-            if step:
-                instruction_box.insert(tk.END, f"• {step}\n")
+        instruction_box.insert(tk.END, f"{recipe.get('name','')}:\n\n" + engine.recipe_details(catalog, recipe))
     instruction_box.config(state=tk.DISABLED)
 
 # ---------- Root Window ----------
@@ -254,6 +724,10 @@ ingredients = {
     "Vegetables": ["Tomatoes", "Carrots", "Cabbage", "Onion", "Cauliflower"],
     "Fruits": ["Bananas", "Apples", "Oranges", "Coconut", "Lemons"]
 }
+# register the pantry names first so they become the display names of their canonical ids
+for _names in ingredients.values():
+    for _name in _names:
+        CANONICAL.intern(_name)
 
 outer_ing_frame = tk.Frame(root, bg=PASTEL_BG)
 outer_ing_frame.grid(row=0, column=0, sticky="nsew")
@@ -325,6 +799,7 @@ def edit_ingredient_inline(old_name):
             messagebox.showwarning("Empty", "Name cannot be empty.")
             entry.focus()
             return
+        new_name = CANONICAL.canonical_name(new_name, fuzzy=True)
         if new_name in ingredient_vars and new_name != old_name:
             messagebox.showwarning("Duplicate", f"'{new_name}' already exists!")
             entry.focus()
@@ -348,6 +823,10 @@ def edit_ingredient_inline(old_name):
         )
         new_edit_btn.place(in_=new_btn, relx=1.0, x=-8, y=2, anchor="ne")
 
+        # the old pair was only hidden; drop it so renames do not accumulate widgets
+        btn.destroy()
+        if edit_btn:
+            edit_btn.destroy()
         buttons[new_name] = (new_btn, new_edit_btn)
         entry.destroy()
         update_make_meal_button()
@@ -367,6 +846,8 @@ def add_more_textbox(event=None):
     name = others_entry.get().strip()
     if not name:
         return
+    # plurals, synonyms and close typos resolve to the catalog's spelling
+    name = CANONICAL.canonical_name(name, fuzzy=True)
     if name in ingredient_vars:
         messagebox.showinfo("Duplicate", f"'{name}' already exists!")
         others_entry.delete(0, tk.END)
@@ -448,6 +929,15 @@ back_to_main_btn = RoundedButton(nav_frame_suggest, text="🏠",
                              command=lambda: show_frame(main_menu))
 back_to_main_btn.pack(side="left", padx=10)
 
+text_search_var = tk.StringVar()
+text_search_entry = tk.Entry(nav_frame_suggest, textvariable=text_search_var, font=ELEGANT_FONT, width=28)
+text_search_entry.pack(side="left", padx=(20, 6))
+text_search_entry.bind("<Return>", search_recipes_text)
+
+text_search_btn = RoundedButton(nav_frame_suggest, text="Search", font=ELEGANT_FONT,
+                                command=search_recipes_text)
+text_search_btn.pack(side="left", padx=6)
+
 # Create left & right frames inside meal_suggestion_frame for recipe list + instructions
 recipe_top_holder = tk.Frame(meal_suggestion_frame, bg=PASTEL_BG)
 recipe_top_holder.pack(fill="both", expand=True, padx=10, pady=(10,8))
@@ -458,6 +948,8 @@ recipe_left_frame.pack(side="left", fill="y", padx=(10,6), pady=6, ipadx=6, ipad
 recipe_right_frame = tk.Frame(recipe_top_holder, bg="#ffffff", bd=0, highlightthickness=1, highlightbackground="#DADADA")
 recipe_right_frame.pack(side="right", fill="both", expand=True, padx=(6,10), pady=6)
 
+build_result_pane()
+
 # ---------- Daily Meal Suggestions (cards styled like draft) ----------
 header = tk.Label(daily_meal_frame, text="Today's Meals Suggestion", font=HEADER_FONT, bg=PASTEL_BG, fg=TEXT_COLOR)
 header.pack(pady=22)
@@ -480,39 +972,31 @@ back_from_recipe_btn = RoundedButton(recipe_frame, text="← Back to Daily Sugge
                                  command=lambda: show_frame(daily_meal_frame))
 back_from_recipe_btn.pack(pady=10)
 
+more_like_btn = RoundedButton(recipe_frame, text="More like this", font=ELEGANT_FONT,
+                              command=show_similar_recipes)
+more_like_btn.pack(pady=(0, 10))
+
 detail_text = tk.Text(recipe_frame, font=ELEGANT_FONT, bg="#ffffff", bd=0, height=20, wrap="word")
 detail_text.pack(padx=20, pady=12, fill="both", expand=True)
 
+detail_recipe = None  # recipe shown on the recipe page
+
 def open_recipe(meal_name):
-    # Try to find recipe by name in recipes; otherwise show the name only
+    # Look the recipe up by name; otherwise show the name only
+    show_recipe_details(meal_name, catalog.find_by_name(meal_name))
+    show_frame(recipe_frame)
+
+def show_recipe_details(meal_name, found):
+    global current_recipe, detail_recipe
     recipe_title_label.config(text=f"{meal_name} Recipe")
     detail_text.config(state=tk.NORMAL)
     detail_text.delete("1.0", tk.END)
-    found = None
-    for r in recipes:
-        if r.get("name") == meal_name:
-            found = r
-            break
+    current_recipe = detail_recipe = found
     if found:
-        detail_text.insert(tk.END, "Ingredients:\n")
-        for ing in found.get("ingredients", []):
-            detail_text.insert(tk.END, f"• {ing}\n")
-        detail_text.insert(tk.END, "\nInstructions:\n")
-        instr = found.get("instructions", "")
-        if isinstance(instr, list):
-            for step in instr:
-                step = step.strip()
-                if step:
-                    detail_text.insert(tk.END, f"• {step}\n")
-        else:
-            for step in str(instr).split("\n"):
-                step = step.strip()
-                if step:
-                    detail_text.insert(tk.END, f"• {step}\n")
+        detail_text.insert(tk.END, engine.recipe_details(catalog, found))
     else:
         detail_text.insert(tk.END, "(No detailed recipe found)")
     detail_text.config(state=tk.DISABLED)
-    show_frame(recipe_frame)
 
 # Create modern card function (returns outer frame and label used to show recipe name/content)
 def create_meal_card(parent, title):
@@ -562,14 +1046,15 @@ def update_daily_meals_with_recipes(breakfast, lunch, dinner):
     lunch_label.config(text=lunch.get("name", "(no name)") if isinstance(lunch, dict) else str(lunch))
     dinner_label.config(text=dinner.get("name", "(no name)") if isinstance(dinner, dict) else str(dinner))
 
+daily_meals = None  # (breakfast, lunch, dinner) shown on the cards
+
 def generate_daily_meals():
-    if not recipes:
+    global daily_meals
+    daily_meals = engine.generate_daily_meals(catalog)
+    if daily_meals is None:
         update_daily_meals_with_recipes("No recipes", "No recipes", "No recipes")
         return
-    breakfast = random.choice(recipes)
-    lunch = random.choice(recipes)
-    dinner = random.choice(recipes)
-    update_daily_meals_with_recipes(breakfast, lunch, dinner)
+    update_daily_meals_with_recipes(*daily_meals)
 
 regen_btn = RoundedButton(daily_meal_frame, text="Other Suggestions", font=ELEGANT_FONT,
                       command=generate_daily_meals)
@@ -579,46 +1064,114 @@ back_daily_btn = RoundedButton(daily_meal_frame, text="🏠", font=("Century Got
                            command=lambda: show_frame(main_menu))
 back_daily_btn.pack(pady=18)
 
+# ---------- Weekly Plan ----------
+# Category buckets are built once per catalog; plans favour recipes that reuse
+# ingredients (shorter shopping list) and the ingredients selected on the
+# ingredients page, without repeating a recipe within a week.
+WEEKLY_PLAN_DAYS = 7
+meal_planner = None
+weekly_plan = None
+weekly_pantry = []
+
+weekly_plan_frame = tk.Frame(root, bg=PASTEL_BG)
+weekly_plan_frame.grid(row=0, column=0, sticky="nsew")
+
+tk.Label(weekly_plan_frame, text="Weekly Meal Plan", font=HEADER_FONT, bg=PASTEL_BG, fg=TEXT_COLOR).pack(pady=22)
+
+weekly_nav = tk.Frame(weekly_plan_frame, bg=PASTEL_BG)
+weekly_nav.pack(pady=6)
+
+weekly_text = scrolledtext.ScrolledText(weekly_plan_frame, wrap=tk.WORD, font=ELEGANT_FONT, bg="#ffffff", bd=0)
+weekly_text.pack(fill="both", expand=True, padx=20, pady=12)
+
+def generate_weekly_plan():
+    global meal_planner, weekly_plan, weekly_pantry
+    if meal_planner is None or meal_planner.catalog is not catalog:
+        meal_planner = planner.MealPlanner(catalog)
+    weekly_pantry = [name for name, var in ingredient_vars.items() if var.get()]
+    try:
+        weekly_plan = meal_planner.plan(days=WEEKLY_PLAN_DAYS, pantry=weekly_pantry)
+    except ValueError as e:
+        messagebox.showerror("Weekly Plan", f"Cannot plan a week from these recipes:\n\n{e}")
+        return
+    render_weekly_plan()
+    show_frame(weekly_plan_frame)
+
+def render_weekly_plan():
+    weekly_text.config(state=tk.NORMAL)
+    weekly_text.delete("1.0", tk.END)
+    if weekly_plan is None:
+        weekly_text.insert(tk.END, "No recipes loaded.")
+    else:
+        lines = []
+        for day, meals in enumerate(weekly_plan, 1):
+            lines.append(f"Day {day}")
+            for slot, recipe in zip(planner.DEFAULT_SLOTS, meals):
+                name = recipe.get('name', '(no name)') if recipe is not None else "(removed from recipes.json)"
+                lines.append(f"  {slot}: {name}")
+            lines.append("")
+        shop = shopping.ShoppingList(shopping.IngredientTable(ingredients), weekly_pantry)
+        shop.update(shopping.plan_meals(weekly_plan))
+        lines.append("Shopping list")
+        lines.append(shopping.format_grouped(shop.grouped()))
+        weekly_text.insert(tk.END, "\n".join(lines))
+    weekly_text.config(state=tk.DISABLED)
+
+RoundedButton(weekly_nav, text="Other Plan", font=ELEGANT_FONT,
+              command=generate_weekly_plan).pack(side="left", padx=10)
+RoundedButton(weekly_nav, text="← Back to Daily Suggestions", font=ELEGANT_FONT,
+              command=lambda: show_frame(daily_meal_frame)).pack(side="left", padx=10)
+
+weekly_btn = RoundedButton(daily_meal_frame, text="Weekly Plan", font=ELEGANT_FONT,
+                           command=generate_weekly_plan)
+weekly_btn.pack(before=back_daily_btn, pady=6)
+
 # ===================== Manage Meal Plans (unchanged core, styled to draft) =====================
 MEALS_FILE = "meals.json"
 saved_meals = {}
 editor_mode = "create"
 editing_original_name = None
 
-def load_saved_meals():
-    if not os.path.exists(MEALS_FILE):
-        return {}
+meal_store = SQLiteMealStore(DB_PATH) if DB_PATH else MealStore(MEALS_FILE)
+if __name__ == "__main__":
+    # one writer at a time: a second window or the API server would overwrite our edits
     try:
-        with open(MEALS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        clean = {}
-        if isinstance(data, dict):
-            for name, value in data.items():
-                if not isinstance(name, str):
-                    continue
-                if isinstance(value, list):
-                    ings = [str(x) for x in value]
-                    clean[name] = {"ingredients": ings, "description": ""}
-                elif isinstance(value, dict):
-                    ings = value.get("ingredients", [])
-                    desc = value.get("description", "")
-                    if isinstance(ings, list):
-                        ings = [str(x) for x in ings]
-                    else:
-                        ings = []
-                    clean[name] = {"ingredients": ings, "description": str(desc)}
-        return clean
-    except Exception:
-        return {}
+        meal_store.lock()
+    except StoreLocked:
+        messagebox.showerror("Meal Planner", "Saved meals are open in another Meal Planner window "
+                                             "or API server (--serve). Close it first.")
+        root.destroy()
+        sys.exit(1)
+
+def load_saved_meals():
+    # meals.json snapshot with the edit journal replayed on top
+    return meal_store.load()
 
+@instrumentation.timed("save_saved_meals")
 def save_saved_meals():
+    # fold the journal back into meals.json (atomic rewrite)
+    try:
+        meal_store.compact()
+    except Exception as e:
+        messagebox.showerror("Save error", f"Couldn't save meals.json\n\n{e}")
+
+def _journal_meal_edit(edit, *args):
     try:
-        with open(MEALS_FILE, "w", encoding="utf-8") as f:
-            json.dump(saved_meals, f, indent=2, ensure_ascii=False)
+        edit(*args)
+        return True
     except Exception as e:
         messagebox.showerror("Save error", f"Couldn't save meals.json\n\n{e}")
+        return False
 
 saved_meals = load_saved_meals()
+# Sorted name index for the Saved Meals search; its trigram index is filled in
+# small steps from the Tk loop so startup is not blocked by large meal files.
+SAVED_INDEX_STEP = 1000
+saved_index = engine.SavedMealIndex(saved_meals)
+
+def _pump_saved_index():
+    if not saved_index.index_step(SAVED_INDEX_STEP):
+        root.after(1, _pump_saved_index)
 
 manage_menu_frame = tk.Frame(root, bg=PASTEL_BG)
 saved_list_frame = tk.Frame(root, bg=PASTEL_BG)
@@ -670,7 +1223,7 @@ tk.Label(search_row, text="Search meal:", font=ELEGANT_FONT, bg="#ffffff").grid(
 search_entry = tk.Entry(search_row, textvariable=search_var, font=ELEGANT_FONT, bd=1, relief=tk.SOLID)
 search_entry.grid(row=0, column=1, sticky="ew")
 
-listbox = tk.Listbox(left_card, font=("Century Gothic", 13), bd=0, highlightthickness=0)
+listbox = tk.Listbox(left_card, font=("Century Gothic", 13), bd=0, highlightthickness=0, selectmode=tk.EXTENDED)
 listbox.grid(row=2, column=0, sticky="nsew", padx=(12, 6), pady=(0, 12))
 scroll = tk.Scrollbar(left_card, orient="vertical", command=listbox.yview)
 scroll.grid(row=2, column=1, sticky="ns", padx=(0, 12), pady=(0, 12))
@@ -706,20 +1259,42 @@ _bind_mousewheel(listbox, lambda d: listbox.yview_scroll(d, "units"))
 _bind_mousewheel(view_ingredients_text, lambda d: view_ingredients_text.yview_scroll(d, "units"))
 _bind_mousewheel(view_description_text, lambda d: view_description_text.yview_scroll(d, "units"))
 
+SAVED_SEARCH_DEBOUNCE_MS = 120
+saved_search_job = None
+shown_saved_names = None
+
+@instrumentation.timed("refresh_saved_list")
 def refresh_saved_list():
+    global shown_saved_names
+    names = saved_index.search(search_var.get())
+    if names == shown_saved_names:
+        return
+    shown_saved_names = names
     listbox.delete(0, tk.END)
-    query = search_var.get().strip().lower()
-    for name in sorted(saved_meals.keys(), key=str.lower):
-        if not query or query in name.lower():
-            listbox.insert(tk.END, name)
+    listbox.insert(tk.END, *names)
+
+def _schedule_saved_search(*args):
+    # debounce: only search once typing pauses
+    global saved_search_job
+    if saved_search_job is not None:
+        root.after_cancel(saved_search_job)
+    saved_search_job = root.after(SAVED_SEARCH_DEBOUNCE_MS, _run_saved_search)
+
+def _run_saved_search():
+    global saved_search_job
+    saved_search_job = None
+    refresh_saved_list()
+    _update_details(None)
 
-def _update_details(name):
+def _update_details(name, selected=1):
     view_ingredients_text.config(state="normal")
     view_ingredients_text.delete("1.0", tk.END)
     view_description_text.config(state="normal")
     view_description_text.delete("1.0", tk.END)
 
-    if not name:
+    if selected > 1:
+        view_ingredients_text.insert(tk.END, f"({selected} meals selected)")
+    elif not name:
         view_ingredients_text.insert(tk.END, "(Select a meal)")
     else:
         data = saved_meals.get(name)
@@ -745,11 +1320,11 @@ def _update_details(name):
 
 def on_select_meal(event=None):
     sel = listbox.curselection()
-    name = listbox.get(sel[0]) if sel else None
-    _update_details(name)
+    name = listbox.get(sel[0]) if len(sel) == 1 else None
+    _update_details(name, len(sel))
 
 listbox.bind("<<ListboxSelect>>", on_select_meal)
-search_var.trace_add("write", lambda *args: (refresh_saved_list(), _update_details(None)))
+search_var.trace_add("write", _schedule_saved_search)
 
 btn_row = tk.Frame(saved_list_frame, bg=PASTEL_BG)
 btn_row.grid(row=2, column=0, columnspan=2, sticky="ew", padx=30, pady=(0, 20))
@@ -759,29 +1334,69 @@ btn_row.grid_columnconfigure(2, weight=1)
 btn_row.grid_columnconfigure(3, weight=0)
 
 def delete_selected_meal():
-    sel = listbox.curselection()
-    if not sel:
+    # every selected meal (the list allows multi-select for the shopping list)
+    names = [listbox.get(i) for i in listbox.curselection()]
+    if not names:
         messagebox.showinfo("Delete", "Please select a meal to delete.")
         return
-    name = listbox.get(sel[0])
-    if messagebox.askyesno("Confirm Delete", f"Delete '{name}'?"):
-        saved_meals.pop(name, None)
-        save_saved_meals()
-        refresh_saved_list()
-        _update_details(None)
+    prompt = f"Delete '{names[0]}'?" if len(names) == 1 else f"Delete these {len(names)} meals?\n\n" + "\n".join(names[:10])
+    if len(names) > 10:
+        prompt += f"\n... and {len(names) - 10} more"
+    if not messagebox.askyesno("Confirm Delete", prompt):
+        return
+    for name in names:
+        if not _journal_meal_edit(meal_store.delete, name):
+            break
+        saved_index.remove(name)
+    refresh_saved_list()
+    _update_details(None)
 
 def edit_selected_meal():
     sel = listbox.curselection()
     if not sel:
         messagebox.showinfo("Edit", "Please select a meal to edit.")
         return
+    if len(sel) > 1:
+        messagebox.showinfo("Edit", "Select a single meal to edit.")
+        return
     name = listbox.get(sel[0])
     open_meal_editor(existing_name=name)
 
 RoundedButton(btn_row, text="Edit", width=12, command=edit_selected_meal).grid(row=0, column=0, sticky="w", padx=(0, 10))
 RoundedButton(btn_row, text="Delete", width=12, command=delete_selected_meal).grid(row=0, column=1, sticky="w", padx=(0, 10))
+RoundedButton(btn_row, text="Shopping List", width=14, command=lambda: show_saved_shopping_list()).grid(row=0, column=2, sticky="w")
 RoundedButton(btn_row, text="Back", width=12, command=lambda: show_frame(manage_menu_frame)).grid(row=0, column=3, sticky="e")
 
+# ---------- Shopping List ----------
+shopping_frame = tk.Frame(root, bg=PASTEL_BG)
+shopping_frame.grid(row=0, column=0, sticky="nsew")
+
+tk.Label(shopping_frame, text="Shopping List", font=HEADER_FONT, bg=PASTEL_BG, fg=TEXT_COLOR).pack(pady=22)
+shopping_hint = tk.Label(shopping_frame, text="", font=ELEGANT_FONT, bg=PASTEL_BG, fg="gray")
+shopping_hint.pack()
+
+shopping_text = scrolledtext.ScrolledText(shopping_frame, wrap=tk.WORD, font=ELEGANT_FONT, bg="#ffffff", bd=0)
+shopping_text.pack(fill="both", expand=True, padx=20, pady=12)
+
+RoundedButton(shopping_frame, text="← Back to Saved Meals", font=ELEGANT_FONT,
+              command=lambda: show_frame(saved_list_frame)).pack(pady=(0, 18))
+
+def show_saved_shopping_list():
+    # selected meals, or every meal currently listed when nothing is selected
+    names = [listbox.get(i) for i in listbox.curselection()] or list(shown_saved_names or ())
+    if not names:
+        messagebox.showinfo("Shopping List", "There are no saved meals to shop for.")
+        return
+    pantry = [name for name, var in ingredient_vars.items() if var.get()]
+    shop = shopping.ShoppingList(shopping.IngredientTable(ingredients), pantry)
+    shop.update(saved_meals[name] for name in names if name in saved_meals)
+    shopping_hint.config(text=f"{len(names)} meal(s), minus the ingredients selected on the ingredients page")
+    shopping_text.config(state=tk.NORMAL)
+    shopping_text.delete("1.0", tk.END)
+    shopping_text.insert(tk.END, shopping.format_grouped(shop.grouped()))
+    shopping_text.config(state=tk.DISABLED)
+    show_frame(shopping_frame)
+
 # Meal editor (create/edit)
 new_meal_vars = {}
 meal_editor_frame.grid_columnconfigure(0, weight=1)
@@ -810,9 +1425,18 @@ ingredients_panel.grid(row=0, column=0, sticky="nsew", padx=(0, 8))
 ingredients_panel.grid_columnconfigure(0, weight=1)
 ingredients_panel.grid_rowconfigure(1, weight=1)
 
-tk.Label(ingredients_panel, text="Ingredients", font=ELEGANT_FONT, bg="#ffffff").grid(
-    row=0, column=0, sticky="w", padx=10, pady=(8, 4)
-)
+selector_head = tk.Frame(ingredients_panel, bg="#ffffff")
+selector_head.grid(row=0, column=0, sticky="ew", padx=10, pady=(8, 4))
+selector_head.grid_columnconfigure(1, weight=1)
+
+tk.Label(selector_head, text="Ingredients", font=ELEGANT_FONT, bg="#ffffff").grid(row=0, column=0, sticky="w")
+editor_filter_var = tk.StringVar()
+editor_filter_entry = tk.Entry(selector_head, textvariable=editor_filter_var, font=ELEGANT_FONT, width=16,
+                               bd=1, relief=tk.SOLID)
+editor_filter_entry.grid(row=0, column=2, sticky="e")
+tk.Label(selector_head, text="Filter:", font=ELEGANT_FONT, bg="#ffffff").grid(row=0, column=1, sticky="e", padx=(8, 4))
+editor_count_lbl = tk.Label(selector_head, text="", fg="gray", bg="#ffffff")
+editor_count_lbl.grid(row=1, column=0, columnspan=3, sticky="w")
 
 selector_wrap = tk.Frame(ingredients_panel, bg="#ffffff")
 selector_wrap.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 8))
@@ -838,29 +1462,85 @@ def _on_canvas_configure_editor(event):
 
 canvas_editor.bind("<Configure>", _on_canvas_configure_editor)
 
+# The selector keeps one Checkbutton per ingredient across editor sessions
+# (keyed by name in editor_checks / new_meal_vars); opening the editor only
+# adds, removes or re-checks the entries that changed, and re-grids the ones
+# whose position moved. At most EDITOR_MAX_SHOWN unchecked entries are
+# gridded at once; larger sets are narrowed with the filter box. Checked
+# entries are always shown.
 EDITOR_COLS = 2
+EDITOR_MAX_SHOWN = 200
+EDITOR_FILTER_DEBOUNCE_MS = 120
+editor_checks = {}
+editor_index = engine.SavedMealIndex()  # sorted, case-insensitive name index used for filtering
+editor_shown = []
+editor_filter_job = None
+
+for c in range(EDITOR_COLS):
+    inner_editor.grid_columnconfigure(c, weight=1)
+
+def _add_editor_entry(name, checked):
+    var = new_meal_vars[name] = tk.BooleanVar(value=checked)
+    editor_checks[name] = tk.Checkbutton(
+        inner_editor, text=name, variable=var,
+        indicatoron=False, anchor="w", padx=10
+    )
+    editor_index.add(name)
 
-def populate_selector(prechecked=None):
-    for w in inner_editor.winfo_children():
-        w.destroy()
-    new_meal_vars.clear()
+def _remove_editor_entry(name):
+    editor_checks.pop(name).destroy()
+    del new_meal_vars[name]
+    editor_index.remove(name)
 
+@instrumentation.timed("populate_selector")
+def populate_selector(prechecked=None):
     pre = set(prechecked or [])
-    all_ings = sorted(set(ingredient_vars.keys()) | pre, key=str.lower)
-
-    for c in range(EDITOR_COLS):
-        inner_editor.grid_columnconfigure(c, weight=1)
-
-    for idx, ing in enumerate(all_ings):
-        r, c = divmod(idx, EDITOR_COLS)
-        var = tk.BooleanVar(value=(ing in pre))
-        new_meal_vars[ing] = var
-        cb = tk.Checkbutton(
-            inner_editor, text=ing, variable=var,
-            indicatoron=False, anchor="w", padx=10
-        )
-        cb.grid(row=r, column=c, sticky="ew", padx=6, pady=4)
+    known = set(ingredient_vars) | pre
+    for name in [n for n in new_meal_vars if n not in known]:
+        _remove_editor_entry(name)
+    for name in known:
+        var = new_meal_vars.get(name)
+        if var is None:
+            _add_editor_entry(name, name in pre)
+        elif var.get() != (name in pre):
+            var.set(name in pre)
+    editor_filter_var.set("")
+    _layout_selector()
+
+def _schedule_editor_filter(*args):
+    global editor_filter_job
+    if editor_filter_job is not None:
+        root.after_cancel(editor_filter_job)
+    editor_filter_job = root.after(EDITOR_FILTER_DEBOUNCE_MS, _layout_selector)
+
+def _layout_selector():
+    global editor_shown, editor_filter_job
+    if editor_filter_job is not None:
+        root.after_cancel(editor_filter_job)
+        editor_filter_job = None
+    matches = editor_index.search(editor_filter_var.get())
+    names = matches[:EDITOR_MAX_SHOWN]
+    extra = {n for n, var in new_meal_vars.items() if var.get()}.difference(names)
+    if extra:
+        names = sorted(set(names) | extra, key=lambda n: (n.lower(), n))
+
+    position = {name: i for i, name in enumerate(names)}
+    for name in editor_shown:
+        if name not in position and name in editor_checks:
+            editor_checks[name].grid_remove()
+    old = {name: i for i, name in enumerate(editor_shown)}
+    for i, name in enumerate(names):
+        if old.get(name) != i:
+            r, c = divmod(i, EDITOR_COLS)
+            editor_checks[name].grid(row=r, column=c, sticky="ew", padx=6, pady=4)
+    editor_shown = names
+
+    if len(matches) > EDITOR_MAX_SHOWN:
+        editor_count_lbl.config(text=f"Showing {EDITOR_MAX_SHOWN} of {len(matches)}, type to narrow")
+    else:
+        editor_count_lbl.config(text="")
 
+editor_filter_var.trace_add("write", _schedule_editor_filter)
 populate_selector()
 
 description_panel = tk.Frame(content_frame, bd=0, bg="#ffffff", highlightthickness=1, highlightbackground="#DADADA")
@@ -893,19 +1573,17 @@ def add_custom_to_editor(event=None):
     name = custom_entry.get().strip()
     if not name:
         return
+    name = CANONICAL.canonical_name(name, fuzzy=True)
     if name in new_meal_vars:
-        messagebox.showinfo("Duplicate", f"'{name}' is already listed.")
+        # it may be filtered out of view; checked entries are always shown
+        new_meal_vars[name].set(True)
+        _layout_selector()
+        messagebox.showinfo("Duplicate", f"'{name}' is already listed and is now checked.")
         custom_entry.delete(0, tk.END)
         return
 
-    new_meal_vars[name] = tk.BooleanVar(value=True)
-    idx = len(new_meal_vars) - 1
-    r, c = divmod(idx, EDITOR_COLS)
-    cb = tk.Checkbutton(
-        inner_editor, text=name, variable=new_meal_vars[name],
-        indicatoron=False, anchor="w", padx=10
-    )
-    cb.grid(row=r, column=c, sticky="ew", padx=6, pady=4)
+    _add_editor_entry(name, True)
+    _layout_selector()
     custom_entry.delete(0, tk.END)
 
 custom_entry.bind("<Return>", add_custom_to_editor)
@@ -932,21 +1610,23 @@ def save_meal_from_editor():
         err_lbl.config(text="Select at least 2 ingredients.")
         return
 
-    global saved_meals, editing_original_name
-
+    replaces = None
     if editor_mode == "edit" and editing_original_name and name != editing_original_name:
         if name in saved_meals:
             messagebox.showerror("Name exists", f"A meal named '{name}' already exists.")
             return
-        saved_meals.pop(editing_original_name, None)
+        replaces = editing_original_name
 
-    saved_meals[name] = {
+    # one journal record; saved_meals is updated in place by the store
+    meal = {
         "ingredients": chosen,
         "description": desc,
     }
-    save_saved_meals()
-    saved_meals.clear()
-    saved_meals.update(load_saved_meals())
+    if not _journal_meal_edit(meal_store.put, name, meal, replaces):
+        return
+    if replaces is not None:
+        saved_index.remove(replaces)
+    saved_index.add(name)
 
     refresh_saved_list()
     messagebox.showinfo("Saved", f"Meal '{name}' saved.")
@@ -989,8 +1669,45 @@ def open_meal_editor(existing_name=None):
 
 btn2.config(command=lambda: show_frame(manage_menu_frame))
 
+# ---------- Responsiveness ----------
+# Heartbeat watchdog on the Tk loop; the session's latency histogram and the
+# stacks of stalls over the threshold are appended to the report on exit.
+STALL_REPORT = cli_args.stall_report or os.environ.get("MEAL_PLANNER_STALL_REPORT")
+stall_monitor = None
+if STALL_REPORT:
+    stall_monitor = StallMonitor(root, threshold_ms=cli_args.stall_threshold)
+
+def on_close():
+    if meal_store.journal_records:
+        save_saved_meals()
+    if stall_monitor is not None:
+        stall_monitor.stop()
+        try:
+            stall_monitor.append_report(STALL_REPORT)
+        except OSError:
+            pass
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+
+def toggle_profile(event=None):
+    path = instrumentation.toggle_profile()
+    if path is None:
+        messagebox.showinfo("Profiling", "cProfile capture started; press Ctrl+Alt+P again to stop.")
+    else:
+        messagebox.showinfo("Profiling", f"Profile written to {path}")
+
+if instrumentation.enabled:
+    root.bind_all("<Control-Alt-p>", toggle_profile)
+
 # ---------- Start ----------
 show_frame(main_menu)
-root.mainloop()
+if stall_monitor is not None:
+    stall_monitor.start()
+start_recipe_watcher()
+start_recipe_loading()
+root.after_idle(_pump_saved_index)
+if __name__ == "__main__":
+    root.mainloop()
 
 
@@ -0,0 +1,469 @@
+"""Local JSON API over the recipe engine, for front-ends that should not embed it.
+
+    python Main.py --serve 8765
+    python api_server.py --serve 8765 --workers 4
+
+Endpoints (request and response bodies are JSON):
+
+    GET    /health
+    GET    /stats                 request, coalescing and queue counters
+    POST   /match                 {"pantry": [...], "category": "Lunch", "k": 10}
+    GET    /recipes/<id>
+    POST   /plan/daily            {"seed": 1} (optional)
+    POST   /plan/weekly           {"pantry": [...], "days": 7, "seed": 1}
+    GET    /meals?q=text          saved meal names, optionally filtered
+    GET    /meals/<name>
+    PUT    /meals/<name>          {"ingredients": [...], "description": "..."}
+    DELETE /meals/<name>
+
+The server is a single asyncio loop speaking HTTP/1.1 with keep-alive
+(``Connection: close`` and HTTP/1.0 clients get one response per connection).
+Matching and planning run in a process pool sharing the catalog the same way
+batch mode does (see batch.py). Identical ``/match`` and ``/plan/weekly``
+requests that arrive while one is already being computed wait for that result
+instead of queueing their own. At most ``--max-concurrency`` engine jobs are
+in flight; once ``--max-queue`` more are waiting, new ones get 503 with
+Retry-After. Saved meals are read and written through the same store as the
+desktop app (meals.json plus its journal, or MEAL_PLANNER_DB), which allows
+only one writing process at a time: the server refuses to start while the
+desktop app has the meals open, and the other way round.
+
+Binds to 127.0.0.1 unless ``--host`` says otherwise; there is no
+authentication, so only expose it on a trusted network.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import batch
+import engine
+import instrumentation
+import planner
+import shopping
+from canonical import DEFAULT as CANONICAL, normalize_key
+from meal_store import MealStore, StoreLocked
+from sqlite_store import SQLiteMealStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MEALS_FILE = "meals.json"
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15.0
+MAX_K = 100
+MAX_PLAN_DAYS = 28
+QUEUE_PER_SLOT = 8
+RETRY_AFTER_S = 1
+
+_planner = None
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+# ---------- Engine Jobs (run in the worker processes) ----------
+def _init_worker(recipes_path, db_path):
+    # a forked worker must not run the parent's SIGTERM handler (it would stop the parent's loop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    batch._init_worker(recipes_path, db_path)
+
+
+def _summaries(recipes, pantry=()):
+    have = CANONICAL.ids(pantry)
+    return [batch.recipe_summary(r, len(have & CANONICAL.ids(r.get("ingredients", ()))))
+            if r is not None else None for r in recipes]
+
+
+def _match_job(pantry, category, k):
+    hits = engine.match_with_counts(batch._catalog, pantry, k, category)
+    return [batch.recipe_summary(r, n) for r, n in hits]
+
+
+def _daily_job(seed):
+    meals = engine.generate_daily_meals(batch._catalog, random.Random(seed))
+    if meals is None:
+        return None
+    return dict(zip(("breakfast", "lunch", "dinner"), _summaries(meals)))
+
+
+def _weekly_job(pantry, days, seed):
+    global _planner
+    if _planner is None or _planner.catalog is not batch._catalog:
+        _planner = planner.MealPlanner(batch._catalog)
+    plan = _planner.plan(days=days, pantry=pantry, rng=random.Random(seed))
+    if plan is None:
+        return None
+    shop = shopping.ShoppingList(shopping.IngredientTable(), pantry)
+    shop.update(shopping.plan_meals(plan))
+    slots = [slot.lower() for slot in planner.DEFAULT_SLOTS]
+    return {
+        "days": [dict(zip(slots, _summaries(row, pantry))) for row in plan],
+        "shopping_list": shop.items(),
+    }
+
+
+# ---------- Request Validation ----------
+def _object(body):
+    if not body:
+        return {}
+    try:
+        req = json.loads(body)
+    except ValueError as e:
+        raise HTTPError(400, f"invalid JSON: {e}")
+    except RecursionError:
+        raise HTTPError(400, "invalid JSON: nested too deeply")
+    if not isinstance(req, dict):
+        raise HTTPError(400, "request body must be a JSON object")
+    return req
+
+
+def _pantry(req, required=True):
+    pantry = req.get("pantry", None if required else [])
+    if not isinstance(pantry, list) or not all(isinstance(p, str) for p in pantry):
+        raise HTTPError(400, "pantry must be a list of ingredient names")
+    return pantry
+
+
+def _int(req, name, default, low, high):
+    value = req.get(name, default)
+    if value is None and default is None:
+        return None
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise HTTPError(400, f"{name} must be an integer from {low} to {high}")
+    return value
+
+
+def _pantry_key(pantry):
+    # case and plurals folded so "Eggs"/"egg" requests share one computation
+    return tuple(sorted({normalize_key(p) for p in pantry}))
+
+
+# ---------- Server ----------
+class APIServer:
+    """Routes, coalescing and admission control around one engine process pool."""
+
+    def __init__(self, recipes_path, db_path=None, meals_path=MEALS_FILE,
+                 workers=None, max_concurrency=None, max_queue=None):
+        self.recipes_path = recipes_path
+        self.db_path = db_path
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_concurrency = max(1, max_concurrency or self.workers * 2)
+        self.max_queue = self.max_concurrency * QUEUE_PER_SLOT if max_queue is None else max(0, max_queue)
+        self.catalog = None
+        self.pool = None
+        self.store = SQLiteMealStore(db_path) if db_path else MealStore(meals_path)
+        # raises StoreLocked while the desktop app (or another server) owns the meals
+        self.store.lock()
+        self.meals = self.store.load()
+        self.meal_index = engine.SavedMealIndex(self.meals)
+        self.meal_index.index_all()
+        self._slots = None
+        self._waiting = 0
+        self._inflight = {}  # coalescing key -> asyncio.Future of the running job
+        self.stats = {"requests": 0, "errors": 0, "rejected": 0, "coalesced": 0,
+                      "jobs": 0, "connections": 0, "open_connections": 0}
+
+    def start(self):
+        """Open the catalog and start the pool (forked workers inherit the catalog)."""
+        started = time.perf_counter()
+        batch._catalog = self.catalog = batch.open_catalog(self.recipes_path, self.db_path)
+        batch._catalog_source = (self.recipes_path, self.db_path)
+        instrumentation.record("api.load", time.perf_counter() - started)
+        context = multiprocessing.get_context("fork") if batch.can_fork() else None
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                        initializer=_init_worker,
+                                        initargs=(self.recipes_path, self.db_path))
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        try:
+            if self.store.journal_records:
+                self.store.compact()
+        finally:
+            self.store.unlock()
+
+    # ---------- Engine Dispatch ----------
+    async def _run_job(self, fn, *args):
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise HTTPError(503, "server busy, retry later")
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            self.stats["jobs"] += 1
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self._slots.release()
+
+    async def _coalesced(self, key, fn, *args):
+        """Result of ``fn(*args)``, shared with any identical request already in flight."""
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.stats["coalesced"] += 1
+            instrumentation.count("api.coalesced")
+            return await asyncio.shield(shared)
+        shared = asyncio.get_running_loop().create_future()
+        self._inflight[key] = shared
+        try:
+            result = await self._run_job(fn, *args)
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as e:
+            shared.set_exception(e)
+            # followers re-raise it; mark it retrieved so a lone leader does not log it
+            shared.exception()
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    # ---------- Routes ----------
+    async def handle(self, method, path, query, body):
+        """(status, JSON-ready payload) for one request."""
+        if path == "/health":
+            self._allow(method, "GET")
+            return 200, {"status": "ok", "recipes": len(self.catalog), "meals": len(self.meals)}
+        if path == "/stats":
+            self._allow(method, "GET")
+            return 200, dict(self.stats, inflight=len(self._inflight), waiting=self._waiting)
+        if path == "/match":
+            self._allow(method, "POST")
+            req = _object(body)
+            try:
+                pantry, category, k = batch.parse_request(req)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            k = min(k, MAX_K)
+            key = ("match", _pantry_key(pantry), category.casefold() if category else None, k)
+            return 200, {"results": await self._coalesced(key, _match_job, pantry, category, k)}
+        if path == "/plan/daily":
+            self._allow(method, "POST")
+            seed = _int(_object(body), "seed", None, 0, 2 ** 63)
+            return 200, {"plan": await self._run_job(_daily_job, seed)}
+        if path == "/plan/weekly":
+            self._allow(method, "POST")
+            req = _object(body)
+            pantry = _pantry(req, required=False)
+            days = _int(req, "days", 7, 1, MAX_PLAN_DAYS)
+            seed = _int(req, "seed", None, 0, 2 ** 63)
+            key = ("weekly", _pantry_key(pantry), days, seed)
+            return 200, {"plan": await self._coalesced(key, _weekly_job, pantry, days, seed)}
+        if path.startswith("/recipes/"):
+            self._allow(method, "GET")
+            return 200, self._recipe(unquote(path[len("/recipes/"):]))
+        if path == "/meals":
+            self._allow(method, "GET")
+            text = query.get("q", [""])[0]
+            return 200, {"meals": self.meal_index.search(text)}
+        if path.startswith("/meals/"):
+            return self._meal(method, unquote(path[len("/meals/"):]), body)
+        raise HTTPError(404)
+
+    @staticmethod
+    def _allow(method, *allowed):
+        if method not in allowed:
+            raise HTTPError(405)
+
+    def _recipe(self, rid):
+        # ids are integers in every shipped recipes.json, but any JSON scalar is allowed
+        recipe = self.catalog.get(int(rid)) if rid.lstrip("-").isdigit() else None
+        if recipe is None:
+            recipe = self.catalog.get(rid)
+        if recipe is None:
+            raise HTTPError(404, f"no recipe {rid!r}")
+        return recipe
+
+    def _meal(self, method, name, body):
+        # store edits are one fsync'd journal line (or one SQLite commit), cheap
+        # enough to run on the loop, which also keeps them strictly ordered
+        if not name:
+            raise HTTPError(404)
+        if method == "GET":
+            meal = self.meals.get(name)
+            if meal is None:
+                raise HTTPError(404, f"no saved meal {name!r}")
+            return 200, {"name": name, **meal}
+        if method == "PUT":
+            meal = engine.normalize_saved_meal(_object(body))
+            if meal is None or not meal["ingredients"]:
+                raise HTTPError(400, "a meal needs an ingredients list")
+            created = name not in self.meals
+            self.store.put(name, meal)
+            self.meal_index.add(name)
+            return (201 if created else 200), {"name": name, **self.meals[name]}
+        if method == "DELETE":
+            if name not in self.meals:
+                raise HTTPError(404, f"no saved meal {name!r}")
+            self.store.delete(name)
+            self.meal_index.remove(name)
+            return 200, {"deleted": name}
+        raise HTTPError(405)
+
+    # ---------- HTTP ----------
+    async def serve_connection(self, reader, writer):
+        self.stats["connections"] += 1
+        self.stats["open_connections"] += 1
+        try:
+            while await self._serve_one(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.stats["open_connections"] -= 1
+            writer.close()
+
+    async def _serve_one(self, reader, writer):
+        """Answer one request; False once the connection should be closed."""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+        except asyncio.LimitOverrunError:
+            await self._respond(writer, 431, {"error": "request headers too large"}, False)
+            return False
+        except asyncio.IncompleteReadError:
+            return False  # client closed between requests
+        started = time.perf_counter()
+        self.stats["requests"] += 1
+        keep_alive = False
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ")
+            except ValueError:
+                raise HTTPError(400, "malformed request line")
+            if not version.startswith("HTTP/1."):
+                raise HTTPError(505)
+            headers = {}
+            for line in lines[1:]:
+                if line:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+            if "transfer-encoding" in headers:
+                keep_alive = False
+                raise HTTPError(501, "chunked request bodies are not supported")
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                keep_alive = False
+                raise HTTPError(400, "invalid Content-Length")
+            if length > MAX_BODY_BYTES or length < 0:
+                keep_alive = False
+                raise HTTPError(413)
+            body = await reader.readexactly(length) if length else b""
+            url = urlsplit(target)
+            status, payload = await self.handle(method, url.path.rstrip("/") or "/", parse_qs(url.query), body)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        if status >= 400:
+            self.stats["errors"] += 1
+        await self._respond(writer, status, payload, keep_alive)
+        instrumentation.record("api.request", time.perf_counter() - started)
+        return keep_alive
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            "Connection: " + ("keep-alive" if keep_alive else "close"),
+        ]
+        if status == 503:
+            head.append(f"Retry-After: {RETRY_AFTER_S}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(server, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    """Run ``server`` until cancelled; ``ready`` is called with the bound (host, port)."""
+    server.start()
+    try:
+        try:
+            # stop cleanly (pool shut down, journal compacted) when a service manager asks
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):
+            pass  # Windows
+        listener = await asyncio.start_server(server.serve_connection, host, port, limit=MAX_HEADER_BYTES)
+        async with listener:
+            bound = listener.sockets[0].getsockname()[:2]
+            if ready is not None:
+                ready(bound)
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+# ---------- Command Line ----------
+def add_arguments(parser):
+    parser.add_argument("--serve", type=int, nargs="?", const=DEFAULT_PORT, metavar="PORT",
+                        help=f"serve the JSON API on PORT (default {DEFAULT_PORT}) instead of opening a window")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="API listen address (default: %(default)s)")
+    parser.add_argument("--max-concurrency", type=int,
+                        help="engine jobs in flight (default: twice the worker count)")
+    parser.add_argument("--max-queue", type=int,
+                        help=f"engine jobs waiting before 503s (default: {QUEUE_PER_SLOT} per concurrency slot)")
+
+
+def run_from_args(args, recipes_path, db_path=None):
+    try:
+        server = APIServer(recipes_path, db_path, workers=args.workers,
+                           max_concurrency=args.max_concurrency, max_queue=args.max_queue)
+    except StoreLocked as e:
+        print(f"api: {e}; close the desktop app or other server first", file=sys.stderr)
+        return 1
+
+    def ready(bound):
+        print(f"api: serving {len(server.catalog)} recipes on http://{bound[0]}:{bound[1]} "
+              f"({server.workers} workers)", file=sys.stderr, flush=True)
+
+    try:
+        asyncio.run(serve(server, args.host, args.serve, ready))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meal Planner JSON API")
+    add_arguments(parser)
+    parser.add_argument("--workers", type=int, help="engine worker processes (default: CPU count)")
+    parser.add_argument("--recipes", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json"),
+                        help="recipes file (default: %(default)s)")
+    instrumentation.add_arguments(parser)
+    parser.add_argument("--stall-report", help=argparse.SUPPRESS)
+    parser.add_argument("--stall-threshold", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.serve is None:
+        args.serve = DEFAULT_PORT
+    instrumentation.configure_from_args(args)
+    return run_from_args(args, args.recipes, os.environ.get("MEAL_PLANNER_DB"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
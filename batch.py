@@ -0,0 +1,227 @@
+"""Headless batch suggestions: JSONL requests in, JSONL results out.
+
+Each input line is a JSON object such as
+
+    {"id": "a1", "pantry": ["Rice", "Eggs"], "category": "Breakfast", "k": 5}
+
+(``pantry`` is required; ``id`` is echoed back; ``category`` and ``k`` are
+optional) and produces one output line, in input order:
+
+    {"id": "a1", "results": [{"id": 3, "name": "...", "category": "Breakfast",
+                              "overlap": 2, "missing": 1}, ...]}
+
+or ``{"id": ..., "line": n, "error": "..."}`` for a malformed request.
+
+Requests are sent to a process pool in chunks of ``chunk_size`` lines. The
+catalog is opened once in the parent before the pool starts: forked workers
+inherit it (a compiled catalog is a shared read-only mmap), other start
+methods reopen it in the pool initializer. At most ``workers * 2`` chunks are
+in flight; input is only read as results are written, so memory stays
+bounded however large the input is. Throughput stats go to stderr.
+
+    python Main.py --batch requests.jsonl > results.jsonl
+    cat requests.jsonl | python batch.py --batch - --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import compiled_catalog
+import engine
+import instrumentation
+from sqlite_store import SQLiteCatalog
+
+DEFAULT_K = 10
+CHUNK_SIZE = 64
+IN_FLIGHT_PER_WORKER = 2
+
+_catalog = None
+_catalog_source = None
+
+
+def open_catalog(recipes_path, db_path=None):
+    """The catalog batch mode queries: SQLite, else the compiled catalog, else the JSON file."""
+    if db_path:
+        return SQLiteCatalog(db_path)
+    if not os.path.exists(recipes_path):
+        return engine.RecipeCatalog()
+    try:
+        return compiled_catalog.open_catalog(recipes_path)
+    except (OSError, ValueError):
+        # e.g. non-integer ids, which the compiled format cannot store
+        return engine.load_catalog(recipes_path)
+
+
+def can_fork():
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _init_worker(recipes_path, db_path):
+    global _catalog, _catalog_source
+    # SQLite connections must not cross a fork; anything else inherited is reused
+    if _catalog is None or db_path or _catalog_source != (recipes_path, db_path):
+        _catalog = open_catalog(recipes_path, db_path)
+        _catalog_source = (recipes_path, db_path)
+
+
+def recipe_summary(recipe, overlap):
+    return {
+        "id": recipe.get("id"),
+        "name": recipe.get("name"),
+        "category": recipe.get("category"),
+        "overlap": overlap,
+        "missing": len(recipe.get("ingredients", ())) - overlap,
+    }
+
+
+def parse_request(req):
+    """Validated (pantry, category, k) of one decoded request; raises ValueError."""
+    if not isinstance(req, dict):
+        raise ValueError("request must be a JSON object")
+    pantry = req.get("pantry")
+    if not isinstance(pantry, list) or not all(isinstance(p, str) for p in pantry):
+        raise ValueError("pantry must be a list of ingredient names")
+    k = req.get("k", DEFAULT_K)
+    if not isinstance(k, int) or isinstance(k, bool) or k < 0:
+        raise ValueError("k must be a non-negative integer")
+    category = req.get("category")
+    if category is not None and not isinstance(category, str):
+        raise ValueError("category must be a string")
+    return pantry, category, k
+
+
+def handle_request(catalog, line):
+    """One output object for one input line (already stripped, non-empty)."""
+    req = json.loads(line)
+    pantry, category, k = parse_request(req)
+    hits = engine.match_with_counts(catalog, pantry, k, category)
+    return {"id": req.get("id"), "results": [recipe_summary(r, n) for r, n in hits]}
+
+
+def process_chunk(chunk):
+    """Handle [(line number, text)]; returns ([output JSON lines], [seconds per request], errors)."""
+    out = []
+    timings = []
+    errors = 0
+    for lineno, text in chunk:
+        start = time.perf_counter()
+        try:
+            result = handle_request(_catalog, text)
+        except RecursionError:
+            # nesting too deep for json.loads; one bad line must not fail the chunk
+            result = {"id": None, "line": lineno, "error": "request is nested too deeply"}
+            errors += 1
+        except Exception as e:
+            rid = None
+            try:
+                rid = json.loads(text).get("id")
+            except (ValueError, AttributeError):
+                pass
+            result = {"id": rid, "line": lineno, "error": str(e) or type(e).__name__}
+            errors += 1
+        out.append(json.dumps(result, ensure_ascii=False))
+        timings.append(time.perf_counter() - start)
+    return out, timings, errors
+
+
+def _read_chunks(lines, chunk_size):
+    chunk = []
+    for lineno, text in enumerate(lines, 1):
+        text = text.strip()
+        if not text:
+            continue
+        chunk.append((lineno, text))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run(lines, out, recipes_path, db_path=None, workers=None, chunk_size=CHUNK_SIZE, stats=sys.stderr):
+    """Stream results for ``lines`` to ``out`` in input order; returns the number of failed requests."""
+    global _catalog, _catalog_source
+    workers = max(1, workers or os.cpu_count() or 1)
+    started = time.perf_counter()
+    _catalog = open_catalog(recipes_path, db_path)
+    _catalog_source = (recipes_path, db_path)
+    load_s = time.perf_counter() - started
+    instrumentation.record("batch.load", load_s)
+
+    context = multiprocessing.get_context("fork") if can_fork() else None
+    window = workers * IN_FLIGHT_PER_WORKER
+    pending = deque()
+    timings = []
+    done = errors = 0
+
+    def drain_one():
+        nonlocal done, errors
+        results, chunk_timings, chunk_errors = pending.popleft().result()
+        out.write("\n".join(results) + "\n")
+        out.flush()
+        done += len(results)
+        errors += chunk_errors
+        timings.extend(chunk_timings)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(recipes_path, db_path)) as pool:
+        for chunk in _read_chunks(lines, chunk_size):
+            # back-pressure: stop reading until the oldest chunk has been written
+            if len(pending) >= window:
+                drain_one()
+            pending.append(pool.submit(process_chunk, chunk))
+        while pending:
+            drain_one()
+
+    elapsed = time.perf_counter() - started
+    instrumentation.count("batch.requests", done)
+    if stats is not None:
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1000 if timings else 0.0
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000 if timings else 0.0
+        rate = done / (elapsed - load_s) if elapsed > load_s else 0.0
+        print(f"batch: {done} requests ({errors} errors) in {elapsed:.2f} s "
+              f"(catalog {load_s:.2f} s, {len(_catalog)} recipes), {rate:.0f} req/s with {workers} workers, "
+              f"per request p50 {p50:.2f} ms p99 {p99:.2f} ms", file=stats)
+    return errors
+
+
+def add_arguments(parser):
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer JSONL suggestion requests from FILE ('-' for stdin) without a window")
+    parser.add_argument("--workers", type=int, help="batch worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="requests per worker task (default: %(default)s)")
+
+
+def run_from_args(args, recipes_path, db_path=None):
+    if args.batch == "-":
+        errors = run(sys.stdin, sys.stdout, recipes_path, db_path, args.workers, max(1, args.chunk_size))
+    else:
+        with open(args.batch, "r", encoding="utf-8") as f:
+            errors = run(f, sys.stdout, recipes_path, db_path, args.workers, max(1, args.chunk_size))
+    return 1 if errors else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meal Planner batch suggestions")
+    add_arguments(parser)
+    parser.add_argument("--recipes", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json"),
+                        help="recipes file (default: %(default)s)")
+    instrumentation.add_arguments(parser)
+    parser.add_argument("--stall-report", help=argparse.SUPPRESS)
+    parser.add_argument("--stall-threshold", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if not args.batch:
+        parser.error("--batch is required")
+    instrumentation.configure_from_args(args)
+    return run_from_args(args, args.recipes, os.environ.get("MEAL_PLANNER_DB"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
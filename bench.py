@@ -0,0 +1,302 @@
+"""Benchmarks for the recipe engine and the Tk render paths.
+
+Generates synthetic recipe catalogs and saved-meal files, then reports latency
+percentiles, throughput and tracemalloc peak memory for each path:
+
+    python bench.py                      # 1k, 10k and 100k recipes
+    python bench.py --sizes 1000 1000000 --repeat 50
+    python bench.py --json results.json
+
+The search, load and saved-meal paths are pure Python. The render paths
+(display_recipe_list_with_boxes, refresh_saved_list, and the widget churn of
+``--searches`` consecutive searches) need a display and are skipped when none
+is available; use e.g. ``xvfb-run python bench.py``.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import compiled_catalog
+import engine
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+CATEGORIES = ("Breakfast", "Lunch", "Dinner", "Snack", "Dessert", "Side")
+BASE_INGREDIENTS = (
+    "Rice", "Pasta", "Bread", "Potatoes", "Flour",
+    "Chicken", "Beef", "Fish", "Eggs", "Pork",
+    "Tomatoes", "Carrots", "Cabbage", "Onion", "Cauliflower",
+    "Bananas", "Apples", "Oranges", "Coconut", "Lemons",
+    "Garlic", "Butter", "Milk", "Cheese", "Soy Sauce",
+)
+
+
+# ---------- Synthetic Data ----------
+def ingredient_vocabulary(size=2000):
+    """Base pantry ingredients followed by a long tail of rarer ones."""
+    extra = [f"Ingredient {i}" for i in range(max(0, size - len(BASE_INGREDIENTS)))]
+    return list(BASE_INGREDIENTS) + extra
+
+
+def _zipf_weights(n, s=1.1):
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def synthetic_recipes(count, seed=0, vocab=None):
+    """Yield ``count`` recipe dicts whose ingredients follow a Zipf distribution."""
+    rng = random.Random(seed)
+    vocab = vocab or ingredient_vocabulary()
+    cum = []
+    total = 0.0
+    for w in _zipf_weights(len(vocab)):
+        total += w
+        cum.append(total)
+    for i in range(count):
+        n_ings = min(len(vocab), max(2, int(rng.gauss(7, 2))))
+        ings = []
+        while len(ings) < n_ings:
+            ing = rng.choices(vocab, cum_weights=cum)[0]
+            if ing not in ings:
+                ings.append(ing)
+        steps = [f"Step {s + 1}: prepare {ing.lower()}." for s, ing in enumerate(ings)]
+        yield {
+            "id": i + 1,
+            "name": f"Recipe {i + 1}",
+            "ingredients": ings,
+            "instructions": steps,
+            "category": rng.choice(CATEGORIES),
+        }
+
+
+def synthetic_saved_meals(count, seed=0, vocab=None):
+    rng = random.Random(seed)
+    vocab = vocab or ingredient_vocabulary()
+    words = ("Soup", "Stew", "Salad", "Bake", "Curry", "Roast", "Bowl", "Wrap")
+    meals = {}
+    for i in range(count):
+        name = f"{rng.choice(vocab)} {rng.choice(words)} {i}"
+        meals[name] = {
+            "ingredients": rng.sample(vocab[:200], rng.randint(2, 8)),
+            "description": "Cook everything together.",
+        }
+    return meals
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def random_pantries(count, seed=0, vocab=None):
+    rng = random.Random(seed)
+    vocab = vocab or ingredient_vocabulary()
+    head = vocab[:60]
+    return [rng.sample(head, rng.randint(2, 6)) for _ in range(count)]
+
+
+# ---------- Measurement ----------
+def measure(fn, repeat, setup=None):
+    """Time ``fn`` ``repeat`` times, then once more under tracemalloc for peak memory."""
+    timings = []
+    for i in range(repeat):
+        arg = setup(i) if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+
+    arg = setup(0) if setup else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return summarize(timings, peak)
+
+
+def percentile(sorted_values, pct):
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(timings, peak_bytes):
+    ordered = sorted(timings)
+    mean = statistics.fmean(ordered)
+    return {
+        "runs": len(ordered),
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "ops_per_s": (1.0 / mean) if mean else float("inf"),
+        "peak_mib": peak_bytes / (1024 * 1024),
+    }
+
+
+# ---------- Paths ----------
+def bench_engine(size, repeat, workdir, seed=0):
+    results = {}
+    vocab = ingredient_vocabulary()
+    recipes = list(synthetic_recipes(size, seed=seed, vocab=vocab))
+    recipes_file = os.path.join(workdir, f"recipes_{size}.json")
+    write_json(recipes_file, recipes)
+    meals_file = os.path.join(workdir, f"meals_{size}.json")
+    write_json(meals_file, synthetic_saved_meals(size, seed=seed, vocab=vocab))
+    del recipes
+
+    load_repeat = max(1, min(repeat, 5 if size >= 100000 else repeat))
+    results["load"] = measure(lambda _: engine.load_catalog(recipes_file), load_repeat)
+    compiled_file = compiled_catalog.compile_catalog(recipes_file)
+    results["load_compiled"] = measure(lambda _: compiled_catalog.CompiledCatalog(compiled_file).close(), load_repeat)
+    results["load_saved_meals"] = measure(lambda _: engine.load_saved_meals(meals_file), load_repeat)
+
+    catalog = engine.load_catalog(recipes_file)
+    pantries = random_pantries(repeat, seed=seed, vocab=vocab)
+    results["search"] = measure(lambda p: catalog.match(p), repeat, setup=lambda i: pantries[i % len(pantries)])
+    compiled = compiled_catalog.CompiledCatalog(compiled_file)
+    results["search_compiled"] = measure(lambda p: compiled.match(p), repeat, setup=lambda i: pantries[i % len(pantries)])
+    compiled.close()
+    return results, catalog, meals_file
+
+
+def load_gui():
+    """Import Main for its widgets, or return None when no display is available."""
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception:
+        return None
+    import Main
+    return Main
+
+
+def bench_render(gui, catalog, meals_file, repeat, seed=0):
+    results = {}
+    pantries = random_pantries(repeat, seed=seed)
+    matches = [catalog.match(p) for p in pantries]
+
+    def render_results(i):
+        gui.display_recipe_list_with_boxes(matches[i % len(matches)], pantries[i % len(pantries)])
+        gui.root.update_idletasks()
+
+    results["display_recipe_list_with_boxes"] = measure(render_results, repeat, setup=lambda i: i)
+
+    gui.saved_meals.clear()
+    gui.saved_meals.update(engine.load_saved_meals(meals_file))
+    gui.saved_index.rebuild(gui.saved_meals)
+    gui.saved_index.index_all()
+    queries = ["", "s", "so", "sou", "soup", "rice", "stew 1", "curry 12"]
+
+    def refresh(i):
+        gui.search_var.set(queries[i % len(queries)])
+        gui.refresh_saved_list()
+        gui.root.update_idletasks()
+
+    results["refresh_saved_list"] = measure(refresh, repeat, setup=lambda i: i)
+    return results
+
+
+def _widget_count(widget):
+    return 1 + sum(_widget_count(child) for child in widget.winfo_children())
+
+
+def bench_churn(gui, catalog, searches, seed=0):
+    """Show ``searches`` consecutive result views, clicking the first result of each.
+
+    Reports the per-search latency plus the growth in live widgets, registered
+    Tcl commands and traced Python memory over the whole run.
+    """
+    pantries = random_pantries(min(searches, 200), seed=seed)
+    matches = [catalog.match(p) for p in pantries]
+    root = gui.root
+    root.update()
+    gc.collect()
+    widgets = _widget_count(root)
+    commands = len(root.tk.splitlist(root.tk.call("info", "commands")))
+    tracemalloc.start()
+    timings = []
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        for i in range(searches):
+            hits = matches[i % len(matches)]
+            start = time.perf_counter()
+            gui.display_recipe_list_with_boxes(hits, pantries[i % len(pantries)])
+            if hits:
+                gui.update_instruction_box(hits[0])
+            root.update_idletasks()
+            timings.append(time.perf_counter() - start)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = summarize(timings, peak - base)
+    stats["widgets_delta"] = _widget_count(root) - widgets
+    stats["tcl_commands_delta"] = len(root.tk.splitlist(root.tk.call("info", "commands"))) - commands
+    stats["retained_mib"] = (current - base) / (1024 * 1024)
+    return stats
+
+
+def print_table(rows):
+    header = f"{'path':<32}{'size':>9}{'runs':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'ops/s':>11}{'peak MiB':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['path']:<32}{row['size']:>9}{row['runs']:>6}{row['p50_ms']:>11.3f}{row['p95_ms']:>11.3f}"
+              f"{row['p99_ms']:>11.3f}{row['ops_per_s']:>11.1f}{row['peak_mib']:>10.2f}")
+    churn = [row for row in rows if "widgets_delta" in row]
+    if churn:
+        print()
+        print(f"{'widget churn':<32}{'size':>9}{'runs':>6}{'+widgets':>11}{'+tcl cmds':>11}{'kept MiB':>11}")
+        for row in churn:
+            print(f"{row['path']:<32}{row['size']:>9}{row['runs']:>6}{row['widgets_delta']:>11}"
+                  f"{row['tcl_commands_delta']:>11}{row['retained_mib']:>11.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meal Planner benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="catalog / saved-meal sizes to generate (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-render", action="store_true", help="skip the Tk render paths")
+    parser.add_argument("--searches", type=int, default=1000,
+                        help="consecutive result views for the widget churn path (default: %(default)s)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    gui = None if args.no_render else load_gui()
+    if gui is None and not args.no_render:
+        print("(no display available: skipping render paths)", file=sys.stderr)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="meal_bench_") as workdir:
+        for size in args.sizes:
+            results, catalog, meals_file = bench_engine(size, args.repeat, workdir, seed=args.seed)
+            if gui is not None:
+                results.update(bench_render(gui, catalog, meals_file, args.repeat, seed=args.seed))
+                if args.searches > 0:
+                    results["search_churn"] = bench_churn(gui, catalog, args.searches, seed=args.seed)
+            for path, stats in results.items():
+                rows.append({"path": path, "size": size, **stats})
+            del catalog
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
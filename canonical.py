@@ -0,0 +1,146 @@
+"""Ingredient canonicalization.
+
+Every ingredient spelling is reduced to a key (lower case, punctuation and
+extra spaces dropped, each word singularised, then looked up in SYNONYMS),
+and every key gets a small interned integer id. "Tomato", "tomatoes " and
+"TOMATOES" therefore share one id, and "Spring onion" maps to "onion".
+
+User-typed names can also be resolved fuzzily: keys are indexed by padded
+trigrams, the candidates sharing the most trigrams are compared with
+difflib, and the best one above FUZZY_CUTOFF wins. Lookups are cached per
+raw string, so the catalog loader pays for each distinct spelling once.
+"""
+import difflib
+import re
+import sys
+import threading
+
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_LENGTH = 5  # shorter keys ("pea", "pear") are too close to guess between
+FUZZY_CANDIDATES = 20
+
+SYNONYMS = {
+    "spring onion": "onion",
+    "green onion": "onion",
+    "scallion": "onion",
+    "aubergine": "eggplant",
+    "courgette": "zucchini",
+    "capsicum": "bell pepper",
+    "coriander": "cilantro",
+    "garbanzo bean": "chickpea",
+    "prawn": "shrimp",
+    "minced beef": "ground beef",
+    "beef mince": "ground beef",
+    "soya sauce": "soy sauce",
+    "caster sugar": "sugar",
+    "plain flour": "flour",
+    "all purpose flour": "flour",
+}
+# words that end in "s" but are not plurals
+NOT_PLURAL = {"asparagus", "couscous", "hummus", "molasses", "swiss", "citrus", "bass", "grits"}
+NON_WORD_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+
+
+def _singular(word):
+    if len(word) <= 3 or word in NOT_PLURAL:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_key(text):
+    """Lower-cased, singular, synonym-resolved key for an ingredient name."""
+    words = NON_WORD_RE.sub(" ", text.lower()).split()
+    key = " ".join(_singular(w) for w in words)
+    return SYNONYMS.get(key, key)
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Canonicalizer:
+    """Interns ingredient names to integer ids; thread-safe."""
+
+    def __init__(self):
+        self.names = []  # id -> display name (the first spelling registered)
+        self.keys = []   # id -> key
+        self._ids = {}   # key -> id
+        self._cache = {}  # (raw string, fuzzy) -> id
+        self._trigrams = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        """Id for ``name``, registering its key (with ``name`` as display name) if new."""
+        iid = self._cache.get((name, False))
+        if iid is not None:
+            return iid
+        with self._lock:
+            key = normalize_key(name)
+            iid = self._ids.get(key)
+            if iid is None:
+                iid = self._ids[key] = len(self.names)
+                self.names.append(sys.intern(" ".join(name.split())))
+                self.keys.append(key)
+                for gram in _trigrams(key):
+                    self._trigrams.setdefault(gram, []).append(iid)
+            self._cache[(name, False)] = iid
+        return iid
+
+    def lookup(self, name, fuzzy=False):
+        """Id of a registered ingredient matching ``name``, or None."""
+        cache_key = (name, fuzzy)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+        key = normalize_key(name)
+        iid = self._ids.get(key)
+        if iid is None and fuzzy and len(key) >= FUZZY_MIN_LENGTH:
+            iid = self._fuzzy(key)
+        if iid is not None:
+            # misses are not cached: the name may be registered later
+            self._cache[cache_key] = iid
+        return iid
+
+    def _fuzzy(self, key):
+        shared = {}
+        for gram in _trigrams(key):
+            for iid in self._trigrams.get(gram, ()):
+                shared[iid] = shared.get(iid, 0) + 1
+        best, best_ratio = None, FUZZY_CUTOFF
+        for iid in sorted(shared, key=shared.__getitem__, reverse=True)[:FUZZY_CANDIDATES]:
+            ratio = difflib.SequenceMatcher(None, key, self.keys[iid]).ratio()
+            if ratio >= best_ratio and (best is None or ratio > best_ratio):
+                best, best_ratio = iid, ratio
+        return best
+
+    def name(self, iid):
+        return self.names[iid]
+
+    def canonical_name(self, name, fuzzy=False):
+        """Display name of the ingredient ``name`` resolves to, registering it if unknown."""
+        iid = self.lookup(name, fuzzy)
+        if iid is None:
+            iid = self.intern(name)
+        return self.names[iid]
+
+    def ids(self, names):
+        """Set of registered ids for ``names`` (unknown names are dropped)."""
+        out = set()
+        for name in names:
+            iid = self.lookup(name)
+            if iid is not None:
+                out.add(iid)
+        return out
+
+
+# Shared by the loader, the catalogs and the UI so ids agree everywhere.
+DEFAULT = Canonicalizer()
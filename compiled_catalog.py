@@ -0,0 +1,338 @@
+"""Compiled, memory-mappable form of ``recipes.json``.
+
+Layout (little-endian, every section 8-byte aligned)::
+
+    header        magic, version, source mtime/size, counts, section offsets
+    str_offsets   uint32[n_strings + 1]   interned ingredient/category strings
+    str_data      utf-8 bytes
+    records       RECORD[n_records]       fixed width, in source order
+    id_keys       int64[n_records]        recipe ids, sorted
+    id_rows       uint32[n_records]       record row for each sorted id
+    ing_ids       uint32[...]             string ids of each recipe's ingredients
+    post_dir      (uint32 start, uint32 count)[n_strings]
+    postings      uint32[...]             record rows per ingredient, under its first spelling's string id
+    name_slots    uint32[n_slots]         open-addressing name -> row + 1 table
+    blob          utf-8 names and instructions (steps joined by \\x1f)
+
+The file is rebuilt whenever the source JSON's mtime or size changes. Records
+are decoded lazily from the mmap, so opening a catalog costs only the string
+table.
+"""
+import bisect
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+import engine
+from canonical import DEFAULT as CANONICAL
+
+MAGIC = b"MPCATLG\0"
+VERSION = 4
+STEP_SEP = "\x1f"
+NO_STRING = 0xFFFFFFFF
+
+HEADER = struct.Struct("<8sIIqqIII10Q")
+RECORD = struct.Struct("<qIIIIIII")
+
+
+def default_path(json_path):
+    return os.path.splitext(json_path)[0] + ".catalog"
+
+
+def _source_stamp(json_path):
+    st = os.stat(json_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _align(buf):
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def compile_catalog(json_path, out_path=None):
+    """Compile ``json_path`` into the binary format and return the output path."""
+    out_path = out_path or default_path(json_path)
+    mtime_ns, size = _source_stamp(json_path)
+
+    strings = []
+    string_ids = {}
+
+    def intern(s):
+        sid = string_ids.get(s)
+        if sid is None:
+            sid = string_ids[s] = len(strings)
+            strings.append(s)
+        return sid
+
+    records = bytearray()
+    ing_ids = []
+    postings = {}
+    posting_sids = {}  # canonical ingredient id -> string id its postings are filed under
+    blob = bytearray()
+    id_pairs = []
+    names = []
+    for row, recipe in enumerate(engine.iter_recipes(json_path)):
+        rid = recipe.get("id", row)
+        if not isinstance(rid, int) or isinstance(rid, bool):
+            raise ValueError(f"recipe ids must be integers to compile a catalog, got {rid!r}")
+        id_pairs.append((rid, row))
+
+        name = recipe["name"].encode("utf-8")
+        names.append(name)
+        name_off = len(blob)
+        blob += name
+        instr = STEP_SEP.join(recipe["instructions"]).encode("utf-8")
+        instr_off = len(blob)
+        blob += instr
+
+        category = recipe.get("category")
+        cat_sid = intern(category) if category is not None else NO_STRING
+        ing_start = len(ing_ids)
+        for ing in recipe["ingredients"]:
+            sid = intern(ing)
+            ing_ids.append(sid)
+            postings.setdefault(posting_sids.setdefault(CANONICAL.intern(ing), sid), []).append(row)
+        records += RECORD.pack(rid, name_off, len(name), cat_sid,
+                               ing_start, len(recipe["ingredients"]), instr_off, len(instr))
+
+    id_pairs.sort()
+    if any(a[0] == b[0] for a, b in zip(id_pairs, id_pairs[1:])):
+        raise ValueError("duplicate recipe ids")
+    n_records = len(id_pairs)
+
+    body = bytearray()
+    offsets = []
+
+    def section(data):
+        offsets.append(HEADER.size + len(body))
+        body.extend(data)
+        _align(body)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    str_offsets = [0]
+    for e in encoded:
+        str_offsets.append(str_offsets[-1] + len(e))
+    section(struct.pack(f"<{len(str_offsets)}I", *str_offsets))
+    section(b"".join(encoded))
+    section(records)
+    section(struct.pack(f"<{n_records}q", *(rid for rid, _ in id_pairs)))
+    section(struct.pack(f"<{n_records}I", *(row for _, row in id_pairs)))
+    section(struct.pack(f"<{len(ing_ids)}I", *ing_ids))
+    post_dir = []
+    flat = []
+    for sid in range(len(strings)):
+        rows = postings.get(sid, ())
+        post_dir += (len(flat), len(rows))
+        flat.extend(rows)
+    section(struct.pack(f"<{len(post_dir)}I", *post_dir))
+    section(struct.pack(f"<{len(flat)}I", *flat))
+    slots = _name_slots(names)
+    section(struct.pack(f"<{len(slots)}I", *slots))
+    section(blob)
+
+    header = HEADER.pack(MAGIC, VERSION, 0, mtime_ns, size, n_records, len(strings), len(slots), *offsets)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def _name_slots(names):
+    """Linear-probing hash table of row + 1 keyed by crc32 of the name (first row wins)."""
+    slots = [0] * (1 << max(3, (2 * len(names)).bit_length()))
+    mask = len(slots) - 1
+    for row, name in enumerate(names):
+        i = zlib.crc32(name) & mask
+        while slots[i] and names[slots[i] - 1] != name:
+            i = (i + 1) & mask
+        if not slots[i]:
+            slots[i] = row + 1
+    return slots
+
+
+def is_fresh(json_path, compiled_path=None):
+    """True if ``compiled_path`` exists and was built from the current ``json_path``."""
+    compiled_path = compiled_path or default_path(json_path)
+    try:
+        with open(compiled_path, "rb") as f:
+            head = f.read(HEADER.size)
+        magic, version, _, mtime_ns, size = HEADER.unpack(head)[:5]
+    except (OSError, struct.error):
+        return False
+    return magic == MAGIC and version == VERSION and (mtime_ns, size) == _source_stamp(json_path)
+
+
+def open_catalog(json_path, compiled_path=None, rebuild=True):
+    """Open the compiled catalog for ``json_path``, recompiling it if stale."""
+    compiled_path = compiled_path or default_path(json_path)
+    if not is_fresh(json_path, compiled_path):
+        if not rebuild:
+            raise FileNotFoundError(f"no up-to-date compiled catalog at {compiled_path}")
+        compile_catalog(json_path, compiled_path)
+    return CompiledCatalog(compiled_path)
+
+
+class _RecordSequence:
+    """Read-only sequence view over the catalog rows, decoded on access."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return self._catalog.n_records
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self._catalog.record(i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self._catalog.record(row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self._catalog.record(row)
+
+
+class CompiledCatalog:
+    """Memory-mapped recipe catalog with the same query surface as RecipeCatalog."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a compiled recipe catalog")
+        fields = HEADER.unpack_from(self._mm, 0)
+        (magic, version, _, self.source_mtime_ns, self.source_size,
+         self.n_records, n_strings, n_slots) = fields[:8]
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a compiled recipe catalog (version {VERSION})")
+        (str_offsets, str_data, self._records_off, id_keys, id_rows,
+         ing_ids, post_dir, postings, name_slots, self._blob_off) = fields[8:]
+
+        view = memoryview(self._mm)
+        n = self.n_records
+        offs = view[str_offsets:str_offsets + 4 * (n_strings + 1)].cast("I")
+        self.strings = [sys.intern(bytes(view[str_data + offs[i]:str_data + offs[i + 1]]).decode("utf-8"))
+                        for i in range(n_strings)]
+        self._id_keys = view[id_keys:id_keys + 8 * n].cast("q")
+        self._id_rows = view[id_rows:id_rows + 4 * n].cast("I")
+        self._ing_ids = view[ing_ids:post_dir].cast("I") if post_dir > ing_ids else memoryview(b"").cast("I")
+        self._post_dir = view[post_dir:post_dir + 8 * n_strings].cast("I")
+        self._postings = view[postings:name_slots].cast("I") if name_slots > postings else memoryview(b"").cast("I")
+        self._name_slots = view[name_slots:name_slots + 4 * n_slots].cast("I")
+        # canonical ingredient id -> string id, for every string that has postings
+        self._canonical_sids = {}
+        for sid, s in enumerate(self.strings):
+            if self._post_dir[2 * sid + 1]:
+                self._canonical_sids.setdefault(CANONICAL.intern(s), sid)
+        self._views = [offs, self._id_keys, self._id_rows, self._ing_ids, self._post_dir, self._postings,
+                       self._name_slots, view]
+        self.recipes = _RecordSequence(self)
+        self.details_cache = engine.LRUCache(engine.DETAIL_CACHE_SIZE)
+
+    def close(self):
+        for v in getattr(self, "_views", ()):
+            v.release()
+        self._views = []
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.n_records
+
+    def __iter__(self):
+        return iter(self.recipes)
+
+    def __bool__(self):
+        return self.n_records > 0
+
+    def _raw(self, row):
+        return RECORD.unpack_from(self._mm, self._records_off + row * RECORD.size)
+
+    def _text(self, off, length):
+        start = self._blob_off + off
+        return self._mm[start:start + length].decode("utf-8")
+
+    def record(self, row):
+        rid, name_off, name_len, cat_sid, ing_start, ing_count, instr_off, instr_len = self._raw(row)
+        instr = self._text(instr_off, instr_len)
+        recipe = {
+            "name": self._text(name_off, name_len),
+            "ingredients": tuple(self.strings[sid] for sid in self._ing_ids[ing_start:ing_start + ing_count]),
+            "instructions": tuple(instr.split(STEP_SEP)) if instr else (),
+            "id": rid,
+        }
+        if cat_sid != NO_STRING:
+            recipe["category"] = self.strings[cat_sid]
+        return recipe
+
+    def row_of(self, rid):
+        i = bisect.bisect_left(self._id_keys, rid)
+        if i < self.n_records and self._id_keys[i] == rid:
+            return self._id_rows[i]
+        return None
+
+    def get(self, rid):
+        row = self.row_of(rid) if isinstance(rid, int) else None
+        return None if row is None else self.record(row)
+
+    def find_by_name(self, name):
+        """First recipe called ``name`` in file order, or None."""
+        key = name.encode("utf-8")
+        slots = self._name_slots
+        mask = len(slots) - 1
+        i = zlib.crc32(key) & mask
+        while slots[i]:
+            row = slots[i] - 1
+            _, name_off, name_len = self._raw(row)[:3]
+            start = self._blob_off + name_off
+            if self._mm[start:start + name_len] == key:
+                return self.record(row)
+            i = (i + 1) & mask
+        return None
+
+    def postings(self, ingredient):
+        return self._canonical_postings(CANONICAL.lookup(ingredient))
+
+    def _canonical_postings(self, iid):
+        sid = self._canonical_sids.get(iid)
+        if sid is None:
+            return ()
+        start, count = self._post_dir[2 * sid], self._post_dir[2 * sid + 1]
+        return self._postings[start:start + count]
+
+    def overlap_counts(self, selected_ingredients, cancel=None):
+        overlap = {}
+        for iid in CANONICAL.ids(selected_ingredients):
+            if cancel is not None and cancel.is_set():
+                return None
+            for row in self._canonical_postings(iid):
+                overlap[row] = overlap.get(row, 0) + 1
+        return overlap
+
+    def rank_key(self):
+        raw = self._raw
+        return lambda item: (item[1], item[1] - raw(item[0])[5], -item[0])
+
+    def resolve(self, row):
+        return self.record(row)
+
+    def match(self, selected_ingredients, k=engine.MAX_SUGGESTIONS):
+        """Same ranking as RecipeCatalog.match, read straight from the posting lists."""
+        return engine.rank_matches(self, self.overlap_counts(selected_ingredients), k)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json")
+    print(compile_catalog(source, sys.argv[2] if len(sys.argv) > 2 else None))
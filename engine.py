@@ -0,0 +1,545 @@
+"""Headless recipe engine used by the Tkinter front-end.
+
+Loading, matching, daily planning and saved-meal persistence live here so they
+can be imported, profiled and reused without creating a Tk window.
+"""
+import bisect
+import heapq
+import json
+import os
+import random
+import sys
+from collections import OrderedDict
+
+from canonical import DEFAULT as CANONICAL
+
+MAX_SUGGESTIONS = 100
+READ_CHUNK_SIZE = 1 << 16
+NUMBER_CONTINUATION = frozenset("0123456789.eE+-")
+DETAIL_CACHE_SIZE = 256
+
+
+class LRUCache:
+    """Small least-recently-used cache on top of OrderedDict."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def clear(self):
+        self._data.clear()
+
+
+# ---------- Recipe Catalog ----------
+class RecipeCatalog:
+    """In-memory recipe store with a canonical ingredient id -> recipe id posting-list index."""
+
+    def __init__(self, recipes=None):
+        self.recipes = []
+        self.by_id = {}
+        self.by_name = {}
+        self.details_cache = LRUCache(DETAIL_CACHE_SIZE)
+        self.ingredient_index = {}
+        self.ingredient_counts = {}
+        self._order = {}
+        for r in recipes or ():
+            self.add(r)
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def __iter__(self):
+        return iter(self.recipes)
+
+    def __bool__(self):
+        return bool(self.recipes)
+
+    def add(self, recipe):
+        """Index ``recipe`` and return its id, or None if the id is already taken."""
+        pos = len(self.recipes)
+        rid = recipe.get("id")
+        if rid is None:
+            rid = pos
+        if rid in self.by_id:
+            return None
+        self.recipes.append(recipe)
+        self.by_id[rid] = recipe
+        self.by_name.setdefault(recipe.get("name"), recipe)
+        self._order[rid] = pos
+        self._index(rid, recipe)
+        return rid
+
+    def _index(self, rid, recipe):
+        ings = {CANONICAL.intern(ing) for ing in recipe.get("ingredients", [])}
+        self.ingredient_counts[rid] = len(ings)
+        for ing in ings:
+            self.ingredient_index.setdefault(ing, []).append(rid)
+
+    def _unindex(self, rid, recipe):
+        self.ingredient_counts.pop(rid, None)
+        for ing in {CANONICAL.intern(ing) for ing in recipe.get("ingredients", [])}:
+            posting = self.ingredient_index.get(ing)
+            if posting is None:
+                continue
+            posting.remove(rid)
+            if not posting:
+                del self.ingredient_index[ing]
+        self.details_cache.pop(recipe.get("id", recipe.get("name")))
+
+    def reload(self, recipes):
+        """Bring the catalog in line with ``recipes`` (e.g. a re-read file).
+
+        Records are matched by id (position when they have none). Only the
+        postings of added, removed and changed recipes are touched; unchanged
+        recipes keep their dict objects. Returns (added, removed, changed)
+        lists of ids.
+        """
+        old = self.by_id
+        by_id = {}
+        for pos, recipe in enumerate(recipes):
+            rid = recipe.get("id")
+            if rid is None:
+                rid = pos
+            if rid in by_id:
+                continue
+            prev = old.get(rid)
+            by_id[rid] = prev if prev == recipe else recipe
+        added = [rid for rid in by_id if rid not in old]
+        removed = [rid for rid in old if rid not in by_id]
+        changed = [rid for rid, recipe in by_id.items() if rid in old and old[rid] is not recipe]
+        for rid in removed + changed:
+            self._unindex(rid, old[rid])
+        for rid in changed + added:
+            self._index(rid, by_id[rid])
+        by_name = {}
+        for recipe in by_id.values():
+            by_name.setdefault(recipe.get("name"), recipe)
+        # the list object is shared with callers, so it is refilled in place
+        self.recipes[:] = by_id.values()
+        self.by_id = by_id
+        self.by_name = by_name
+        self._order = {rid: pos for pos, rid in enumerate(by_id)}
+        return added, removed, changed
+
+    def get(self, rid):
+        return self.by_id.get(rid)
+
+    def find_by_name(self, name):
+        """First recipe called ``name`` in file order, or None."""
+        return self.by_name.get(name)
+
+    def overlap_counts(self, selected_ingredients, cancel=None):
+        """Map recipe id -> number of selected ingredients it uses.
+
+        Returns None if ``cancel`` (a threading.Event) is set during the scan.
+        """
+        overlap = {}
+        for iid in CANONICAL.ids(selected_ingredients):
+            if cancel is not None and cancel.is_set():
+                return None
+            for rid in self.ingredient_index.get(iid, ()):
+                overlap[rid] = overlap.get(rid, 0) + 1
+        return overlap
+
+    def rank_key(self):
+        # most shared ingredients first, then fewest missing ones, then file order
+        counts = self.ingredient_counts
+        order = self._order
+        return lambda item: (item[1], item[1] - counts[item[0]], -order[item[0]])
+
+    def resolve(self, rid):
+        return self.by_id[rid]
+
+    def match(self, selected_ingredients, k=MAX_SUGGESTIONS):
+        """Return up to ``k`` recipes sharing an ingredient with the selection.
+
+        Ranked by overlap, then by fewest missing ingredients, then file order.
+        """
+        return rank_matches(self, self.overlap_counts(selected_ingredients), k)
+
+
+# ---------- Matching ----------
+SEARCH_BATCH_SIZE = 25
+CATEGORY_OVERSAMPLE = 8
+
+
+def rank_matches(catalog, overlap, k=MAX_SUGGESTIONS, skip=0):
+    """Resolve the top ``k`` entries of an ``overlap_counts`` result, dropping the first ``skip``."""
+    if not overlap:
+        return []
+    top = heapq.nlargest(k, overlap.items(), key=catalog.rank_key())
+    return [catalog.resolve(key) for key, _ in top[skip:]]
+
+
+def match_with_counts(catalog, selected_ingredients, k=MAX_SUGGESTIONS, category=None):
+    """[(recipe, overlap)] ranked like ``match``, optionally only recipes in ``category``.
+
+    ``category`` is compared case-insensitively. With a category, the best
+    ``CATEGORY_OVERSAMPLE * k`` candidates are resolved and filtered first,
+    and the window only grows when too few of them are in the category.
+    """
+    overlap = catalog.overlap_counts(selected_ingredients)
+    if not overlap or k <= 0:
+        return []
+    key = catalog.rank_key()
+    if category is None:
+        return [(catalog.resolve(item), n) for item, n in heapq.nlargest(k, overlap.items(), key=key)]
+    wanted = category.casefold()
+    window = k * CATEGORY_OVERSAMPLE
+    while True:
+        out = []
+        for item, n in heapq.nlargest(window, overlap.items(), key=key):
+            recipe = catalog.resolve(item)
+            if str(recipe.get("category", "")).casefold() == wanted:
+                out.append((recipe, n))
+                if len(out) >= k:
+                    return out
+        if window >= len(overlap):
+            return out
+        window *= 4
+
+
+def iter_match_batches(catalog, selected_ingredients, k=MAX_SUGGESTIONS,
+                       batch_size=SEARCH_BATCH_SIZE, cancel=None):
+    """Yield the ranked matches in batches, best first.
+
+    The overlap scan always runs to completion first (any recipe may be the
+    best match), so only ranking, resolving and rendering are incremental: the
+    first batch is selected with a heap of ``batch_size`` entries and handed
+    out before the rest is ranked. Stops early once ``cancel`` is set.
+    """
+    overlap = catalog.overlap_counts(selected_ingredients, cancel)
+    if not overlap:
+        return
+    first = rank_matches(catalog, overlap, min(k, batch_size))
+    yield first
+    if k <= batch_size or len(overlap) <= batch_size:
+        return
+    if cancel is not None and cancel.is_set():
+        return
+    rest = rank_matches(catalog, overlap, k, skip=len(first))
+    for start in range(0, len(rest), batch_size):
+        if cancel is not None and cancel.is_set():
+            return
+        yield rest[start:start + batch_size]
+
+
+# ---------- Recipe Details ----------
+def format_recipe_details(recipe):
+    """Ingredients and instruction steps as one bullet-list string."""
+    lines = ["Ingredients:"]
+    lines += [f"• {ing}" for ing in recipe.get("ingredients", [])]
+    lines += ["", "Instructions:"]
+    lines += [f"• {step}" for step in _str_list(recipe.get("instructions", ""))]
+    return "\n".join(lines) + "\n"
+
+
+def recipe_details(catalog, recipe):
+    """Rendered details for ``recipe``, cached per catalog until it is reloaded."""
+    key = recipe.get("id", recipe.get("name"))
+    text = catalog.details_cache.get(key)
+    if text is None:
+        text = format_recipe_details(recipe)
+        catalog.details_cache.put(key, text)
+    return text
+
+
+# ---------- Loading ----------
+def _str_list(value):
+    if isinstance(value, str):
+        value = value.split("\n")
+    elif isinstance(value, dict):
+        # {"Rice": "1 cup", ...} style ingredient maps keep only the names
+        value = list(value.keys())
+    elif not isinstance(value, (list, tuple)):
+        return ()
+    return tuple(s for s in (str(x).strip() for x in value if x is not None) if s)
+
+
+def normalize_recipe(raw, key=None):
+    """Validate one raw recipe record and return a compact dict, or None to skip it.
+
+    Ingredient names keep their spelling but are de-duplicated by canonical id
+    (see canonical.py), first spelling wins; ``instructions`` given as a single
+    string is split into steps. ``key`` is the object key when the file is a
+    ``{key: recipe}`` mapping and is used as the name fallback.
+    """
+    if not isinstance(raw, dict):
+        return None
+    name = raw.get("name", key)
+    if name is None:
+        return None
+    spellings = {}
+    for ing in _str_list(raw.get("ingredients", ())):
+        spellings.setdefault(CANONICAL.intern(ing), sys.intern(ing))
+    ingredients = tuple(spellings.values())
+    recipe = {
+        "name": str(name).strip() or "Unnamed",
+        "ingredients": ingredients,
+        "instructions": _str_list(raw.get("instructions", ())),
+    }
+    if raw.get("id") is not None:
+        recipe["id"] = raw["id"]
+    if raw.get("category") is not None:
+        recipe["category"] = sys.intern(str(raw["category"]))
+    return recipe
+
+
+def _iter_top_level(f, chunk_size):
+    """Yield (key, value) for each element of a top-level JSON array or object.
+
+    Only the current element and one read chunk are held in memory; ``key`` is
+    None for arrays.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            more()
+
+    def decode():
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more()
+                continue
+            # a number cut by the chunk boundary ("12" of "12.5", "1" of "1e3")
+            # may continue in the next chunk
+            if not eof and isinstance(value, (int, float)) and not isinstance(value, bool) and (
+                    end == len(buf) or buf[end] in NUMBER_CONTINUATION):
+                more()
+                continue
+            pos = end
+            return value
+
+    def expect(chars):
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buf) or buf[pos] not in chars:
+            got = buf[pos] if pos < len(buf) else "end of file"
+            raise ValueError(f"expected one of {chars!r} in recipes file, got {got!r}")
+        pos += 1
+        return buf[pos - 1]
+
+    opener = expect("[{")
+    closer = "]" if opener == "[" else "}"
+    skip_ws()
+    if pos < len(buf) and buf[pos] == closer:
+        return
+    while True:
+        key = None
+        if opener == "{":
+            skip_ws()
+            key = decode()
+            expect(":")
+        skip_ws()
+        yield key, decode()
+        if expect("," + closer) == closer:
+            return
+
+
+def iter_recipes(path, chunk_size=READ_CHUNK_SIZE):
+    """Stream normalized recipes from ``path`` one record at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for key, raw in _iter_top_level(f, chunk_size):
+            recipe = normalize_recipe(raw, key)
+            if recipe is not None:
+                yield recipe
+
+
+def load_recipes(path):
+    return list(iter_recipes(path))
+
+
+def load_catalog(path):
+    if not os.path.exists(path):
+        return RecipeCatalog()
+    return RecipeCatalog(iter_recipes(path))
+
+
+# ---------- Daily Planning ----------
+def generate_daily_meals(catalog, rng=random):
+    """Pick (breakfast, lunch, dinner) from the catalog, or None when it is empty."""
+    if not catalog:
+        return None
+    recipes = catalog.recipes
+    return rng.choice(recipes), rng.choice(recipes), rng.choice(recipes)
+
+
+# ---------- Saved Meals ----------
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SavedMealIndex:
+    """Case-insensitive substring search over saved meal names.
+
+    Names are kept pre-sorted. The trigram index is filled in steps through
+    ``index_step`` (so a UI can spread it over idle time); until it is complete
+    queries fall back to scanning the sorted names. A query that extends the
+    previous one (contains it) narrows the previous result instead.
+    """
+
+    def __init__(self, names=()):
+        self.rebuild(names)
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def __contains__(self, name):
+        return name in self._lower
+
+    @property
+    def trigrams_ready(self):
+        return not self._pending
+
+    def rebuild(self, names):
+        self._lower = {name: name.lower() for name in names}
+        self._sorted = sorted((low, name) for name, low in self._lower.items())
+        self._trigrams = {}
+        self._pending = list(self._lower)
+        self._last = None
+
+    def index_step(self, count=5000):
+        """Trigram-index up to ``count`` more names; True once the index is complete."""
+        batch = self._pending[-count:]
+        del self._pending[-count:]
+        for name in batch:
+            low = self._lower.get(name)
+            if low is None:
+                continue
+            for tri in _trigrams(low):
+                self._trigrams.setdefault(tri, set()).add(name)
+        return not self._pending
+
+    def index_all(self):
+        while not self.index_step():
+            pass
+
+    def add(self, name):
+        if name in self._lower:
+            return
+        low = self._lower[name] = name.lower()
+        bisect.insort(self._sorted, (low, name))
+        for tri in _trigrams(low):
+            self._trigrams.setdefault(tri, set()).add(name)
+        self._last = None
+
+    def remove(self, name):
+        low = self._lower.pop(name, None)
+        if low is None:
+            return
+        i = bisect.bisect_left(self._sorted, (low, name))
+        if i < len(self._sorted) and self._sorted[i] == (low, name):
+            del self._sorted[i]
+        for tri in _trigrams(low):
+            bucket = self._trigrams.get(tri)
+            if bucket is not None:
+                bucket.discard(name)
+                if not bucket:
+                    del self._trigrams[tri]
+        self._last = None
+
+    def _lookup(self, query):
+        if self._last is not None and self._last[0] in query:
+            # the previous matches are a superset: narrow them down
+            return [entry for entry in self._last[1] if query in entry[0]]
+        if len(query) >= 3 and not self._pending:
+            smallest = min((self._trigrams.get(tri, ()) for tri in _trigrams(query)), key=len)
+            if len(smallest) * 8 < len(self._sorted):
+                lower = self._lower
+                return sorted((lower[name], name) for name in smallest if query in lower[name])
+        return [entry for entry in self._sorted if query in entry[0]]
+
+    def search(self, query):
+        """Names containing ``query`` (case-insensitive), sorted like the list view."""
+        query = query.strip().lower()
+        if not query:
+            self._last = None
+            return [name for _, name in self._sorted]
+        entries = self._lookup(query)
+        self._last = (query, entries)
+        return [name for _, name in entries]
+
+
+def normalize_saved_meal(value):
+    """Clean one saved meal value (ingredient list or dict), or None if unusable."""
+    if isinstance(value, list):
+        return {"ingredients": [str(x) for x in value], "description": ""}
+    if isinstance(value, dict):
+        ings = value.get("ingredients", [])
+        desc = value.get("description", "")
+        if isinstance(ings, list):
+            ings = [str(x) for x in ings]
+        else:
+            ings = []
+        return {"ingredients": ings, "description": str(desc)}
+    return None
+
+
+def load_saved_meals(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        clean = {}
+        if isinstance(data, dict):
+            for name, value in data.items():
+                if not isinstance(name, str):
+                    continue
+                meal = normalize_saved_meal(value)
+                if meal is not None:
+                    clean[name] = meal
+        return clean
+    except Exception:
+        return {}
+
+
+def save_saved_meals(meals, path):
+    """Write ``meals`` to ``path`` atomically (temp file + rename)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meals, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
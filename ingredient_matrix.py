@@ -0,0 +1,146 @@
+"""Sparse recipe x ingredient matrix for scoring many pantries at once.
+
+Recipes average a handful of ingredients out of a vocabulary of thousands, so
+the matrix is stored column-wise (CSC): for each interned ingredient id, the
+sorted rows of the recipes that use it. The overlap of a whole batch of
+pantries with every recipe is then a single ``bincount`` over the
+concatenated columns; missing counts and Jaccard scores follow elementwise.
+
+    matrix = IngredientMatrix.from_catalog(catalog)
+    for hits in matrix.top_k(pantries, k=20):
+        for row, overlap, missing, jaccard in hits:
+            recipe = catalog.recipes[row]
+
+Requires numpy, an optional dependency of the app (``pip install numpy``):
+without it ``np`` is None and IngredientMatrix raises ImportError.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import engine
+from canonical import DEFAULT as CANONICAL, normalize_key
+
+QUERY_CHUNK = 32  # pantries scored together; bounds the (chunk x recipes) arrays
+
+
+class IngredientMatrix:
+    """CSC incidence matrix over a sequence of ingredient collections (one per recipe row)."""
+
+    def __init__(self, ingredient_lists):
+        if np is None:
+            raise ImportError("IngredientMatrix requires numpy")
+        self.vocab = {}  # canonical ingredient id -> column
+        ptr = [0]
+        ids = []
+        for ings in ingredient_lists:
+            for cid in {CANONICAL.intern(ing) for ing in ings}:
+                ids.append(self.vocab.setdefault(cid, len(self.vocab)))
+            ptr.append(len(ids))
+        ids = np.asarray(ids, dtype=np.int64)
+        ptr = np.asarray(ptr, dtype=np.int64)
+        self.n_rows = len(ptr) - 1
+        self.lengths = np.diff(ptr)
+        order = np.argsort(ids, kind="stable")
+        self._col_rows = np.repeat(np.arange(self.n_rows, dtype=np.int64), self.lengths)[order]
+        self._col_ptr = np.searchsorted(ids[order], np.arange(len(self.vocab) + 1))
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        return cls(recipe.get("ingredients", ()) for recipe in catalog.recipes)
+
+    def __len__(self):
+        return self.n_rows
+
+    def column(self, ingredient):
+        """Rows of the recipes using ``ingredient``."""
+        return self._column(CANONICAL.lookup(ingredient))
+
+    def _column(self, cid):
+        col = self.vocab.get(cid)
+        if col is None:
+            return self._col_rows[:0]
+        return self._col_rows[self._col_ptr[col]:self._col_ptr[col + 1]]
+
+    def counts(self, ingredient_lists):
+        """(len(ingredient_lists) x rows) number of each list's ingredients used by each recipe."""
+        n = self.n_rows
+        cols = []
+        for i, names in enumerate(ingredient_lists):
+            for cid in CANONICAL.ids(names):
+                col = self._column(cid)
+                if len(col):
+                    cols.append(col + i * n)
+        if not cols:
+            return np.zeros((len(ingredient_lists), n), dtype=np.int64)
+        return np.bincount(np.concatenate(cols), minlength=len(ingredient_lists) * n).reshape(-1, n)
+
+    def scores(self, pantries):
+        """(overlap, missing, jaccard) arrays of shape (pantries x rows)."""
+        pantries = [{normalize_key(name) for name in p} for p in pantries]
+        overlap = self.counts(pantries)
+        missing = self.lengths - overlap
+        sizes = np.array([len(p) for p in pantries], dtype=np.int64)[:, None]
+        union = self.lengths + sizes - overlap
+        jaccard = np.divide(overlap, union, out=np.zeros(overlap.shape), where=union > 0)
+        return overlap, missing, jaccard
+
+    def top_k(self, pantries, k=engine.MAX_SUGGESTIONS, by="overlap"):
+        """Per pantry, up to ``k`` (row, overlap, missing, jaccard) for recipes sharing an ingredient.
+
+        ``by="overlap"`` ranks like RecipeCatalog.match (most shared, then
+        fewest missing, then file order); ``by="jaccard"`` ranks by Jaccard
+        score, then overlap, then file order.
+        """
+        if by not in ("overlap", "jaccard"):
+            raise ValueError(f"unknown ranking {by!r}")
+        pantries = [{normalize_key(name) for name in p} for p in pantries]
+        results = []
+        for start in range(0, len(pantries), QUERY_CHUNK):
+            chunk = pantries[start:start + QUERY_CHUNK]
+            overlap = self.counts(chunk)
+            floors = _overlap_floors(overlap, k)
+            owner, rows = np.nonzero(overlap >= floors[:, None])
+            bounds = np.searchsorted(owner, np.arange(len(chunk) + 1))
+            for p, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+                size = len(chunk[p])
+                cand = rows[lo:hi]
+                if by == "jaccard" and len(cand):
+                    # jaccard <= overlap / size, so rows below the floor can still win when
+                    # overlap >= (k-th best jaccard so far) * size
+                    best = np.sort(self._jaccard(overlap[p], cand, size))[-min(k, len(cand))]
+                    need = max(1, int(np.ceil(best * size - 1e-9)))
+                    if need < floors[p]:
+                        cand = np.flatnonzero(overlap[p] >= need)
+                results.append(self._rank(overlap[p], cand, size, k, by))
+        return results
+
+    def _jaccard(self, overlap, rows, size):
+        o = overlap[rows]
+        return o / (self.lengths[rows] + size - o)
+
+    def _rank(self, overlap, rows, size, k, by):
+        o = overlap[rows]
+        missing = self.lengths[rows] - o
+        jaccard = o / (self.lengths[rows] + size - o)
+        if by == "overlap":
+            order = np.lexsort((rows, missing, -o))
+        else:
+            order = np.lexsort((rows, -o, -jaccard))
+        order = order[:max(0, k)]
+        return list(zip(rows[order].tolist(), o[order].tolist(), missing[order].tolist(), jaccard[order].tolist()))
+
+
+def _overlap_floors(overlap, k):
+    """Per row of ``overlap``, the largest t >= 1 with at least ``k`` entries >= t (1 if none)."""
+    width = int(overlap.max(initial=0)) + 1
+    offsets = np.arange(len(overlap))[:, None] * width
+    hist = np.bincount((overlap + offsets).ravel(), minlength=len(overlap) * width).reshape(-1, width)
+    at_least = np.cumsum(hist[:, ::-1], axis=1)[:, ::-1]
+    at_least[:, 0] = 0
+    enough = at_least >= max(k, 1)
+    # the last column meeting the count, or column 1
+    floors = width - 1 - np.argmax(enough[:, ::-1], axis=1)
+    floors[~enough.any(axis=1)] = 1
+    return floors
@@ -0,0 +1,216 @@
+"""Opt-in timers, counters and cProfile capture for the hot paths.
+
+Off unless MEAL_PLANNER_METRICS names an output file (or Main is started with
+``--metrics FILE``). While off, ``timed`` hands back the undecorated function
+and ``record``/``count`` return straight away, so instrumented code costs
+nothing beyond a global lookup.
+
+    @instrumentation.timed("make_meal")
+    def make_meal(): ...
+
+    instrumentation.record("recipe_load", seconds)
+    instrumentation.count("recipes_loaded", n)
+
+A snapshot of every timer (call count, total, max and a latency histogram)
+and counter is written to the metrics file every MEAL_PLANNER_METRICS_INTERVAL
+seconds (default 10) and at exit: JSON by default, or the Prometheus text
+format for ``.prom``/``.txt`` files or MEAL_PLANNER_METRICS_FORMAT=prometheus.
+``toggle_profile`` starts a cProfile capture of the calling thread and, on the
+next call, dumps it next to the metrics file (``<metrics>.prof``).
+"""
+import atexit
+import bisect
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_INTERVAL = 10.0
+FORMATS = ("json", "prometheus")
+METRIC_PREFIX = "meal_planner"
+
+enabled = False
+metrics_path = None
+metrics_format = "json"
+interval = DEFAULT_INTERVAL
+_timers = {}  # name -> [count, total seconds, max seconds, per-bucket counts (+inf last)]
+_counters = {}
+_lock = threading.Lock()
+_writer = None
+_profiler = None
+
+
+def configure(path, fmt=None, every=None):
+    """Enable instrumentation, writing snapshots to ``path``; a falsy path leaves it as is."""
+    global enabled, metrics_path, metrics_format, interval, _writer
+    if not path:
+        return
+    fmt = fmt or ("prometheus" if path.endswith((".prom", ".txt")) else "json")
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown metrics format {fmt!r}")
+    metrics_path = path
+    metrics_format = fmt
+    if every:
+        interval = max(0.1, float(every))
+    if not enabled:
+        enabled = True
+        atexit.register(write_snapshot)
+    if _writer is None:
+        _writer = threading.Thread(target=_write_periodically, daemon=True)
+        _writer.start()
+
+
+def add_arguments(parser):
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="record hot-path timings and write snapshots to FILE (env: MEAL_PLANNER_METRICS)")
+    parser.add_argument("--metrics-format", choices=FORMATS,
+                        help="snapshot format (default: from the file extension, else json)")
+    parser.add_argument("--metrics-interval", type=float, metavar="SECONDS",
+                        help=f"seconds between snapshots (default: {DEFAULT_INTERVAL:g})")
+
+
+def configure_from_args(args):
+    configure(args.metrics, args.metrics_format, args.metrics_interval)
+
+
+# ---------- Recording ----------
+def timed(name):
+    """Decorator timing every call under ``name``; a no-op unless enabled when applied."""
+    def decorate(fn):
+        if not enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record(name, seconds):
+    if not enabled:
+        return
+    with _lock:
+        stats = _timers.get(name)
+        if stats is None:
+            stats = _timers[name] = [0, 0.0, 0.0, [0] * (len(BUCKETS) + 1)]
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+        stats[3][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+def count(name, n=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+# ---------- Snapshots ----------
+def snapshot():
+    """Timers and counters as a JSON-ready dict (bucket counts are cumulative)."""
+    with _lock:
+        timers = {name: (n, total, peak, list(buckets)) for name, (n, total, peak, buckets) in _timers.items()}
+        counters = dict(_counters)
+    out = {"timestamp": time.time(), "timers": {}, "counters": counters}
+    for name, (n, total, peak, buckets) in sorted(timers.items()):
+        cumulative = []
+        running = 0
+        for b in buckets:
+            running += b
+            cumulative.append(running)
+        out["timers"][name] = {
+            "count": n,
+            "total_s": total,
+            "mean_ms": total / n * 1000 if n else 0.0,
+            "max_ms": peak * 1000,
+            "buckets": dict(zip([str(le) for le in BUCKETS] + ["+Inf"], cumulative)),
+        }
+    return out
+
+
+def _label(name):
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def format_prometheus(snap):
+    lines = [
+        f"# HELP {METRIC_PREFIX}_seconds Wall time of instrumented calls.",
+        f"# TYPE {METRIC_PREFIX}_seconds histogram",
+    ]
+    for name, stats in snap["timers"].items():
+        label = _label(name)
+        for le, n in stats["buckets"].items():
+            lines.append(f'{METRIC_PREFIX}_seconds_bucket{{name="{label}",le="{le}"}} {n}')
+        lines.append(f'{METRIC_PREFIX}_seconds_sum{{name="{label}"}} {stats["total_s"]:.9f}')
+        lines.append(f'{METRIC_PREFIX}_seconds_count{{name="{label}"}} {stats["count"]}')
+    lines.append(f"# HELP {METRIC_PREFIX}_events_total Instrumented event counters.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_events_total counter")
+    for name, n in sorted(snap["counters"].items()):
+        lines.append(f'{METRIC_PREFIX}_events_total{{name="{_label(name)}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(path=None, fmt=None):
+    """Write the current snapshot to ``path`` (default: the configured file) atomically."""
+    path = path or metrics_path
+    if not path:
+        return None
+    snap = snapshot()
+    if (fmt or metrics_format) == "prometheus":
+        text = format_prometheus(snap)
+    else:
+        text = json.dumps(snap, indent=2)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_periodically():
+    while True:
+        time.sleep(interval)
+        try:
+            write_snapshot()
+        except OSError:
+            # a full disk or a vanished directory must not take the app down
+            pass
+
+
+# ---------- Profiling ----------
+def profile_path():
+    return os.path.splitext(metrics_path or "meal_planner")[0] + ".prof"
+
+
+def toggle_profile():
+    """Start a cProfile capture, or stop the running one and dump it; returns the dump path or None."""
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        return None
+    profiler, _profiler = _profiler, None
+    profiler.disable()
+    path = profile_path()
+    profiler.dump_stats(path)
+    return path
+
+
+configure(os.environ.get("MEAL_PLANNER_METRICS"), os.environ.get("MEAL_PLANNER_METRICS_FORMAT"),
+          os.environ.get("MEAL_PLANNER_METRICS_INTERVAL"))
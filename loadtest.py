@@ -0,0 +1,213 @@
+"""Loopback load test for the JSON API (api_server.py).
+
+Opens ``--connections`` keep-alive connections and sends requests back to back
+on each until ``--requests`` have completed (or ``--duration`` seconds have
+passed), then reports throughput and latency percentiles:
+
+    python loadtest.py                         # starts its own server on a free port
+    python loadtest.py --workers 4 --connections 64 --requests 20000
+    python loadtest.py --url http://127.0.0.1:8765 --endpoint weekly
+
+Pantries are drawn from ``--distinct`` random ingredient sets over the most
+common ingredients of the recipes file, so concurrent connections often send
+the same query and the server's request coalescing is exercised; raise
+``--distinct`` to measure without it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import api_server
+import bench
+import engine
+
+DEFAULT_CONNECTIONS = 16
+DEFAULT_REQUESTS = 5000
+DEFAULT_DISTINCT = 50
+ENDPOINTS = {"match": "/match", "daily": "/plan/daily", "weekly": "/plan/weekly"}
+SERVER_START_TIMEOUT = 60.0
+
+
+# ---------- Workload ----------
+def pantry_vocabulary(recipes_path):
+    """Ingredient names of the recipes file, most used first (bench's synthetic vocabulary if absent)."""
+    if not os.path.exists(recipes_path):
+        return bench.ingredient_vocabulary()
+    counts = Counter(ing for recipe in engine.iter_recipes(recipes_path) for ing in recipe.get("ingredients", ()))
+    return [name for name, _ in counts.most_common()] or bench.ingredient_vocabulary()
+
+
+def request_bodies(endpoint, distinct, vocab, seed=0):
+    bodies = []
+    for i, pantry in enumerate(bench.random_pantries(distinct, seed, vocab)):
+        if endpoint == "match":
+            req = {"pantry": pantry, "k": 10}
+        elif endpoint == "weekly":
+            req = {"pantry": pantry, "days": 7, "seed": i}
+        else:
+            req = {"seed": i}
+        bodies.append(json.dumps(req).encode("utf-8"))
+    return bodies
+
+
+# ---------- Client ----------
+async def _request(reader, writer, host, method, path, body=b""):
+    """Send one request on an open connection; returns (status, body bytes, server keeps it open)."""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ", 2)[1])
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    data = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, data, headers.get("connection", "").lower() != "close"
+
+
+async def fetch_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, data, _ = await _request(reader, writer, host, "GET", path)
+    finally:
+        writer.close()
+    return json.loads(data) if status == 200 else None
+
+
+async def _connection(host, port, path, bodies, rng, budget, deadline, latencies, statuses):
+    conn = None
+    try:
+        while budget[0] > 0 and time.perf_counter() < deadline:
+            budget[0] -= 1
+            if conn is None:
+                conn = await asyncio.open_connection(host, port)
+            body = bodies[rng.randrange(len(bodies))]
+            start = time.perf_counter()
+            try:
+                status, _, keep_alive = await _request(*conn, host, "POST", path, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                status, keep_alive = 0, False
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if not keep_alive:
+                conn[1].close()
+                conn = None
+    finally:
+        if conn is not None:
+            conn[1].close()
+
+
+async def run_load(host, port, endpoint, bodies, connections, requests, duration, seed=0):
+    """Drive the server; returns a result dict (latencies in ms)."""
+    path = ENDPOINTS[endpoint]
+    before = await fetch_json(host, port, "/stats") or {}
+    latencies = []
+    statuses = Counter()
+    budget = [requests]
+    deadline = time.perf_counter() + duration if duration else float("inf")
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _connection(host, port, path, bodies, random.Random(seed + i), budget, deadline, latencies, statuses)
+        for i in range(connections)))
+    elapsed = time.perf_counter() - started
+    after = await fetch_json(host, port, "/stats") or {}
+    latencies.sort()
+    done = len(latencies)
+    return {
+        "endpoint": endpoint,
+        "connections": connections,
+        "requests": done,
+        "errors": done - statuses.get(200, 0),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "seconds": elapsed,
+        "rps": done / elapsed if elapsed else 0.0,
+        "ok_rps": statuses.get(200, 0) / elapsed if elapsed else 0.0,
+        "p50_ms": bench.percentile(latencies, 50) * 1000 if latencies else 0.0,
+        "p90_ms": bench.percentile(latencies, 90) * 1000 if latencies else 0.0,
+        "p99_ms": bench.percentile(latencies, 99) * 1000 if latencies else 0.0,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "coalesced": after.get("coalesced", 0) - before.get("coalesced", 0),
+        "rejected": after.get("rejected", 0) - before.get("rejected", 0),
+    }
+
+
+def print_result(r):
+    print(f"{r['requests']} {r['endpoint']} requests over {r['connections']} connections in {r['seconds']:.2f} s")
+    print(f"  throughput  {r['rps']:.0f} req/s ({r['ok_rps']:.0f} req/s answered with 200)")
+    print(f"  latency     p50 {r['p50_ms']:.2f} ms   p90 {r['p90_ms']:.2f} ms   "
+          f"p99 {r['p99_ms']:.2f} ms   max {r['max_ms']:.2f} ms")
+    print(f"  errors      {r['errors']} (statuses {r['statuses']})")
+    print(f"  server      {r['coalesced']} coalesced, {r['rejected']} rejected with 503")
+
+
+# ---------- Server Process ----------
+def start_server(recipes_path, workers, extra=()):
+    """Run api_server.py on a free loopback port; returns (process, port)."""
+    cmd = [sys.executable, api_server.__file__, "--serve", "0", "--recipes", recipes_path]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd + list(extra), stderr=subprocess.PIPE, text=True)
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        line = proc.stderr.readline()
+        if not line:
+            break
+        found = re.search(r"http://[^:]+:(\d+)", line)
+        if found:
+            return proc, int(found.group(1))
+    proc.kill()
+    raise RuntimeError("api server did not start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meal Planner API load test")
+    parser.add_argument("--url", help="test a running server (default: start one on a free loopback port)")
+    parser.add_argument("--recipes", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json"),
+                        help="recipes file for the started server and the pantries (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="worker processes of the started server")
+    parser.add_argument("--max-concurrency", type=int, help="passed to the started server")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="match")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--requests", type=int,
+                        help=f"total requests (default: {DEFAULT_REQUESTS}, or unlimited with --duration)")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--distinct", type=int, default=DEFAULT_DISTINCT, help="distinct request bodies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="FILE", help="also write the result as JSON")
+    args = parser.parse_args(argv)
+    if args.requests is None:
+        args.requests = float("inf") if args.duration else DEFAULT_REQUESTS
+
+    bodies = request_bodies(args.endpoint, max(1, args.distinct), pantry_vocabulary(args.recipes), args.seed)
+    proc = None
+    if args.url:
+        url = urlsplit(args.url if "//" in args.url else "//" + args.url)
+        host, port = url.hostname or api_server.DEFAULT_HOST, url.port or api_server.DEFAULT_PORT
+    else:
+        extra = ["--max-concurrency", str(args.max_concurrency)] if args.max_concurrency else []
+        proc, port = start_server(args.recipes, args.workers, extra)
+        host = api_server.DEFAULT_HOST
+    try:
+        result = asyncio.run(run_load(host, port, args.endpoint, bodies, max(1, args.connections),
+                                      args.requests, args.duration, args.seed))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    print_result(result)
+    if args.json:
+        bench.write_json(args.json, result)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
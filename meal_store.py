@@ -0,0 +1,140 @@
+"""Journaled storage for saved meals.
+
+``meals.json`` stays the snapshot. Each edit is appended as one JSON line to
+``meals.json.journal`` and the in-memory dict is updated in place, so a save
+or delete costs one small append instead of rewriting the whole file. Loading
+replays the journal over the snapshot. Once the journal grows past a threshold
+it is compacted: the snapshot is rewritten atomically (temp file + rename) and
+the journal is truncated. Replaying a journal twice gives the same result, so a
+crash between those two steps loses nothing.
+
+The in-memory dict is the source of truth while a store is open, so only one
+process may write the files at a time: ``lock`` takes an exclusive lock on
+``meals.json.lock`` for the life of the process (the desktop app and the API
+server both do) and raises StoreLocked while another process holds it.
+"""
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import engine
+
+COMPACT_MIN_RECORDS = 200
+
+
+class StoreLocked(OSError):
+    """Another process has the saved meals open for writing."""
+
+
+def lock_file(path):
+    """Open ``path`` and hold an exclusive lock on it; returns the open file (close it to release)."""
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        raise StoreLocked(f"{path} is held by another Meal Planner process")
+    return f
+
+
+class MealStore:
+    """Saved meals backed by a JSON snapshot plus an append-only journal."""
+
+    def __init__(self, path, journal_path=None, compact_min=COMPACT_MIN_RECORDS):
+        self.path = path
+        self.journal_path = journal_path or path + ".journal"
+        self.compact_min = compact_min
+        self.meals = {}
+        self.journal_records = 0
+        self._lock = None
+
+    def lock(self):
+        """Claim the store for this process (see StoreLocked); a no-op if already held."""
+        if self._lock is None:
+            self._lock = lock_file(self.path + ".lock")
+
+    def unlock(self):
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def load(self):
+        """Load snapshot + journal into ``self.meals`` (updated in place) and return it."""
+        self.meals.clear()
+        self.meals.update(engine.load_saved_meals(self.path))
+        self.journal_records = 0
+        if not os.path.exists(self.journal_path):
+            return self.meals
+        with open(self.journal_path, "r+b") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                # drop a torn last line from a crash mid-append so new records start cleanly
+                f.truncate(end)
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                self._apply(record)
+                self.journal_records += 1
+        return self.meals
+
+    def _apply(self, record):
+        name = record.get("name")
+        if not isinstance(name, str):
+            return
+        op = record.get("op")
+        if op == "put":
+            meal = engine.normalize_saved_meal(record.get("meal"))
+            if meal is None:
+                return
+            replaces = record.get("replaces")
+            if isinstance(replaces, str) and replaces != name:
+                self.meals.pop(replaces, None)
+            self.meals[name] = meal
+        elif op == "delete":
+            self.meals.pop(name, None)
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(record)
+        self.journal_records += 1
+        if self.journal_records >= max(self.compact_min, len(self.meals) // 2):
+            try:
+                self.compact()
+            except OSError:
+                # the edit is already durable in the journal; compaction is retried on the next one
+                pass
+
+    def put(self, name, meal, replaces=None):
+        """Save ``meal`` under ``name``; ``replaces`` renames an existing meal in the same record."""
+        record = {"op": "put", "name": name, "meal": meal}
+        if replaces is not None and replaces != name:
+            record["replaces"] = replaces
+        self._append(record)
+
+    def delete(self, name):
+        if name in self.meals:
+            self._append({"op": "delete", "name": name})
+
+    def compact(self):
+        """Fold the journal into the snapshot."""
+        engine.save_saved_meals(self.meals, self.path)
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self.journal_records = 0
@@ -0,0 +1,272 @@
+"""Multi-day meal plans built under constraints.
+
+A plan is ``days`` rows of one recipe per slot (breakfast, lunch, dinner by
+default). Each slot draws only from its category bucket (categories compare
+case-insensitively, a None slot takes any recipe, and a category without
+recipes is a ValueError); the solver then
+minimises
+
+    REPEAT_COST  * same recipe twice within ``repeat_window`` days
+  + NEW_INGREDIENT_COST * distinct ingredients to buy (not in the pantry)
+  + MISSING_COST * ingredients missing from the pantry, summed over meals
+
+with a greedy start followed by simulated-annealing local search. Every move
+replaces one cell and its cost change is computed from running ingredient
+counts and per-recipe day lists, so a move costs O(ingredients of the two
+recipes) regardless of catalog size.
+
+HouseholdPlanner generates simple plans for many household profiles at once
+with NumPy, an optional dependency (``pip install numpy``) that is only needed
+for batch planning; MealPlanner runs on the standard library.
+"""
+import math
+import random
+import time
+
+from canonical import DEFAULT as CANONICAL
+
+from ingredient_matrix import QUERY_CHUNK, IngredientMatrix, np
+
+DEFAULT_SLOTS = ("Breakfast", "Lunch", "Dinner")
+REPEAT_COST = 100.0
+NEW_INGREDIENT_COST = 2.0
+MISSING_COST = 1.0
+GREEDY_SAMPLE = 24
+MOVES_PER_CELL = 400
+
+
+def category_key(category):
+    """Bucket key for ``category``: case-insensitive, None for "any category"."""
+    return None if category is None else str(category).casefold()
+
+
+class MealPlanner:
+    """Per-category recipe buckets and canonical ingredient id postings for one catalog.
+
+    Both are keyed by category_key; the None entries hold every recipe.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.ingredients = []
+        self.buckets = {}
+        self.postings = {}
+        for pos, recipe in enumerate(catalog.recipes):
+            ings = frozenset(CANONICAL.intern(ing) for ing in recipe.get("ingredients", ()))
+            self.ingredients.append(ings)
+            keys = (None,) if recipe.get("category") is None else (None, category_key(recipe["category"]))
+            for key in keys:
+                self.buckets.setdefault(key, []).append(pos)
+                by_ing = self.postings.setdefault(key, {})
+                for ing in ings:
+                    by_ing.setdefault(ing, []).append(pos)
+
+    def __len__(self):
+        return len(self.ingredients)
+
+    def bucket(self, category):
+        """Positions in ``category`` (every recipe for None); ValueError if it has none."""
+        rows = self.buckets.get(category_key(category))
+        if not rows:
+            raise ValueError(f"no recipes in category {category!r}")
+        return rows
+
+    def plan(self, days=7, slots=DEFAULT_SLOTS, pantry=(), repeat_window=7,
+             rng=random, time_limit=0.5, max_moves=None):
+        """Return ``days`` tuples of recipes (one per slot), or None when the catalog is empty."""
+        if not self.ingredients or days <= 0 or not slots:
+            return None
+        for category in slots:
+            self.bucket(category)
+        solver = _Solver(self, days, [category_key(c) for c in slots], pantry, repeat_window, rng)
+        solver.greedy()
+        if max_moves is None:
+            max_moves = MOVES_PER_CELL * days * len(slots)
+        solver.anneal(max_moves, time.perf_counter() + time_limit)
+        recipes = self.catalog.recipes
+        return [tuple(recipes[pos] for pos in row) for row in solver.cells]
+
+
+class _Solver:
+    def __init__(self, planner, days, slots, pantry, repeat_window, rng):
+        self.planner = planner
+        self.days = days
+        self.slots = slots
+        self.pantry = frozenset(CANONICAL.ids(pantry))
+        self.window = max(0, repeat_window)
+        self.rng = rng
+        self.cells = [[None] * len(slots) for _ in range(days)]
+        self.need = {}
+        self.days_of = {}
+        self.cost = 0.0
+        self._missing = {}
+
+    def missing(self, pos):
+        miss = self._missing.get(pos)
+        if miss is None:
+            miss = self._missing[pos] = self.planner.ingredients[pos] - self.pantry
+        return miss
+
+    def _conflicts(self, pos, day, skip_day=None):
+        n = 0
+        for d in self.days_of.get(pos, ()):
+            if abs(d - day) < self.window or d == day:
+                n += 1
+        if skip_day is not None:
+            # the occurrence being replaced does not conflict with itself
+            n -= 1
+        return n
+
+    def delta(self, day, slot, new):
+        old = self.cells[day][slot]
+        if new == old:
+            return 0.0
+        need = self.need
+        d = 0.0
+        new_miss = self.missing(new)
+        if old is not None:
+            old_miss = self.missing(old)
+            for ing in old_miss:
+                if need[ing] == 1 and ing not in new_miss:
+                    d -= NEW_INGREDIENT_COST
+            d -= MISSING_COST * len(old_miss)
+            d -= REPEAT_COST * self._conflicts(old, day, skip_day=day)
+        else:
+            old_miss = ()
+        for ing in new_miss:
+            if ing not in need and ing not in old_miss:
+                d += NEW_INGREDIENT_COST
+        d += MISSING_COST * len(new_miss)
+        d += REPEAT_COST * self._conflicts(new, day)
+        return d
+
+    def assign(self, day, slot, new, d):
+        old = self.cells[day][slot]
+        need = self.need
+        if old is not None:
+            for ing in self.missing(old):
+                if need[ing] == 1:
+                    del need[ing]
+                else:
+                    need[ing] -= 1
+            self.days_of[old].remove(day)
+        for ing in self.missing(new):
+            need[ing] = need.get(ing, 0) + 1
+        self.days_of.setdefault(new, []).append(day)
+        self.cells[day][slot] = new
+        self.cost += d
+
+    def candidate(self, slot):
+        planner = self.planner
+        rng = self.rng
+        category = self.slots[slot]
+        if rng.random() < 0.5:
+            # reuse: a recipe sharing an ingredient with another planned meal or the pantry
+            day = rng.randrange(self.days)
+            other = self.cells[day][rng.randrange(len(self.slots))]
+            pool = tuple(self.missing(other)) if other is not None else ()
+            if not pool or (self.pantry and rng.random() < 0.5):
+                pool = tuple(self.pantry)
+            if pool:
+                hits = planner.postings.get(category, {}).get(rng.choice(pool))
+                if hits:
+                    return rng.choice(hits)
+        return rng.choice(planner.bucket(category))
+
+    def greedy(self):
+        for day in range(self.days):
+            for slot in range(len(self.slots)):
+                best = None
+                for _ in range(GREEDY_SAMPLE):
+                    pos = self.candidate(slot)
+                    d = self.delta(day, slot, pos)
+                    if best is None or d < best[0]:
+                        best = (d, pos)
+                self.assign(day, slot, best[1], best[0])
+
+    def anneal(self, max_moves, deadline, t_start=2.0, t_end=0.05):
+        rng = self.rng
+        n_slots = len(self.slots)
+        for move in range(max_moves):
+            if move & 255 == 0 and time.perf_counter() > deadline:
+                break
+            temp = t_start * (t_end / t_start) ** (move / max_moves)
+            day = rng.randrange(self.days)
+            slot = rng.randrange(n_slots)
+            pos = self.candidate(slot)
+            d = self.delta(day, slot, pos)
+            if d <= 0 or rng.random() < math.exp(-d / temp):
+                self.assign(day, slot, pos, d)
+
+
+# ---------- Household Batches ----------
+class HouseholdPlanner:
+    """Vectorised plans for many household profiles over one MealPlanner.
+
+    A profile is a dict with optional ``pantry`` and ``exclude`` ingredient
+    lists, ``categories`` (one per slot, default DEFAULT_SLOTS) and ``seed``.
+    Each slot is sampled without replacement across the days, weighted by
+    1 + pantry overlap, using Gumbel top-k keys. Recipes with an excluded
+    ingredient are never picked. Every profile draws from its own seeded
+    generator, so a seeded profile gets the same plan in any batch.
+    """
+
+    def __init__(self, meal_planner):
+        if np is None:
+            raise ImportError("household batch planning requires numpy")
+        self.planner = meal_planner
+        self.matrix = IngredientMatrix.from_catalog(meal_planner.catalog)
+        self._buckets = {key: np.asarray(rows, dtype=np.int64) for key, rows in meal_planner.buckets.items()}
+
+    def _bucket(self, category):
+        if not len(self.planner):
+            return np.arange(0, dtype=np.int64)
+        rows = self._buckets.get(category_key(category))
+        if rows is None:
+            raise ValueError(f"no recipes in category {category!r}")
+        return rows
+
+    def plan(self, profiles, days=1):
+        """Return one plan per profile: ``days`` tuples of recipes (None where nothing fits)."""
+        profiles = list(profiles)
+        plans = []
+        for start in range(0, len(profiles), QUERY_CHUNK):
+            plans.extend(self._plan_chunk(profiles[start:start + QUERY_CHUNK], days))
+        return plans
+
+    def _plan_chunk(self, profiles, days):
+        recipes = self.planner.catalog.recipes
+        log_weight = np.log1p(self.matrix.counts([p.get("pantry", ()) for p in profiles]).astype(np.float64))
+        log_weight[self.matrix.counts([p.get("exclude", ()) for p in profiles]) > 0] = -np.inf
+        rngs = [np.random.default_rng(p.get("seed")) for p in profiles]
+        slots = [tuple(p.get("categories") or DEFAULT_SLOTS) for p in profiles]
+
+        picks = [[] for _ in profiles]
+        for s in range(max(len(c) for c in slots)):
+            by_category = {}
+            for i, cats in enumerate(slots):
+                if s < len(cats):
+                    by_category.setdefault(category_key(cats[s]), []).append(i)
+            for category, members in by_category.items():
+                bucket = self._bucket(category)
+                k = min(days, len(bucket))
+                if k == 0:
+                    # empty catalog (or no days): nothing fits this slot
+                    for i in members:
+                        picks[i].append([None] * days)
+                    continue
+                gumbel = np.stack([rngs[i].gumbel(size=len(bucket)) for i in members])
+                keys = log_weight[np.ix_(members, bucket)] + gumbel
+                top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+                top_keys = np.take_along_axis(keys, top, axis=1)
+                ranked = np.take_along_axis(top, np.argsort(-top_keys, axis=1), axis=1)
+                valid = np.isfinite(np.take_along_axis(keys, ranked, axis=1))
+                # fewer recipes than days: cycle through the ones drawn
+                cycle = np.arange(days) % k
+                chosen = bucket[ranked][:, cycle]
+                valid = valid[:, cycle]
+                for row, i in enumerate(members):
+                    picks[i].append([int(pos) if ok else None for pos, ok in zip(chosen[row], valid[row])])
+
+        return [[tuple(recipes[col[d]] if col[d] is not None else None for col in cols) for d in range(days)]
+                for cols in picks]
@@ -0,0 +1,141 @@
+"""Aggregated shopping lists for plans, recipes and saved meals.
+
+Ingredient names are interned to small integer ids; a meal is an int bitset
+of its ingredient ids and the pantry is another. The list keeps a use count
+per id plus a bitset of every id with a non-zero count, so adding, removing
+or swapping one meal only touches that meal's ingredients, and the items to
+buy are ``needed & ~pantry``.
+"""
+
+from canonical import DEFAULT as CANONICAL
+
+OTHER_GROUP = "Other"
+
+
+class IngredientTable:
+    """Dense ingredient ids (one per canonical ingredient) with an optional display group per id."""
+
+    def __init__(self, groups=None):
+        self.names = []
+        self.ids = {}  # canonical ingredient id -> dense id
+        self.group_of = []
+        self._group_order = {}
+        for group, names in (groups or {}).items():
+            self._group_order.setdefault(group, len(self._group_order))
+            for name in names:
+                self.intern(name, group)
+
+    def intern(self, name, group=None):
+        cid = CANONICAL.intern(name)
+        iid = self.ids.get(cid)
+        if iid is None:
+            iid = self.ids[cid] = len(self.names)
+            self.names.append(name)
+            self.group_of.append(group)
+        return iid
+
+    def mask(self, names):
+        m = 0
+        for name in names:
+            m |= 1 << self.intern(name)
+        return m
+
+    def group_order(self, group):
+        return self._group_order.get(group, len(self._group_order))
+
+
+def _iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _ingredients(meal):
+    if isinstance(meal, dict):
+        return meal.get("ingredients", ())
+    return meal
+
+
+class ShoppingList:
+    """What to buy for a multiset of meals, minus the pantry.
+
+    Meals are recipe dicts, saved-meal dicts or plain ingredient lists. Each
+    ``add`` is counted, so a meal added twice must be removed twice.
+    """
+
+    def __init__(self, table=None, pantry=()):
+        self.table = table if table is not None else IngredientTable()
+        self.counts = {}
+        self.needed = 0
+        self.pantry = self.table.mask(pantry)
+
+    def set_pantry(self, names):
+        self.pantry = self.table.mask(names)
+
+    def add(self, meal):
+        counts = self.counts
+        mask = self.table.mask(_ingredients(meal))
+        for iid in _iter_bits(mask):
+            counts[iid] = counts.get(iid, 0) + 1
+        self.needed |= mask
+
+    def remove(self, meal):
+        counts = self.counts
+        gone = 0
+        for iid in _iter_bits(self.table.mask(_ingredients(meal))):
+            n = counts.get(iid, 0)
+            if n <= 1:
+                counts.pop(iid, None)
+                gone |= 1 << iid
+            else:
+                counts[iid] = n - 1
+        self.needed &= ~gone
+
+    def swap(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def update(self, meals):
+        for meal in meals:
+            self.add(meal)
+
+    def to_buy(self):
+        """Bitset of needed ingredients not in the pantry."""
+        return self.needed & ~self.pantry
+
+    def __len__(self):
+        return bin(self.to_buy()).count("1")
+
+    def items(self):
+        """Sorted ingredient names to buy."""
+        names = self.table.names
+        return sorted(names[iid] for iid in _iter_bits(self.to_buy()))
+
+    def grouped(self):
+        """[(group, [names])] in ingredient-table group order; ungrouped items go under OTHER_GROUP."""
+        table = self.table
+        groups = {}
+        for iid in _iter_bits(self.to_buy()):
+            groups.setdefault(table.group_of[iid] or OTHER_GROUP, []).append(iid)
+        result = []
+        for group in sorted(groups, key=lambda g: (g == OTHER_GROUP, table.group_order(g))):
+            ids = groups[group]
+            if group == OTHER_GROUP:
+                names = sorted(table.names[iid] for iid in ids)
+            else:
+                # grouped ingredients keep the order they were listed in
+                names = [table.names[iid] for iid in sorted(ids)]
+            result.append((group, names))
+        return result
+
+
+def plan_meals(plan):
+    """Flatten a plan (rows of recipes, None for empty slots) into its meals."""
+    return [meal for row in plan for meal in row if meal is not None]
+
+
+def format_grouped(grouped):
+    if not grouped:
+        return "(nothing to buy)"
+    return "\n".join(f"{group}: " + ", ".join(names) for group, names in grouped)
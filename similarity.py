@@ -0,0 +1,245 @@
+"""Similar-recipe lookup with MinHash signatures and LSH banding.
+
+Each ingredient gets NUM_PERM stable hash values (crc32 of its canonical key
+pushed through NUM_PERM universal hash functions); a recipe's signature is
+the elementwise minimum over its ingredients, so two signatures agree in a
+given position with probability equal to the Jaccard similarity of the
+ingredient sets. Signatures are cut into BANDS bands and every band is a
+bucket key: recipes sharing any bucket are candidates, and candidates are
+ranked by the fraction of agreeing positions. No pairwise comparison over
+the catalog is ever made.
+
+Signatures are persisted next to the recipe file (``recipes.minhash``) as an
+append-only record file, so recipes added later are appended rather than
+rewriting the whole index.
+"""
+import heapq
+import os
+import random
+import struct
+import zlib
+from array import array
+from operator import eq
+
+from canonical import DEFAULT as CANONICAL
+
+NUM_PERM = 64
+BANDS = 16
+SEED = 1
+MAX_CANDIDATES = 64
+MERSENNE = (1 << 61) - 1
+
+MAGIC = b"MPMNHSH\0"
+VERSION = 2
+HEADER = struct.Struct("<8sIIIIqq")
+
+
+def default_path(json_path):
+    return os.path.splitext(json_path)[0] + ".minhash"
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class SimilarityIndex:
+    """MinHash/LSH index mapping recipe keys to ingredient-set signatures."""
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.seed = seed
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._coeffs = [(rng.randrange(1, MERSENNE), rng.randrange(MERSENNE)) for _ in range(num_perm)]
+        self._ing_cache = {}
+        self.signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._pending = []
+        self._removed = False  # a persisted record may be stale, so flush must rewrite
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __contains__(self, key):
+        return key in self.signatures
+
+    def _ingredient_hashes(self, name):
+        hashes = self._ing_cache.get(name)
+        if hashes is None:
+            x = zlib.crc32(CANONICAL.keys[CANONICAL.intern(name)].encode("utf-8"))
+            # keep 32 bits of each hash: collisions are ~2**-32 and signatures stay compact
+            hashes = self._ing_cache[name] = array("I", [((a * x + b) % MERSENNE) & 0xFFFFFFFF
+                                                          for a, b in self._coeffs])
+        return hashes
+
+    def signature(self, ingredients):
+        """Elementwise minimum of the ingredient hashes as an array("I"), or None when empty."""
+        hashes = [self._ingredient_hashes(ing) for ing in set(ingredients)]
+        if not hashes:
+            return None
+        if len(hashes) == 1:
+            return hashes[0]
+        return array("I", map(min, *hashes))
+
+    def _band_keys(self, sig):
+        raw = sig if isinstance(sig, bytes) else sig.tobytes()
+        width = 4 * self.rows
+        return [hash(raw[i:i + width]) for i in range(0, len(raw), width)]
+
+    def add(self, key, ingredients):
+        """Index ``key``; re-adding a key replaces its signature."""
+        self._insert(key, self.signature(ingredients))
+        self._pending.append(key)
+
+    def _insert(self, key, sig, raw=None):
+        dropped = self._drop(key)
+        if sig is None:
+            if dropped:
+                # no record will supersede the persisted one, so flush must rewrite
+                self._removed = True
+            return
+        self.signatures[key] = sig
+        # most buckets hold a single recipe, stored bare instead of in a list
+        for bucket, band in zip(self._buckets, self._band_keys(raw or sig)):
+            keys = bucket.get(band)
+            if keys is None:
+                bucket[band] = key
+            elif type(keys) is list:
+                keys.append(key)
+            else:
+                bucket[band] = [keys, key]
+
+    def remove(self, key):
+        if self._drop(key):
+            self._removed = True
+
+    def _drop(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return False
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            keys = bucket[band]
+            if type(keys) is not list:
+                del bucket[band]
+                continue
+            keys.remove(key)
+            if len(keys) == 1:
+                bucket[band] = keys[0]
+        return True
+
+    def add_catalog(self, catalog):
+        for pos, recipe in enumerate(catalog.recipes):
+            rid = recipe.get("id")
+            self.add(rid if rid is not None else pos, recipe.get("ingredients", ()))
+
+    def query(self, ingredients, k=10, exclude=None):
+        """[(key, estimated Jaccard)] for up to ``k`` recipes similar to ``ingredients``."""
+        sig = self.signature(ingredients)
+        if sig is None or k <= 0:
+            return []
+        hits = {}
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            keys = bucket.get(band)
+            if keys is None:
+                continue
+            if type(keys) is not list:
+                keys = (keys,)
+            for key in keys:
+                hits[key] = hits.get(key, 0) + 1
+        hits.pop(exclude, None)
+        if len(hits) > MAX_CANDIDATES:
+            # keys colliding in more bands are the likelier near neighbours
+            hits = heapq.nlargest(MAX_CANDIDATES, hits, key=hits.__getitem__)
+        n = self.num_perm
+        signatures = self.signatures
+        scored = [(sum(map(eq, sig, signatures[key])) / n, key) for key in hits]
+        return [(key, score) for score, key in heapq.nlargest(k, scored, key=lambda item: item[0])]
+
+    # ---------- Persistence ----------
+    def save(self, path, source_path=None):
+        """Write every signature to ``path`` (atomic); keys must be integers."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self._header(source_path))
+            self._write_records(f, self.signatures)
+        os.replace(tmp_path, path)
+        self._pending = []
+        self._removed = False
+
+    def flush(self, path, source_path=None):
+        """Append signatures added since the last save/flush, rewriting only the header.
+
+        Records cannot be deleted from the file, so after a ``remove`` this
+        falls back to a full ``save``.
+        """
+        if self._removed or not os.path.exists(path):
+            self.save(path, source_path)
+            return
+        keys = [key for key in dict.fromkeys(self._pending) if key in self.signatures]
+        with open(path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            self._write_records(f, keys)
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(self._header(source_path))
+        self._pending = []
+
+    def _header(self, source_path):
+        mtime_ns, size = _source_stamp(source_path) if source_path else (0, 0)
+        return HEADER.pack(MAGIC, VERSION, self.num_perm, self.bands, self.seed, mtime_ns, size)
+
+    def _write_records(self, f, keys):
+        for key in keys:
+            if not isinstance(key, int) or isinstance(key, bool):
+                raise ValueError(f"recipe keys must be integers to persist signatures, got {key!r}")
+            f.write(struct.pack("<q", key))
+            f.write(self.signatures[key].tobytes())
+
+    @classmethod
+    def load(cls, path, source_path=None):
+        """Load ``path``; raises ValueError if it is not an index for the current ``source_path``."""
+        with open(path, "rb") as f:
+            head = f.read(HEADER.size)
+            try:
+                magic, version, num_perm, bands, seed, mtime_ns, size = HEADER.unpack(head)
+            except struct.error:
+                raise ValueError(f"{path} is not a signature file")
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a signature file (version {VERSION})")
+            if source_path and (mtime_ns, size) != _source_stamp(source_path):
+                raise ValueError(f"{path} is out of date")
+            data = f.read()
+        index = cls(num_perm, bands, seed)
+        width = 8 + 4 * num_perm
+        # a torn final record from an interrupted append is ignored
+        for start in range(0, len(data) - width + 1, width):
+            key, = struct.unpack_from("<q", data, start)
+            raw = data[start + 8:start + width]
+            sig = array("I")
+            sig.frombytes(raw)
+            index._insert(key, sig, raw)
+        return index
+
+
+def open_index(catalog, json_path=None):
+    """Load the persisted index for ``json_path`` or build (and save) it from ``catalog``."""
+    path = default_path(json_path) if json_path else None
+    if path:
+        try:
+            return SimilarityIndex.load(path, json_path)
+        except (OSError, ValueError):
+            pass
+    index = SimilarityIndex()
+    index.add_catalog(catalog)
+    if path:
+        try:
+            index.save(path, json_path)
+        except (OSError, ValueError):
+            # persistence is only a startup cache
+            pass
+    return index
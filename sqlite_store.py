@@ -0,0 +1,401 @@
+"""Optional SQLite backend for recipes and saved meals.
+
+The database (WAL mode) keeps normalized recipe, ingredient and step tables
+plus FTS5 indexes, so large catalogs are queried in place instead of being
+loaded into Python lists. Build it once from the JSON files:
+
+    python sqlite_store.py import --db meal_planner.db recipes.json meals.json
+
+and point the app at it with ``MEAL_PLANNER_DB=meal_planner.db``.
+SQLiteCatalog and SQLiteMealStore offer the same methods as
+engine.RecipeCatalog and meal_store.MealStore.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import engine
+from canonical import DEFAULT as CANONICAL
+from meal_store import lock_file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT,
+    n_ingredients INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recipes_name ON recipes(name, position);
+CREATE INDEX IF NOT EXISTS recipes_position ON recipes(position);
+CREATE TABLE IF NOT EXISTS ingredients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS recipe_ingredients (
+    ingredient_id INTEGER NOT NULL REFERENCES ingredients(id),
+    recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (ingredient_id, recipe_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS recipe_ingredients_recipe ON recipe_ingredients(recipe_id, position);
+CREATE TABLE IF NOT EXISTS steps (
+    recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, position)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(name, ingredients, instructions);
+CREATE TABLE IF NOT EXISTS saved_meals (
+    name TEXT PRIMARY KEY,
+    description TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS saved_meal_ingredients (
+    meal TEXT NOT NULL REFERENCES saved_meals(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    ingredient TEXT NOT NULL,
+    PRIMARY KEY (meal, position)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS saved_meals_fts USING fts5(name, ingredients, description);
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _fts_query(text):
+    # quote every token so user input cannot inject FTS5 syntax
+    tokens = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"' for t in tokens)
+
+
+# ---------- Recipes ----------
+ROW_PAGE = 256
+ROW_PAGE_CACHE = 16
+
+
+class _RowSequence:
+    """Recipes by file position, fetched from the database a page of rows at a time."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._pages = engine.LRUCache(ROW_PAGE_CACHE)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._catalog)
+
+    def _page(self, n):
+        with self._lock:
+            page = self._pages.get(n)
+        if page is None:
+            page = self._catalog._load_positions(n * ROW_PAGE, (n + 1) * ROW_PAGE)
+            with self._lock:
+                self._pages.put(n, page)
+        return page
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._page(index // ROW_PAGE)[index % ROW_PAGE]
+
+    def __iter__(self):
+        for n in range(-(-len(self) // ROW_PAGE)):
+            yield from self._page(n)
+
+
+class SQLiteCatalog:
+    """Recipe catalog queried straight from SQLite."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self.details_cache = engine.LRUCache(engine.DETAIL_CACHE_SIZE)
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_ids (id INTEGER PRIMARY KEY)")
+        self.recipes = _RowSequence(self)
+        self._count = self._query("SELECT COUNT(*) FROM recipes")[0][0]
+        # canonical ingredient id -> ingredient row ids (several if imported before canonicalization)
+        self._ingredient_rows = {}
+        for row_id, name in self._query("SELECT id, name FROM ingredients"):
+            self._ingredient_rows.setdefault(CANONICAL.intern(name), []).append(row_id)
+
+    def close(self):
+        self._conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.recipes)
+
+    def __bool__(self):
+        return self._count > 0
+
+    def _query_ids(self, ids, sql, params=()):
+        """Run ``sql`` with ``ids`` in the temp table query_ids, so there is no bound-variable limit."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM temp.query_ids")
+            self._conn.executemany("INSERT OR IGNORE INTO temp.query_ids VALUES (?)", ((i,) for i in ids))
+            return self._conn.execute(sql, params).fetchall()
+
+    def _load_many(self, rids):
+        """Recipes for ``rids`` in that order (missing ids are skipped), with three queries in total."""
+        rids = list(rids)
+        if not rids:
+            return []
+        ings = {}
+        for rid, name in self._query_ids(
+                rids, "SELECT ri.recipe_id, i.name FROM recipe_ingredients ri "
+                "JOIN ingredients i ON i.id = ri.ingredient_id "
+                "WHERE ri.recipe_id IN temp.query_ids ORDER BY ri.recipe_id, ri.position"):
+            ings.setdefault(rid, []).append(name)
+        steps = {}
+        for rid, text in self._query_ids(
+                rids, "SELECT recipe_id, text FROM steps WHERE recipe_id IN temp.query_ids "
+                "ORDER BY recipe_id, position"):
+            steps.setdefault(rid, []).append(text)
+        by_id = {}
+        for rid, name, category in self._query_ids(
+                rids, "SELECT id, name, category FROM recipes WHERE id IN temp.query_ids"):
+            recipe = {
+                "name": name,
+                "ingredients": tuple(ings.get(rid, ())),
+                "instructions": tuple(steps.get(rid, ())),
+                "id": rid,
+            }
+            if category is not None:
+                recipe["category"] = category
+            by_id[rid] = recipe
+        return [by_id[rid] for rid in rids if rid in by_id]
+
+    def _load(self, rid):
+        found = self._load_many((rid,))
+        return found[0] if found else None
+
+    def _load_positions(self, start, stop):
+        rows = self._query("SELECT id FROM recipes WHERE position >= ? AND position < ? ORDER BY position",
+                           (start, stop))
+        return self._load_many(rid for rid, in rows)
+
+    def _fetch_one(self, sql, params):
+        rows = self._query(sql, params)
+        return self._load(rows[0][0]) if rows else None
+
+    def get(self, rid):
+        return self._load(rid)
+
+    def find_by_name(self, name):
+        return self._fetch_one("SELECT id FROM recipes WHERE name = ? ORDER BY position LIMIT 1", (name,))
+
+    def _ingredient_ids(self, selected_ingredients):
+        return sorted(row_id for iid in CANONICAL.ids(selected_ingredients)
+                      for row_id in self._ingredient_rows.get(iid, ()))
+
+    def overlap_counts(self, selected_ingredients, cancel=None):
+        """Map (position, id, n_ingredients) -> overlap for recipes sharing an ingredient."""
+        ids = self._ingredient_ids(selected_ingredients)
+        if not ids or (cancel is not None and cancel.is_set()):
+            return None if ids else {}
+        rows = self._query_ids(
+            ids, "SELECT r.position, r.id, r.n_ingredients, COUNT(*) FROM recipe_ingredients ri "
+            "JOIN recipes r ON r.id = ri.recipe_id "
+            "WHERE ri.ingredient_id IN temp.query_ids GROUP BY ri.recipe_id")
+        return {(pos, rid, n): count for pos, rid, n, count in rows}
+
+    def rank_key(self):
+        return lambda item: (item[1], item[1] - item[0][2], -item[0][0])
+
+    def resolve(self, key):
+        return self._load(key[1])
+
+    def match(self, selected_ingredients, k=engine.MAX_SUGGESTIONS):
+        """Same ranking as RecipeCatalog.match, done by SQLite."""
+        ids = self._ingredient_ids(selected_ingredients)
+        if not ids:
+            return []
+        rows = self._query_ids(
+            ids, "SELECT ri.recipe_id, COUNT(*) AS overlap, r.n_ingredients, r.position FROM recipe_ingredients ri "
+            "JOIN recipes r ON r.id = ri.recipe_id "
+            "WHERE ri.ingredient_id IN temp.query_ids GROUP BY ri.recipe_id "
+            "ORDER BY overlap DESC, r.n_ingredients - overlap ASC, r.position ASC LIMIT ?", (k,))
+        return self._load_many(rid for rid, *_ in rows)
+
+    def search(self, text, limit=50):
+        """Full-text search over name, ingredients and instructions, best BM25 first."""
+        query = _fts_query(text)
+        if not query:
+            return []
+        rows = self._query(
+            "SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ? ORDER BY bm25(recipes_fts) LIMIT ?",
+            (query, limit))
+        return self._load_many(rid for rid, in rows)
+
+
+def import_recipes(conn, json_path):
+    """Replace the recipe tables with the contents of ``json_path``; returns the count."""
+    with conn:
+        conn.execute("DELETE FROM recipes_fts")
+        conn.execute("DELETE FROM steps")
+        conn.execute("DELETE FROM recipe_ingredients")
+        conn.execute("DELETE FROM recipes")
+        conn.execute("DELETE FROM ingredients")
+        ingredient_ids = {}
+        count = 0
+        for pos, recipe in enumerate(engine.iter_recipes(json_path)):
+            rid = recipe.get("id", pos)
+            if not isinstance(rid, int) or isinstance(rid, bool):
+                raise ValueError(f"recipe ids must be integers for the SQLite backend, got {rid!r}")
+            ings = recipe["ingredients"]
+            try:
+                conn.execute("INSERT INTO recipes (id, position, name, category, n_ingredients) VALUES (?, ?, ?, ?, ?)",
+                             (rid, count, recipe["name"], recipe.get("category"), len(ings)))
+            except sqlite3.IntegrityError:
+                # duplicate id: first record wins, as in RecipeCatalog
+                continue
+            for i, ing in enumerate(ings):
+                iid = ingredient_ids.get(ing)
+                if iid is None:
+                    iid = ingredient_ids[ing] = conn.execute(
+                        "INSERT INTO ingredients (name) VALUES (?)", (ing,)).lastrowid
+                conn.execute("INSERT INTO recipe_ingredients VALUES (?, ?, ?)", (iid, rid, i))
+            conn.executemany("INSERT INTO steps VALUES (?, ?, ?)",
+                             ((rid, i, step) for i, step in enumerate(recipe["instructions"])))
+            conn.execute("INSERT INTO recipes_fts (rowid, name, ingredients, instructions) VALUES (?, ?, ?, ?)",
+                         (rid, recipe["name"], " ".join(ings), "\n".join(recipe["instructions"])))
+            count += 1
+    return count
+
+
+# ---------- Saved Meals ----------
+def _insert_meal(conn, name, meal):
+    rowid = conn.execute("INSERT INTO saved_meals (name, description) VALUES (?, ?)",
+                         (name, meal["description"])).lastrowid
+    conn.executemany("INSERT INTO saved_meal_ingredients VALUES (?, ?, ?)",
+                     ((name, i, ing) for i, ing in enumerate(meal["ingredients"])))
+    conn.execute("INSERT INTO saved_meals_fts (rowid, name, ingredients, description) VALUES (?, ?, ?, ?)",
+                 (rowid, name, " ".join(meal["ingredients"]), meal["description"]))
+
+
+def _delete_meal(conn, name):
+    conn.execute("DELETE FROM saved_meals_fts WHERE rowid = (SELECT rowid FROM saved_meals WHERE name = ?)", (name,))
+    conn.execute("DELETE FROM saved_meals WHERE name = ?", (name,))
+
+
+class SQLiteMealStore:
+    """Saved meals in SQLite, with the same surface as meal_store.MealStore."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = connect(path)
+        self.meals = {}
+        # every edit is committed immediately, nothing to compact
+        self.journal_records = 0
+        self._lock = None
+
+    def lock(self):
+        # self.meals is a cache, so one writing process at a time here too
+        if self._lock is None:
+            self._lock = lock_file(self.path + ".lock")
+
+    def unlock(self):
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def close(self):
+        self.unlock()
+        self._conn.close()
+
+    def load(self):
+        meals = {}
+        for name, desc in self._conn.execute("SELECT name, description FROM saved_meals"):
+            meals[name] = {"ingredients": [], "description": desc}
+        for meal, ing in self._conn.execute("SELECT meal, ingredient FROM saved_meal_ingredients ORDER BY meal, position"):
+            meals[meal]["ingredients"].append(ing)
+        self.meals.clear()
+        self.meals.update(meals)
+        return self.meals
+
+    def put(self, name, meal, replaces=None):
+        meal = engine.normalize_saved_meal(meal)
+        if meal is None:
+            raise ValueError(f"invalid meal for {name!r}")
+        with self._conn:
+            if replaces is not None and replaces != name:
+                _delete_meal(self._conn, replaces)
+            _delete_meal(self._conn, name)
+            _insert_meal(self._conn, name, meal)
+        if replaces is not None and replaces != name:
+            self.meals.pop(replaces, None)
+        self.meals[name] = meal
+
+    def delete(self, name):
+        with self._conn:
+            _delete_meal(self._conn, name)
+        self.meals.pop(name, None)
+
+    def compact(self):
+        with self._conn:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def search(self, text, limit=50):
+        query = _fts_query(text)
+        if not query:
+            return []
+        rows = self._conn.execute(
+            "SELECT name FROM saved_meals_fts WHERE saved_meals_fts MATCH ? ORDER BY bm25(saved_meals_fts) LIMIT ?",
+            (query, limit)).fetchall()
+        return [name for name, in rows]
+
+
+def import_saved_meals(conn, json_path):
+    """Replace the saved meals with the contents of ``json_path``; returns the count."""
+    meals = engine.load_saved_meals(json_path)
+    with conn:
+        conn.execute("DELETE FROM saved_meals_fts")
+        conn.execute("DELETE FROM saved_meals")
+        for name, meal in meals.items():
+            _insert_meal(conn, name, meal)
+    return len(meals)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meal Planner SQLite backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="one-shot import from the JSON files")
+    imp.add_argument("--db", default="meal_planner.db")
+    imp.add_argument("recipes", nargs="?", default="recipes.json")
+    imp.add_argument("meals", nargs="?", default="meals.json")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        n_recipes = import_recipes(conn, args.recipes) if os.path.exists(args.recipes) else 0
+        n_meals = import_saved_meals(conn, args.meals) if os.path.exists(args.meals) else 0
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+    print(json.dumps({"db": args.db, "recipes": n_recipes, "saved_meals": n_meals}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Tk event-loop stall detector.
+
+A heartbeat is scheduled with ``root.after`` every ``interval_ms``; each beat
+records how late it ran, which is the time the event loop spent on something
+else. A daemon thread watches the time since the last beat, and once it
+exceeds ``threshold_ms`` it grabs the main thread's Python stack with
+``sys._current_frames`` while the handler is still blocking. The stall's
+duration is filled in when the next beat finally runs.
+
+    monitor = StallMonitor(root, threshold_ms=200)
+    monitor.start()
+    ...
+    monitor.stop()
+    print(monitor.report())
+
+Stalls are also fed to instrumentation (``ui_stall``) when that is enabled.
+"""
+import bisect
+import sys
+import threading
+import time
+import traceback
+from array import array
+
+import instrumentation
+
+DEFAULT_INTERVAL_MS = 100
+DEFAULT_THRESHOLD_MS = 200
+MAX_STALLS = 100  # stacks kept per session; later stalls are only counted
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class StallMonitor:
+    """Heartbeat lateness histogram plus main-thread stacks of stalls over ``threshold_ms``."""
+
+    def __init__(self, root, interval_ms=DEFAULT_INTERVAL_MS, threshold_ms=DEFAULT_THRESHOLD_MS):
+        self.root = root
+        self.interval = interval_ms / 1000.0
+        self.threshold = threshold_ms / 1000.0
+        self.lateness = array("f")
+        self.stalls = []  # {"at", "duration_s", "stack"}, oldest first
+        self.stall_count = 0
+        self.started = None
+        self._main_ident = threading.main_thread().ident
+        self._expected = None
+        self._last_beat = None
+        self._current = None
+        self._job = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.time()
+        self._stop.clear()
+        self._schedule()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _schedule(self):
+        now = time.perf_counter()
+        with self._lock:
+            self._last_beat = now
+        self._expected = now + self.interval
+        self._job = self.root.after(int(self.interval * 1000), self._beat)
+
+    def _beat(self):
+        late = max(0.0, time.perf_counter() - self._expected)
+        self.lateness.append(late)
+        with self._lock:
+            stall, self._current = self._current, None
+        if stall is None and late >= self.threshold:
+            # over before the watcher looked: counted, but without a stack
+            stall = {"at": time.time() - late, "duration_s": None, "stack": []}
+        if stall is not None:
+            stall["duration_s"] = late + self.interval
+            self.stall_count += 1
+            if len(self.stalls) < MAX_STALLS:
+                self.stalls.append(stall)
+            instrumentation.record("ui_stall", stall["duration_s"])
+        if not self._stop.is_set():
+            self._schedule()
+
+    def _watch(self):
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            with self._lock:
+                if self._current is not None or self._last_beat is None:
+                    continue
+                if time.perf_counter() - self._last_beat < self.interval + self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._main_ident)
+                self._current = {
+                    "at": time.time(),
+                    "duration_s": None,
+                    "stack": traceback.format_stack(frame) if frame is not None else [],
+                }
+
+    # ---------- Reporting ----------
+    def histogram(self):
+        """[(upper bound in ms or None for the overflow bucket, beats)]."""
+        counts = [0] * (len(BUCKETS_MS) + 1)
+        for late in self.lateness:
+            counts[bisect.bisect_left(BUCKETS_MS, late * 1000)] += 1
+        return list(zip(BUCKETS_MS + (None,), counts))
+
+    def percentile(self, pct):
+        if not self.lateness:
+            return 0.0
+        ordered = sorted(self.lateness)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def report(self):
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started or time.time()))
+        elapsed = time.time() - (self.started or time.time())
+        lines = [f"Session {started} ({elapsed:.0f} s, {len(self.lateness)} heartbeats "
+                 f"every {self.interval * 1000:.0f} ms)", "", "UI latency (heartbeat lateness):"]
+        hist = self.histogram()
+        widest = max([n for _, n in hist] + [1])
+        lower = 0
+        for upper, n in hist:
+            label = f"{lower}-{upper} ms" if upper is not None else f">= {lower} ms"
+            lines.append(f"  {label:<14}{n:>8}  " + "#" * (40 * n // widest))
+            lower = upper
+        lines.append(f"  p50 {self.percentile(50) * 1000:.1f} ms   p95 {self.percentile(95) * 1000:.1f} ms   "
+                     f"p99 {self.percentile(99) * 1000:.1f} ms   max {max(self.lateness, default=0) * 1000:.1f} ms")
+        lines += ["", f"Stalls over {self.threshold * 1000:.0f} ms: {self.stall_count}"]
+        for stall in self.stalls:
+            at = time.strftime("%H:%M:%S", time.localtime(stall["at"]))
+            if not stall["stack"]:
+                lines.append(f"  [{at}] {stall['duration_s']:.2f} s (no stack captured)")
+                continue
+            lines.append(f"  [{at}] {stall['duration_s']:.2f} s, main thread was in:")
+            lines += ["    " + line for chunk in stall["stack"] for line in chunk.rstrip().split("\n")]
+        if self.stall_count > len(self.stalls):
+            lines.append(f"  ({self.stall_count - len(self.stalls)} more without stacks)")
+        return "\n".join(lines) + "\n"
+
+    def append_report(self, path):
+        """Append this session's report to ``path``."""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.report() + "\n")
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+import api_server
+import engine
+import loadtest
+from meal_store import MealStore
+
+RECIPES = [
+    {"id": 1, "name": "Omelette", "category": "Breakfast", "ingredients": ["Eggs", "Milk"]},
+    {"id": 2, "name": "Fried Rice", "category": "Dinner", "ingredients": ["Rice", "Eggs", "Peas"]},
+    {"id": 3, "name": "Rice Salad", "category": "Lunch", "ingredients": ["Rice", "Tomatoes"]},
+]
+
+
+def _serve_and_run(tmp_path, client):
+    """Start a one-worker server on a free port, run ``client(call)`` against it, then stop it."""
+    recipes = tmp_path / "recipes.json"
+    recipes.write_text(json.dumps(RECIPES))
+    server = api_server.APIServer(str(recipes), meals_path=str(tmp_path / "meals.json"), workers=1)
+
+    async def main():
+        bound = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(api_server.serve(server, "127.0.0.1", 0, bound.set_result))
+        host, port = await bound
+        conn = await asyncio.open_connection(host, port)
+
+        async def call(method, path, payload=None):
+            body = json.dumps(payload).encode() if payload is not None else b""
+            status, data, _ = await loadtest._request(*conn, host, method, path, body)
+            return status, json.loads(data)
+
+        try:
+            return await client(call, server)
+        finally:
+            conn[1].close()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_routes_over_keep_alive(tmp_path):
+    async def client(call, server):
+        assert await call("GET", "/health") == (200, {"status": "ok", "recipes": 3, "meals": 0})
+        status, body = await call("POST", "/match", {"pantry": ["egg", "RICE"], "k": 2})
+        assert status == 200 and [r["name"] for r in body["results"]] == ["Fried Rice", "Omelette"]
+        status, body = await call("POST", "/match", {"pantry": ["rice"], "category": "lunch"})
+        assert [r["id"] for r in body["results"]] == [3]
+        assert (await call("POST", "/match", {"pantry": "rice"}))[0] == 400
+        assert (await call("GET", "/recipes/2"))[1]["name"] == "Fried Rice"
+        assert (await call("GET", "/recipes/9"))[0] == 404
+        assert (await call("GET", "/match"))[0] == 405
+        status, body = await call("POST", "/plan/weekly", {"pantry": ["Eggs"], "days": 2, "seed": 1})
+        assert status == 200 and len(body["plan"]["days"]) == 2
+
+        assert (await call("PUT", "/meals/Egg%20Fried%20Rice", {"ingredients": ["Rice", "Eggs"]}))[0] == 201
+        assert (await call("GET", "/meals?q=fried"))[1] == {"meals": ["Egg Fried Rice"]}
+        assert (await call("DELETE", "/meals/Egg%20Fried%20Rice"))[0] == 200
+        assert (await call("GET", "/meals/Egg%20Fried%20Rice"))[0] == 404
+
+    _serve_and_run(tmp_path, client)
+
+
+def test_identical_requests_are_coalesced(tmp_path):
+    async def client(call, server):
+        body = json.dumps({"pantry": ["Eggs", "rice"], "k": 3}).encode()
+        same = json.dumps({"pantry": ["RICE", "egg"], "k": 3}).encode()
+        results = await asyncio.gather(*(server.handle("POST", "/match", {}, b) for b in (body, same, same)))
+        assert results[0] == results[1] == results[2]
+        assert server.stats["coalesced"] == 2 and server.stats["jobs"] == 1
+
+    _serve_and_run(tmp_path, client)
+
+
+def test_close_releases_the_meals_when_compaction_fails(tmp_path, monkeypatch):
+    meals = str(tmp_path / "meals.json")
+    server = api_server.APIServer(str(tmp_path / "recipes.json"), meals_path=meals)
+    server.store.put("Toast", {"ingredients": ["Bread", "Butter"], "description": ""})
+
+    def disk_full(meals, path):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(engine, "save_saved_meals", disk_full)
+    with pytest.raises(OSError):
+        server.close()
+    monkeypatch.undo()
+    desktop = MealStore(meals)
+    desktop.lock()
+    assert "Toast" in desktop.load()
+    desktop.unlock()
+
+
+def test_deeply_nested_body_is_a_client_error():
+    with pytest.raises(api_server.HTTPError) as e:
+        api_server._object(("[" * 5000).encode())
+    assert e.value.status == 400
+    assert api_server._object(json.dumps({"pantry": []}).encode()) == {"pantry": []}
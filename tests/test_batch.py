@@ -0,0 +1,67 @@
+import io
+import json
+from concurrent.futures import Future
+
+import batch
+
+
+def test_bad_lines_become_error_records(tmp_path, monkeypatch):
+    recipes = tmp_path / "recipes.json"
+    recipes.write_text(json.dumps([{"id": 1, "name": "Rice Bowl", "ingredients": ["Rice", "Eggs"]}]))
+    monkeypatch.setattr(batch, "can_fork", lambda: False)
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", _InlinePool)
+    lines = [
+        '{"id": "a", "pantry": ["Rice"]}',
+        "[" * 5000,
+        '{"id": "b", "pantry": "Rice"}',
+        '{"id": "c", "pantry": ["Eggs"], "k": 1}',
+    ]
+    out = io.StringIO()
+    errors = batch.run(lines, out, str(recipes), workers=1, chunk_size=8, stats=None)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert errors == 2
+    assert [r.get("id") for r in results] == ["a", None, "b", "c"]
+    assert "error" in results[1] and results[1]["line"] == 2
+    assert results[3]["results"][0]["name"] == "Rice Bowl"
+
+
+def test_process_pool_keeps_input_order(tmp_path):
+    recipes = tmp_path / "recipes.json"
+    recipes.write_text(json.dumps([
+        {"id": 1, "name": "Omelette", "category": "Breakfast", "ingredients": ["Eggs", "Milk"]},
+        {"id": 2, "name": "Fried Rice", "category": "Dinner", "ingredients": ["Rice", "Eggs", "Peas"]},
+        {"id": 3, "name": "Rice Pudding", "category": "Dessert", "ingredients": ["Rice", "Milk"]},
+    ]))
+    lines = [json.dumps({"id": i, "pantry": ["Rice", "Eggs", "Milk"][: 1 + i % 3], "k": 2}) for i in range(25)]
+    lines[10] = ""
+    lines[11] = json.dumps({"id": "cat", "pantry": ["eggs"], "category": "dinner"})
+    out = io.StringIO()
+    stats = io.StringIO()
+    assert batch.run(lines, out, str(recipes), workers=2, chunk_size=3, stats=stats) == 0
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["id"] for r in results] == list(range(10)) + ["cat"] + list(range(12, 25))
+    assert [(r["name"], r["overlap"], r["missing"]) for r in results[0]["results"]] == \
+        [("Rice Pudding", 1, 1), ("Fried Rice", 1, 2)]
+    assert [r["name"] for r in results[10]["results"]] == ["Fried Rice"]
+    assert "24 requests (0 errors)" in stats.getvalue()
+
+
+class _InlinePool:
+    """Runs tasks in the calling process (with the parent's catalog)."""
+
+    def __init__(self, max_workers=None, mp_context=None, initializer=None, initargs=()):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
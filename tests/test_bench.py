@@ -0,0 +1,26 @@
+import json
+
+import bench
+
+
+def test_synthetic_data_is_seeded():
+    first = list(bench.synthetic_recipes(50, seed=3))
+    assert first == list(bench.synthetic_recipes(50, seed=3))
+    assert [r["id"] for r in first] == list(range(1, 51))
+    assert all(len(set(r["ingredients"])) == len(r["ingredients"]) >= 2 for r in first)
+    assert bench.random_pantries(5, seed=1) == bench.random_pantries(5, seed=1)
+
+
+def test_percentile_interpolates():
+    assert bench.percentile([4.0], 99) == 4.0
+    assert bench.percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert bench.percentile([0.0, 10.0], 95) == 9.5
+
+
+def test_main_writes_engine_results(tmp_path, capsys):
+    out = tmp_path / "results.json"
+    assert bench.main(["--sizes", "200", "--repeat", "2", "--no-render", "--json", str(out)]) == 0
+    rows = json.loads(out.read_text())
+    assert {row["path"] for row in rows} == {"load", "load_compiled", "load_saved_meals", "search", "search_compiled"}
+    assert all(row["size"] == 200 and row["runs"] >= 1 for row in rows)
+    assert "search" in capsys.readouterr().out
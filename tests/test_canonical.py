@@ -0,0 +1,59 @@
+import json
+
+import compiled_catalog
+import engine
+import planner
+from canonical import Canonicalizer, normalize_key
+
+RECIPES = [
+    {"id": 1, "name": "Fish Sandwich", "category": "Lunch", "ingredients": ["Fish", "Bread", "Lettuce", "Tomato"]},
+    {"id": 2, "name": "Salsa", "category": "Lunch", "ingredients": ["tomatoes ", "Spring onion", "TOMATOES"]},
+    {"id": 3, "name": "Omelette", "category": "Breakfast", "ingredients": ["Eggs", "Scallions"]},
+]
+
+
+def test_normalize_key_folds_spellings():
+    assert normalize_key("Tomato") == normalize_key("tomatoes ") == normalize_key("TOMATOES")
+    assert normalize_key("Spring onion") == normalize_key("scallions") == "onion"
+    assert normalize_key("asparagus") == "asparagus"
+
+
+def test_intern_and_fuzzy_lookup():
+    canon = Canonicalizer()
+    tomato = canon.intern("Tomatoes")
+    assert canon.intern("tomato") == tomato
+    assert canon.name(tomato) == "Tomatoes"
+    assert canon.lookup("Tomatoe") is None
+    assert canon.lookup("Tomatoe", fuzzy=True) == tomato
+    assert canon.ids(["TOMATO", "unknown thing"]) == {tomato}
+
+
+def test_recipes_keep_their_spelling():
+    recipes = [engine.normalize_recipe(r) for r in RECIPES]
+    assert recipes[0]["ingredients"] == ("Fish", "Bread", "Lettuce", "Tomato")
+    # duplicates by canonical id are dropped, the first spelling is kept
+    assert recipes[1]["ingredients"] == ("tomatoes", "Spring onion")
+    assert recipes[2]["ingredients"] == ("Eggs", "Scallions")
+
+
+def test_matching_across_spellings(tmp_path):
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps(RECIPES))
+    recipes = list(engine.iter_recipes(str(path)))
+    compiled = compiled_catalog.open_catalog(str(path))
+    try:
+        for catalog in (engine.RecipeCatalog(recipes), compiled):
+            assert {r["id"] for r in catalog.match(["tomato", "green onion"])} == {1, 2, 3}
+            top, overlap = engine.match_with_counts(catalog, ["Tomatoes", "onion"])[0]
+            assert (top["id"], overlap) == (2, 2)
+            assert catalog.get(1)["ingredients"] == ("Fish", "Bread", "Lettuce", "Tomato")
+    finally:
+        compiled.close()
+
+
+def test_planner_pantry_matches_other_spellings():
+    meals = planner.MealPlanner(engine.RecipeCatalog([engine.normalize_recipe(r) for r in RECIPES]))
+    plan = meals.plan(days=1, slots=("Breakfast",), pantry=["egg", "SCALLION"], max_moves=0)
+    assert plan[0][0]["id"] == 3
+    solver = planner._Solver(meals, 1, ("Lunch",), ["Tomato", "scallion"], 0, None)
+    assert solver.missing(1) == frozenset()
@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+import bench
+import compiled_catalog
+import engine
+
+
+def _write(path, recipes):
+    path.write_text(json.dumps(recipes))
+    return str(path)
+
+
+def test_compiled_catalog_matches_recipe_catalog(tmp_path):
+    recipes = list(bench.synthetic_recipes(300, seed=5))
+    recipes[7]["name"] = recipes[3]["name"]
+    path = _write(tmp_path / "recipes.json", recipes)
+    reference = engine.load_catalog(path)
+    catalog = compiled_catalog.open_catalog(path)
+    try:
+        assert len(catalog) == 300
+        assert list(catalog.recipes) == reference.recipes
+        assert catalog.recipes[-1] == reference.recipes[-1]
+        assert catalog.get(42) == reference.get(42)
+        assert catalog.get(0) is None and catalog.get("42") is None
+        assert catalog.find_by_name(recipes[3]["name"])["id"] == recipes[3]["id"]
+        assert catalog.find_by_name("No such recipe") is None
+        for pantry in bench.random_pantries(20, seed=2):
+            assert catalog.match(pantry, k=15) == reference.match(pantry, k=15)
+    finally:
+        catalog.close()
+
+
+def test_rebuilt_when_the_source_changes(tmp_path):
+    path = _write(tmp_path / "recipes.json", [{"id": 1, "name": "Toast", "ingredients": ["Bread"]}])
+    assert not compiled_catalog.is_fresh(path)
+    with pytest.raises(FileNotFoundError):
+        compiled_catalog.open_catalog(path, rebuild=False)
+    compiled_catalog.open_catalog(path).close()
+    assert compiled_catalog.is_fresh(path)
+
+    _write(tmp_path / "recipes.json", [{"id": 1, "name": "Toast", "ingredients": ["Bread", "Butter"]},
+                                       {"id": 2, "name": "Tea", "ingredients": ["Tea"]}])
+    os.utime(path, ns=(0, 10 ** 18))
+    assert not compiled_catalog.is_fresh(path)
+    catalog = compiled_catalog.open_catalog(path)
+    try:
+        assert [r["name"] for r in catalog.recipes] == ["Toast", "Tea"]
+        assert catalog.get(1)["ingredients"] == ("Bread", "Butter")
+    finally:
+        catalog.close()
+
+
+def test_rejects_ids_it_cannot_store(tmp_path):
+    with pytest.raises(ValueError):
+        compiled_catalog.compile_catalog(_write(tmp_path / "a.json", [{"id": "x1", "name": "A", "ingredients": []}]))
+    with pytest.raises(ValueError):
+        compiled_catalog.compile_catalog(_write(tmp_path / "b.json", [{"id": 1, "name": "A", "ingredients": []},
+                                                                      {"id": 1, "name": "B", "ingredients": []}]))
@@ -0,0 +1,150 @@
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+
+import engine
+
+DOC = '[12.5, 3, -0.25e+2, 1E3, {"id": 7, "x": [1.0e-1, 22]}, "12.", true, null, 4]'
+
+
+def test_iter_top_level_any_chunk_size():
+    expected = [(None, v) for v in json.loads(DOC)]
+    for size in range(1, len(DOC) + 2):
+        assert list(engine._iter_top_level(io.StringIO(DOC), size)) == expected, size
+
+
+def test_iter_top_level_object_any_chunk_size():
+    doc = '{"a": 12.5, "bb": -3e2, "c": {"n": 0.125}}'
+    expected = list(json.loads(doc).items())
+    for size in range(1, len(doc) + 2):
+        assert list(engine._iter_top_level(io.StringIO(doc), size)) == expected, size
+
+
+def test_iter_top_level_rejects_malformed_number():
+    for size in (1, 2, 4, 64):
+        try:
+            list(engine._iter_top_level(io.StringIO("[12.x]"), size))
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted '12.x' with chunk size {size}")
+
+
+def _catalog(n):
+    recipes = [{"id": i, "name": f"R{i}", "ingredients": ["Rice", "Eggs"] if i % 3 == 0 else ["Rice"]}
+               for i in range(n)]
+    return engine.RecipeCatalog(recipes)
+
+
+def test_iter_match_batches_equals_match():
+    catalog = _catalog(70)
+    batches = list(engine.iter_match_batches(catalog, ["rice", "eggs"], k=60, batch_size=25))
+    assert [len(b) for b in batches] == [25, 25, 10]
+    assert [r["id"] for b in batches for r in b] == [r["id"] for r in catalog.match(["rice", "eggs"], k=60)]
+    assert batches[0][0]["id"] == 0
+
+
+def test_iter_match_batches_cancel_and_no_match():
+    catalog = _catalog(70)
+    assert list(engine.iter_match_batches(catalog, ["beef"])) == []
+    cancel = threading.Event()
+    cancel.set()
+    assert list(engine.iter_match_batches(catalog, ["rice"], cancel=cancel)) == []
+
+
+def test_match_ranks_by_overlap_then_fewest_missing_then_file_order():
+    catalog = engine.RecipeCatalog([
+        {"id": 1, "name": "Omelette", "ingredients": ["Eggs", "Milk", "Cheese", "Ham"]},
+        {"id": 2, "name": "Scrambled", "ingredients": ["Eggs", "Milk"]},
+        {"id": 3, "name": "Pancakes", "ingredients": ["Eggs", "Milk", "Flour"]},
+        {"id": 4, "name": "Cheese Plate", "ingredients": ["Cheese"]},
+        {"id": 5, "name": "Boiled Egg", "ingredients": ["Eggs"]},
+        {"id": 6, "name": "Fried Egg", "ingredients": ["Eggs"]},
+        {"id": 7, "name": "Salad", "ingredients": ["Lettuce"]},
+    ])
+    ranked = [r["id"] for r in catalog.match(["Eggs", "Milk", "Cheese"])]
+    assert ranked == [1, 2, 3, 4, 5, 6]
+    assert [r["id"] for r in catalog.match(["Eggs", "Milk", "Cheese"], k=2)] == [1, 2]
+    assert catalog.match(["Beef"]) == []
+
+
+def test_duplicate_ids_keep_the_first_recipe():
+    catalog = engine.RecipeCatalog()
+    assert catalog.add({"id": 1, "name": "A", "ingredients": ["Rice"]}) == 1
+    assert catalog.add({"id": 1, "name": "B", "ingredients": ["Beans"]}) is None
+    assert len(catalog) == 1 and catalog.match(["Beans"]) == []
+
+
+def test_engine_imports_without_tkinter():
+    code = "import sys, engine; sys.exit('tkinter' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(engine.__file__)).returncode == 0
+
+
+def test_load_catalog_and_daily_meals(tmp_path):
+    assert not engine.load_catalog(str(tmp_path / "missing.json"))
+    assert engine.generate_daily_meals(engine.RecipeCatalog()) is None
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps({"Toast": {"ingredients": ["Bread"], "instructions": "Toast it."},
+                                "bad": "not a recipe"}))
+    catalog = engine.load_catalog(str(path))
+    assert catalog.recipes == [{"name": "Toast", "ingredients": ("Bread",), "instructions": ("Toast it.",)}]
+    assert engine.generate_daily_meals(catalog, random.Random(0)) == (catalog.recipes[0],) * 3
+
+
+def test_saved_meals_round_trip(tmp_path):
+    path = str(tmp_path / "meals.json")
+    assert engine.load_saved_meals(path) == {}
+    engine.save_saved_meals({"Soup": engine.normalize_saved_meal(["Carrots", "Onion"])}, path)
+    assert engine.load_saved_meals(path) == {"Soup": {"ingredients": ["Carrots", "Onion"], "description": ""}}
+    (tmp_path / "meals.json").write_text("{not json")
+    assert engine.load_saved_meals(path) == {}
+
+
+def test_lookup_by_name_and_cached_details():
+    catalog = engine.RecipeCatalog([
+        {"id": 1, "name": "Soup", "ingredients": ["Carrots"], "instructions": ["Boil."]},
+        {"id": 2, "name": "Soup", "ingredients": ["Leeks"], "instructions": ["Simmer."]},
+    ])
+    assert catalog.find_by_name("Soup")["id"] == 1
+    assert catalog.find_by_name("Stew") is None
+    assert catalog.get(2)["ingredients"] == ["Leeks"]
+
+    text = engine.recipe_details(catalog, catalog.get(2))
+    assert "Leeks" in text and "Simmer." in text
+    assert engine.recipe_details(catalog, catalog.get(2)) is text
+    assert len(catalog.details_cache) == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = engine.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_reload_diffs_by_id_and_keeps_unchanged_recipes():
+    def recipe(rid, name, *ings):
+        return {"id": rid, "name": name, "ingredients": list(ings)}
+
+    catalog = engine.RecipeCatalog([recipe(1, "Soup", "Carrots"), recipe(2, "Stew", "Beef"), recipe(3, "Tea", "Tea")])
+    shared = catalog.recipes
+    soup = catalog.get(1)
+    engine.recipe_details(catalog, catalog.get(2))
+
+    added, removed, changed = catalog.reload([recipe(4, "Toast", "Bread"), recipe(1, "Soup", "Carrots"),
+                                              recipe(2, "Stew", "Lamb"), recipe(4, "Dup", "Eggs")])
+    assert (added, removed, changed) == ([4], [3], [2])
+    assert catalog.recipes is shared
+    assert [r["name"] for r in catalog.recipes] == ["Toast", "Soup", "Stew"]
+    assert catalog.get(1) is soup
+    assert catalog.find_by_name("Tea") is None and catalog.find_by_name("Toast")["id"] == 4
+    assert catalog.match(["Beef"]) == [] and catalog.match(["Tea"]) == []
+    assert [r["id"] for r in catalog.match(["Lamb", "Bread"])] == [4, 2]
+    assert len(catalog.details_cache) == 0
+    assert catalog.reload(list(catalog.recipes)) == ([], [], [])
@@ -0,0 +1,45 @@
+import pytest
+
+import bench
+import engine
+
+np = pytest.importorskip("numpy")
+
+from ingredient_matrix import IngredientMatrix  # noqa: E402
+
+
+def _catalog():
+    return engine.RecipeCatalog(bench.synthetic_recipes(400, seed=11))
+
+
+def test_counts_and_columns():
+    matrix = IngredientMatrix([["Rice", "Eggs"], ["eggs", "Milk"], []])
+    assert len(matrix) == 3
+    assert matrix.column("EGG").tolist() == [0, 1]
+    assert matrix.column("Saffron").tolist() == []
+    assert matrix.counts([["Eggs", "Milk"], ["Beef"]]).tolist() == [[1, 2, 0], [0, 0, 0]]
+    overlap, missing, jaccard = matrix.scores([["Eggs", "Milk"]])
+    assert missing.tolist() == [[1, 0, 0]]
+    assert jaccard.tolist() == [[1 / 3, 1.0, 0.0]]
+
+
+def test_top_k_overlap_ranks_like_match():
+    catalog = _catalog()
+    matrix = IngredientMatrix.from_catalog(catalog)
+    pantries = bench.random_pantries(40, seed=4)
+    for pantry, hits in zip(pantries, matrix.top_k(pantries, k=12)):
+        assert [catalog.recipes[row] for row, *_ in hits] == catalog.match(pantry, k=12)
+
+
+def test_top_k_jaccard_matches_brute_force():
+    catalog = _catalog()
+    matrix = IngredientMatrix.from_catalog(catalog)
+    pantries = bench.random_pantries(40, seed=8)
+    _, _, jaccard = matrix.scores(pantries)
+    overlap = matrix.counts(pantries)
+    for p, hits in enumerate(matrix.top_k(pantries, k=5, by="jaccard")):
+        rows = [r for r in range(len(matrix)) if overlap[p, r] > 0]
+        rows.sort(key=lambda r: (-jaccard[p, r], -overlap[p, r], r))
+        assert [row for row, *_ in hits] == rows[:5]
+    with pytest.raises(ValueError):
+        matrix.top_k(pantries, by="cosine")
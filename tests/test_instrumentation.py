@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def metrics(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "enabled", True)
+    monkeypatch.setattr(instrumentation, "metrics_path", str(tmp_path / "metrics.json"))
+    instrumentation.reset()
+    yield instrumentation
+    instrumentation.reset()
+
+
+def test_disabled_costs_nothing(monkeypatch):
+    monkeypatch.setattr(instrumentation, "enabled", False)
+
+    def fn():
+        return 1
+
+    assert instrumentation.timed("fn")(fn) is fn
+    instrumentation.record("fn", 1.0)
+    instrumentation.count("calls")
+    assert instrumentation.snapshot()["timers"] == {} and instrumentation.snapshot()["counters"] == {}
+
+
+def test_timers_and_counters(metrics):
+    @metrics.timed("work")
+    def work(x):
+        if x < 0:
+            raise ValueError(x)
+        return x * 2
+
+    assert work(2) == 4
+    with pytest.raises(ValueError):
+        work(-1)
+    metrics.record("load", 0.003)
+    metrics.record("load", 30.0)
+    metrics.count("loaded", 5)
+    snap = metrics.snapshot()
+    assert snap["timers"]["work"]["count"] == 2
+    load = snap["timers"]["load"]
+    assert load["count"] == 2 and load["max_ms"] == 30000.0
+    assert load["buckets"]["0.0025"] == 0 and load["buckets"]["0.005"] == 1
+    assert load["buckets"]["10.0"] == 1 and load["buckets"]["+Inf"] == 2
+    assert snap["counters"] == {"loaded": 5}
+
+
+def test_snapshot_files(metrics, tmp_path):
+    metrics.record('say "hi"', 0.02)
+    metrics.count("events")
+    path = metrics.write_snapshot()
+    assert json.loads(open(path).read())["timers"]['say "hi"']["count"] == 1
+    prom = tmp_path / "metrics.prom"
+    metrics.write_snapshot(str(prom), "prometheus")
+    text = prom.read_text()
+    assert 'meal_planner_seconds_bucket{name="say \\"hi\\"",le="+Inf"} 1' in text
+    assert 'meal_planner_events_total{name="events"} 1' in text
+    with pytest.raises(ValueError):
+        metrics.configure(str(prom), "xml")
+
+
+def test_toggle_profile_dumps_next_to_the_metrics(metrics):
+    assert metrics.toggle_profile() is None
+    sum(range(1000))
+    path = metrics.toggle_profile()
+    assert path.endswith("metrics.prof") and os.path.getsize(path) > 0
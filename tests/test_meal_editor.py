@@ -0,0 +1,34 @@
+import pytest
+
+import bench
+
+gui = bench.load_gui()
+pytestmark = pytest.mark.skipif(gui is None, reason="needs a display")
+
+
+def test_selector_keeps_widgets_across_sessions():
+    pantry = sorted(gui.ingredient_vars)
+    gui.populate_selector(["Custom Thing", pantry[0]])
+    assert gui.new_meal_vars["Custom Thing"].get() and gui.new_meal_vars[pantry[0]].get()
+    widgets = {name: gui.editor_checks[name] for name in pantry}
+
+    gui.populate_selector([pantry[1]])
+    assert "Custom Thing" not in gui.editor_checks and "Custom Thing" not in gui.editor_index
+    assert all(gui.editor_checks[name] is widget for name, widget in widgets.items())
+    assert [name for name, var in gui.new_meal_vars.items() if var.get()] == [pantry[1]]
+    gui.populate_selector()
+
+
+def test_filter_narrows_but_keeps_checked_entries():
+    pantry = sorted(gui.ingredient_vars)
+    checked, wanted = pantry[0], pantry[-1]
+    gui.populate_selector([checked])
+    gui.editor_filter_var.set(wanted)
+    gui._layout_selector()
+    assert wanted in gui.editor_shown and checked in gui.editor_shown
+    assert all(wanted.lower() in name.lower() or name == checked for name in gui.editor_shown)
+    gui.editor_filter_var.set("")
+    gui._layout_selector()
+    if len(gui.new_meal_vars) <= gui.EDITOR_MAX_SHOWN:
+        assert set(gui.editor_shown) == set(gui.new_meal_vars)
+    gui.populate_selector()
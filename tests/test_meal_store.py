@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import api_server
+import engine
+from meal_store import MealStore, StoreLocked
+
+
+def test_failed_compaction_keeps_the_edit(tmp_path, monkeypatch):
+    path = str(tmp_path / "meals.json")
+    store = MealStore(path, compact_min=1)
+    store.load()
+
+    def disk_full(meals, path):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(engine, "save_saved_meals", disk_full)
+    store.put("Toast", {"ingredients": ["Bread", "Butter"], "description": ""})
+    assert "Toast" in store.meals
+    assert store.journal_records == 1
+
+    monkeypatch.undo()
+    store.put("Soup", {"ingredients": ["Carrots", "Onion"], "description": ""})
+    assert store.journal_records == 0
+    assert set(MealStore(path).load()) == {"Toast", "Soup"}
+
+
+def test_second_writer_is_refused(tmp_path):
+    path = str(tmp_path / "meals.json")
+    first = MealStore(path)
+    first.lock()
+    second = MealStore(path)
+    try:
+        second.lock()
+    except StoreLocked:
+        pass
+    else:
+        raise AssertionError("two processes could write meals.json")
+    first.unlock()
+    second.lock()
+    second.unlock()
+
+
+def test_api_server_refuses_meals_owned_by_another_writer(tmp_path):
+    meals = str(tmp_path / "meals.json")
+    desktop = MealStore(meals)
+    desktop.lock()
+    with pytest.raises(StoreLocked):
+        api_server.APIServer(str(tmp_path / "recipes.json"), meals_path=meals)
+    desktop.unlock()
+    api_server.APIServer(str(tmp_path / "recipes.json"), meals_path=meals).close()
+
+
+def test_journal_replays_over_the_snapshot(tmp_path):
+    path = str(tmp_path / "meals.json")
+    engine.save_saved_meals({"Toast": {"ingredients": ["Bread"], "description": ""}}, path)
+    store = MealStore(path)
+    store.load()
+    store.put("Soup", {"ingredients": ["Carrots"], "description": "hot"})
+    store.put("Broth", {"ingredients": ["Carrots", "Salt"], "description": ""}, replaces="Soup")
+    store.delete("Toast")
+    store.delete("Missing")
+    assert store.journal_records == 3
+    assert engine.load_saved_meals(path) == {"Toast": {"ingredients": ["Bread"], "description": ""}}
+
+    reopened = MealStore(path).load()
+    assert reopened == {"Broth": {"ingredients": ["Carrots", "Salt"], "description": ""}}
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "meals.json")
+    store = MealStore(path)
+    store.load()
+    store.put("Soup", {"ingredients": ["Carrots"], "description": ""})
+    with open(store.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "name": "Ha')
+    reopened = MealStore(path)
+    assert set(reopened.load()) == {"Soup"}
+    reopened.put("Tea", {"ingredients": ["Tea"], "description": ""})
+    assert set(MealStore(path).load()) == {"Soup", "Tea"}
+
+
+def test_compaction_folds_the_journal(tmp_path):
+    path = str(tmp_path / "meals.json")
+    store = MealStore(path, compact_min=3)
+    store.load()
+    for i in range(3):
+        store.put(f"Meal {i}", {"ingredients": ["Rice"], "description": ""})
+    assert store.journal_records == 0
+    assert os.path.getsize(store.journal_path) == 0
+    assert set(engine.load_saved_meals(path)) == {"Meal 0", "Meal 1", "Meal 2"}
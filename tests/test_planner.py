@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+import engine
+import planner
+
+
+def test_meal_planner_empty_catalog():
+    assert planner.MealPlanner(engine.RecipeCatalog()).plan(days=2) is None
+
+
+def test_household_planner_empty_catalog():
+    pytest.importorskip("numpy")
+    household = planner.HouseholdPlanner(planner.MealPlanner(engine.RecipeCatalog()))
+    assert household.plan([{}, {"seed": 1}], days=2) == [[(None, None, None)] * 2] * 2
+
+
+def _catalog():
+    recipes = []
+    for i in range(12):
+        recipes.append({"id": i, "name": f"Breakfast {i}", "category": "Breakfast", "ingredients": ["Eggs", f"Fruit {i}"]})
+        recipes.append({"id": 100 + i, "name": f"Dinner {i}", "category": "dinner",
+                        "ingredients": ["Rice", f"Meat {i % 3}", f"Veg {i}"]})
+    recipes.append({"id": 999, "name": "Toast", "ingredients": ["Bread"]})
+    return engine.RecipeCatalog([engine.normalize_recipe(r) for r in recipes])
+
+
+def test_plan_uses_category_buckets_case_insensitively():
+    meals = planner.MealPlanner(_catalog())
+    plan = meals.plan(days=5, slots=("breakfast", "DINNER"), rng=random.Random(1), max_moves=2000)
+    assert len(plan) == 5
+    for breakfast, dinner in plan:
+        assert breakfast["category"] == "Breakfast"
+        assert dinner["category"] == "dinner"
+
+
+def test_plan_rejects_unknown_category():
+    meals = planner.MealPlanner(_catalog())
+    with pytest.raises(ValueError):
+        meals.plan(days=2, slots=("Breakfast", "Brunch"))
+    with pytest.raises(ValueError):
+        meals.bucket("")
+    assert len(meals.bucket(None)) == len(meals)
+
+
+def test_plan_avoids_repeats_and_prefers_the_pantry():
+    meals = planner.MealPlanner(_catalog())
+    plan = meals.plan(days=7, slots=("Dinner",), pantry=["rice", "Meat 1"], repeat_window=7,
+                      rng=random.Random(3), max_moves=5000)
+    ids = [row[0]["id"] for row in plan]
+    assert len(set(ids)) == 7
+    # dinners using the pantry are preferred: all 4 that use Meat 1 are planned
+    assert sum("Meat 1" in row[0]["ingredients"] for row in plan) >= 4
+
+
+def test_household_plans_are_seeded_and_honour_excludes():
+    pytest.importorskip("numpy")
+    household = planner.HouseholdPlanner(planner.MealPlanner(_catalog()))
+    profiles = [
+        {"seed": 7, "pantry": ["Eggs"], "categories": ["breakfast", "DINNER"]},
+        {"seed": 8, "exclude": ["Meat 0", "Meat 1"], "categories": ["Dinner"]},
+        {"seed": 9, "categories": [None]},
+    ]
+    plans = household.plan(profiles, days=3)
+    assert plans == household.plan(profiles, days=3)
+    assert plans[0] == household.plan(profiles[:1], days=3)[0]
+    assert all(b["category"] == "Breakfast" and d["category"] == "dinner" for b, d in plans[0])
+    assert all("Meat 0" not in d["ingredients"] and "Meat 1" not in d["ingredients"] for d, in plans[1])
+    assert len({r["id"] for r, in plans[1]}) == 3
+    assert all(r is not None for r, in plans[2])
+    with pytest.raises(ValueError):
+        household.plan([{"categories": ["Brunch"]}])
+
+
+def _full_cost(solver):
+    need = {}
+    missing = repeats = 0
+    occurrences = {}
+    for day, row in enumerate(solver.cells):
+        for pos in row:
+            miss = solver.missing(pos)
+            missing += len(miss)
+            for ing in miss:
+                need[ing] = need.get(ing, 0) + 1
+            occurrences.setdefault(pos, []).append(day)
+    for days in occurrences.values():
+        for i, a in enumerate(days):
+            for b in days[i + 1:]:
+                if abs(a - b) < solver.window or a == b:
+                    repeats += 1
+    return planner.REPEAT_COST * repeats + planner.NEW_INGREDIENT_COST * len(need) + planner.MISSING_COST * missing
+
+
+def test_incremental_cost_matches_a_full_recount():
+    meals = planner.MealPlanner(_catalog())
+    solver = planner._Solver(meals, 9, [planner.category_key(c) for c in ("Breakfast", "Dinner", None)],
+                             ["Rice", "eggs"], 4, random.Random(5))
+    solver.greedy()
+    assert solver.cost == pytest.approx(_full_cost(solver))
+    solver.anneal(3000, float("inf"))
+    assert solver.cost == pytest.approx(_full_cost(solver))
+
+
+def test_seeded_plans_repeat():
+    meals = planner.MealPlanner(_catalog())
+    slots = ("Breakfast", "Dinner")
+    first = meals.plan(days=3, slots=slots, rng=random.Random(42), max_moves=500)
+    assert first == meals.plan(days=3, slots=slots, rng=random.Random(42), max_moves=500)
+    assert meals.plan(days=0) is None and meals.plan(slots=()) is None
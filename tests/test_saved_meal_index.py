@@ -0,0 +1,43 @@
+from engine import SavedMealIndex
+
+NAMES = ["Tomato Soup", "Beef Stew", "tomato salad", "Chicken Curry", "Soup of the Day", "Green Salad"]
+
+
+def _reference(names, query):
+    return sorted((n for n in names if query.lower() in n.lower()), key=lambda n: (n.lower(), n))
+
+
+def test_search_before_and_after_trigram_indexing():
+    index = SavedMealIndex(NAMES)
+    assert not index.trigrams_ready
+    assert index.search("SOUP") == _reference(NAMES, "soup")
+    assert index.index_step(count=4) is False
+    assert index.search("salad") == _reference(NAMES, "salad")
+    index.index_all()
+    assert index.trigrams_ready
+    for query in ("tomato", "sal", "ay", "stew", "xyz", ""):
+        assert index.search(query) == _reference(NAMES, query.strip()), query
+
+
+def test_narrowing_queries_while_typing():
+    names = [f"Meal {i}" for i in range(200)] + NAMES
+    index = SavedMealIndex(names)
+    index.index_all()
+    typed = ""
+    for ch in "tomato s":
+        typed += ch
+        assert index.search(typed) == _reference(names, typed.strip()), typed
+    # deleting a character widens the result again
+    assert index.search("tomato") == _reference(names, "tomato")
+
+
+def test_add_and_remove_keep_results_current():
+    index = SavedMealIndex(NAMES)
+    index.index_all()
+    assert index.search("soup") == ["Soup of the Day", "Tomato Soup"]
+    index.add("Pea Soup")
+    index.remove("Tomato Soup")
+    index.remove("Not there")
+    assert "Pea Soup" in index and "Tomato Soup" not in index
+    assert index.search("soup") == ["Pea Soup", "Soup of the Day"]
+    assert len(index) == len(NAMES)
@@ -0,0 +1,39 @@
+import shopping
+from shopping import IngredientTable, ShoppingList
+
+GROUPS = {"Produce": ["Carrots", "Onion", "Tomatoes"], "Dairy": ["Milk", "Butter"]}
+
+
+def test_counts_survive_overlapping_meals():
+    shop = ShoppingList(pantry=["Salt"])
+    soup = {"name": "Soup", "ingredients": ["Carrots", "Onion", "Salt"]}
+    stew = {"name": "Stew", "ingredients": ["Beef", "Carrots"]}
+    shop.update([soup, stew])
+    assert shop.items() == ["Beef", "Carrots", "Onion"]
+    shop.remove(soup)
+    assert shop.items() == ["Beef", "Carrots"]
+    shop.swap(stew, ["Rice", "Eggs"])
+    assert shop.items() == ["Eggs", "Rice"]
+    assert len(shop) == 2
+
+
+def test_spellings_share_one_item_and_pantry_uses_canonical_ids():
+    shop = ShoppingList(IngredientTable(GROUPS), pantry=["milk"])
+    shop.update([["Tomato", "MILK"], {"ingredients": ["tomatoes", "Carrot"]}])
+    assert shop.items() == ["Carrots", "Tomatoes"]
+    shop.set_pantry([])
+    assert shop.items() == ["Carrots", "Milk", "Tomatoes"]
+
+
+def test_grouped_follows_table_order():
+    shop = ShoppingList(IngredientTable(GROUPS))
+    shop.update([["Butter", "Tomatoes", "Saffron", "Carrots", "Anchovies"]])
+    assert shop.grouped() == [("Produce", ["Carrots", "Tomatoes"]), ("Dairy", ["Butter"]),
+                              (shopping.OTHER_GROUP, ["Anchovies", "Saffron"])]
+    assert shopping.format_grouped([]) == "(nothing to buy)"
+    assert shopping.format_grouped(shop.grouped()[:1]) == "Produce: Carrots, Tomatoes"
+
+
+def test_plan_meals_skips_empty_slots():
+    a, b = {"ingredients": ["Rice"]}, {"ingredients": ["Eggs"]}
+    assert shopping.plan_meals([(a, None), (None, b)]) == [a, b]
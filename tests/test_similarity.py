@@ -0,0 +1,88 @@
+import os
+
+import engine
+import similarity
+
+
+def _index(items):
+    index = similarity.SimilarityIndex()
+    for key, ings in items.items():
+        index.add(key, ings)
+    return index
+
+
+def test_flush_round_trip(tmp_path):
+    path = str(tmp_path / "recipes.minhash")
+    source = tmp_path / "recipes.json"
+    source.write_text("[]")
+    index = _index({1: ["Rice", "Eggs"], 2: ["Beef", "Onion"], 3: ["Bread", "Butter"]})
+    index.save(path, str(source))
+
+    # additions only: appended in place
+    index.add(4, ["Fish", "Lemons"])
+    size = os.path.getsize(path)
+    index.flush(path, str(source))
+    assert os.path.getsize(path) > size
+    assert set(similarity.SimilarityIndex.load(path, str(source)).signatures) == {1, 2, 3, 4}
+
+    # a removal must not come back from the stale record
+    index.remove(2)
+    index.add(5, ["Pasta", "Cheese"])
+    index.add(1, ["Rice", "Carrots"])
+    index.flush(path, str(source))
+    loaded = similarity.SimilarityIndex.load(path, str(source))
+    assert set(loaded.signatures) == {1, 3, 4, 5}
+    assert loaded.signatures[1] == index.signatures[1]
+    assert loaded.query(["Pasta", "Cheese"], k=1) == [(5, 1.0)]
+
+
+def test_emptied_recipe_does_not_come_back(tmp_path):
+    path = str(tmp_path / "recipes.minhash")
+    index = _index({1: ["Rice", "Eggs"], 2: ["Beef", "Onion"]})
+    index.save(path)
+    index.add(2, [])  # every ingredient removed from the recipe
+    assert 2 not in index
+    index.flush(path)
+    loaded = similarity.SimilarityIndex.load(path)
+    assert set(loaded.signatures) == {1}
+    assert loaded.query(["Beef", "Onion"], k=5) == []
+
+
+def test_similar_recipes_over_sqlite_catalog(tmp_path):
+    import sqlite_store
+
+    recipes = tmp_path / "recipes.json"
+    recipes.write_text('[{"id": 1, "name": "A", "ingredients": ["Rice", "Eggs", "Onion"]},'
+                       ' {"id": 2, "name": "B", "ingredients": ["Rice", "Eggs", "Onion", "Carrots"]},'
+                       ' {"id": 3, "name": "C", "ingredients": ["Apples", "Flour"]}]')
+    db = str(tmp_path / "planner.db")
+    conn = sqlite_store.connect(db)
+    sqlite_store.import_recipes(conn, str(recipes))
+    conn.close()
+    catalog = sqlite_store.SQLiteCatalog(db)
+    index = similarity.open_index(catalog)
+    assert [key for key, _ in index.query(["Rice", "Eggs", "Onion"], k=2)] == [1, 2]
+
+
+def test_query_ranks_near_duplicates_and_excludes_self():
+    index = _index({
+        1: ["Rice", "Eggs", "Peas", "Soy Sauce", "Onion", "Carrots"],
+        2: ["rice", "egg", "peas", "soy sauce", "onions", "Garlic"],
+        3: ["Flour", "Sugar", "Butter", "Eggs"],
+        4: ["Beef", "Potatoes", "Carrots", "Onion", "Stock", "Thyme"],
+    })
+    hits = index.query(["Rice", "Eggs", "Peas", "Soy Sauce", "Onion", "Carrots"], k=3, exclude=1)
+    assert hits[0][0] == 2 and 0.5 < hits[0][1] < 1.0
+    assert all(key != 1 for key, _ in hits)
+    assert index.query([], k=3) == []
+
+
+def test_open_index_builds_once_and_then_loads(tmp_path):
+    source = tmp_path / "recipes.json"
+    source.write_text('[{"id": 1, "name": "A", "ingredients": ["Rice", "Eggs"]},'
+                      ' {"id": 2, "name": "B", "ingredients": ["Rice", "Eggs", "Milk"]}]')
+    catalog = engine.load_catalog(str(source))
+    built = similarity.open_index(catalog, str(source))
+    assert os.path.exists(similarity.default_path(str(source)))
+    loaded = similarity.open_index(engine.RecipeCatalog(), str(source))
+    assert loaded.signatures == built.signatures
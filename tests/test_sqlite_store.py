@@ -0,0 +1,95 @@
+import json
+
+import engine
+import sqlite_store
+
+
+def _catalog(tmp_path, recipes):
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps(recipes))
+    db = str(tmp_path / "planner.db")
+    conn = sqlite_store.connect(db)
+    sqlite_store.import_recipes(conn, str(path))
+    conn.close()
+    return sqlite_store.SQLiteCatalog(db), engine.RecipeCatalog(list(engine.iter_recipes(str(path))))
+
+
+def _recipes(n):
+    return [{"id": 10 + i, "name": f"Recipe {i}", "category": ("Lunch", "Dinner")[i % 2],
+             "ingredients": [f"Item {i % 7}", f"Item {i % 11}", "Salt"],
+             "instructions": [f"Step one of {i}.", "Serve."]}
+            for i in range(n)]
+
+
+def test_rows_match_the_json_catalog(tmp_path):
+    n = sqlite_store.ROW_PAGE * 2 + 5
+    catalog, reference = _catalog(tmp_path, _recipes(n))
+    try:
+        assert len(catalog.recipes) == n
+        assert list(catalog.recipes) == reference.recipes
+        assert catalog.recipes[-1] == reference.recipes[-1]
+        assert catalog.recipes[sqlite_store.ROW_PAGE - 1:sqlite_store.ROW_PAGE + 1] == \
+            reference.recipes[sqlite_store.ROW_PAGE - 1:sqlite_store.ROW_PAGE + 1]
+        assert catalog.get(12) == reference.get(12)
+        assert catalog.get(1) is None
+        assert catalog.find_by_name("Recipe 3")["id"] == 13
+    finally:
+        catalog.close()
+
+
+def test_match_ranks_like_recipe_catalog(tmp_path):
+    catalog, reference = _catalog(tmp_path, _recipes(60))
+    try:
+        pantry = ["item 3", "ITEMS 5", "salt"]
+        assert catalog.match(pantry, k=20) == reference.match(pantry, k=20)
+        assert engine.rank_matches(catalog, catalog.overlap_counts(pantry), 20) == reference.match(pantry, k=20)
+        assert catalog.match(["nothing"]) == []
+    finally:
+        catalog.close()
+
+
+def test_pantry_larger_than_sqlite_variable_limit(tmp_path):
+    recipes = _recipes(5)
+    # more ids than SQLITE_MAX_VARIABLE_NUMBER (32766 since SQLite 3.32, 999 before)
+    recipes.append({"id": 99, "name": "Everything", "ingredients": [f"Spice {i}" for i in range(33000)]})
+    catalog, _ = _catalog(tmp_path, recipes)
+    try:
+        pantry = [f"spice {i}" for i in range(33000)] + ["salt"]
+        top = catalog.match(pantry, k=3)
+        assert top[0]["id"] == 99 and len(top[0]["ingredients"]) == 33000
+        assert catalog.overlap_counts(pantry)[(5, 99, 33000)] == 33000
+    finally:
+        catalog.close()
+
+
+def test_full_text_search(tmp_path):
+    catalog, _ = _catalog(tmp_path, _recipes(20))
+    try:
+        assert {r["id"] for r in catalog.search("Recipe 4")} >= {14}
+        assert catalog.search('" OR') == []
+    finally:
+        catalog.close()
+
+
+def test_saved_meals_store(tmp_path):
+    meals = tmp_path / "meals.json"
+    meals.write_text(json.dumps({"Soup": ["Carrots", "Onion"], "Toast": {"ingredients": ["Bread"]}}))
+    db = str(tmp_path / "planner.db")
+    conn = sqlite_store.connect(db)
+    assert sqlite_store.import_saved_meals(conn, str(meals)) == 2
+    conn.close()
+
+    store = sqlite_store.SQLiteMealStore(db)
+    try:
+        assert store.load()["Soup"] == {"ingredients": ["Carrots", "Onion"], "description": ""}
+        store.put("Carrot Soup", {"ingredients": ["Carrots"], "description": "smooth"}, replaces="Soup")
+        store.delete("Toast")
+        assert store.search("carrots") == ["Carrot Soup"]
+        assert store.search("Soup") == ["Carrot Soup"]
+    finally:
+        store.close()
+    reopened = sqlite_store.SQLiteMealStore(db)
+    try:
+        assert reopened.load() == {"Carrot Soup": {"ingredients": ["Carrots"], "description": "smooth"}}
+    finally:
+        reopened.close()
@@ -0,0 +1,55 @@
+import time
+
+from stall_monitor import BUCKETS_MS, StallMonitor
+
+
+class FakeRoot:
+    """Just enough of Tk's ``after`` for the monitor, driven by the test."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def after(self, ms, fn):
+        self.jobs.append((time.perf_counter() + ms / 1000, fn))
+        return len(self.jobs)
+
+    def after_cancel(self, job):
+        self.jobs.clear()
+
+    def run_next(self):
+        due, fn = self.jobs.pop(0)
+        time.sleep(max(0.0, due - time.perf_counter()))
+        fn()
+
+
+def slow_handler():
+    time.sleep(0.5)
+
+
+def test_stall_is_timed_with_the_blocking_stack():
+    root = FakeRoot()
+    monitor = StallMonitor(root, interval_ms=20, threshold_ms=100)
+    monitor.start()
+    for _ in range(3):
+        root.run_next()
+    slow_handler()
+    root.run_next()
+    monitor.stop()
+    assert root.jobs == []
+    assert len(monitor.lateness) == 4 and monitor.stall_count == 1
+    stall = monitor.stalls[0]
+    assert stall["duration_s"] >= 0.45
+    assert any("slow_handler" in frame for frame in stall["stack"])
+    report = monitor.report()
+    assert "Stalls over 100 ms: 1" in report and "slow_handler" in report
+
+
+def test_histogram_percentiles_and_report():
+    monitor = StallMonitor(FakeRoot(), threshold_ms=200)
+    assert monitor.percentile(99) == 0.0
+    monitor.lateness.extend([0.001, 0.002, 0.03, 6.0])
+    hist = monitor.histogram()
+    assert hist[0] == (BUCKETS_MS[0], 2) and hist[-1] == (None, 1)
+    assert sum(n for _, n in hist) == 4
+    assert monitor.percentile(50) == monitor.lateness[2]
+    assert ">= 5000 ms" in monitor.report()
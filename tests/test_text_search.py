@@ -0,0 +1,46 @@
+import text_search
+from text_search import TextIndex
+
+
+def _recipes():
+    recipes = [
+        {"id": 1, "name": "Chicken Curry", "ingredients": ["Chicken", "Rice", "Curry paste"],
+         "instructions": ["Fry the chicken.", "Add the curry paste and simmer."]},
+        {"id": 2, "name": "Beef Stew", "ingredients": ["Beef", "Carrot", "Onion"],
+         "instructions": ["Brown the beef.", "Stew with the carrots for two hours."]},
+        {"id": 3, "name": "Chicken Salad", "ingredients": ["Chicken", "Lettuce", "Tomato"],
+         "instructions": ["Slice the chicken over the lettuce."]},
+    ]
+    # rare words starting with "c" that sort before "chicken"
+    recipes += [{"id": 100 + i, "name": f"Ca{i:03d} dish", "ingredients": [], "instructions": []}
+                for i in range(text_search.MAX_PREFIX_TERMS + 10)]
+    return recipes
+
+
+def test_name_hit_ranks_first():
+    index = TextIndex(_recipes())
+    keys = [key for key, _ in index.search("chicken", prefix_last=False)]
+    assert sorted(keys) == [1, 3]
+    assert [key for key, _ in index.search("beef stew")][0] == 2
+
+
+def test_short_prefix_keeps_common_completions():
+    index = TextIndex(_recipes())
+    assert len(index._expand("c", True)) == text_search.MAX_PREFIX_TERMS
+    assert "chicken" in index._expand("c", True)
+    assert {key for key, _ in index.search("c", k=200)} >= {1, 3}
+
+
+def test_prefix_while_typing():
+    index = TextIndex(_recipes())
+    assert {key for key, _ in index.search("chick")} == {1, 3}
+    assert index.search("chick", prefix_last=False) == []
+
+
+def test_remove_and_replace():
+    index = TextIndex(_recipes())
+    index.remove(1)
+    assert {key for key, _ in index.search("curry")} == set()
+    index.add(3, {"name": "Tomato Soup", "ingredients": ["Tomato"], "instructions": []})
+    assert index.search("chicken") == []
+    assert [key for key, _ in index.search("soup")] == [3]
@@ -0,0 +1,49 @@
+import pytest
+
+import bench
+
+gui = bench.load_gui()
+pytestmark = pytest.mark.skipif(gui is None, reason="needs a display")
+
+
+def _placed(vlist):
+    return [btn for btn in vlist._rows if btn.winfo_manager() == "place"]
+
+
+def test_shrinking_result_list_hides_old_rows():
+    vlist = gui.VirtualList(gui.root, row_height=30, width=300, height=300)
+    vlist.pack()
+    vlist.set_items([f"old {i}" for i in range(20)])
+    gui.root.update()
+    assert len(_placed(vlist)) > 3
+
+    clicked = []
+    vlist.command = clicked.append
+    vlist.replace_items(["new 0", "new 1", "new 2"])
+    gui.root.update()
+    rows = _placed(vlist)
+    assert [btn.cget("text") for btn in rows] == ["new 0", "new 1", "new 2"]
+    for btn in rows:
+        btn.invoke()
+    assert clicked == ["new 0", "new 1", "new 2"]
+    vlist.destroy()
+
+
+def test_widget_count_does_not_grow_with_items():
+    vlist = gui.VirtualList(gui.root, row_height=30, overscan=2, width=300, height=300)
+    vlist.pack()
+    vlist.set_items(range(10000))
+    gui.root.update()
+    pool = len(vlist._rows)
+    assert pool <= 300 // 30 + 1 + 2 * 2 + 1
+    assert [btn.cget("text") for btn in _placed(vlist)][:3] == ["0", "1", "2"]
+
+    vlist.yview("moveto", 0.5)
+    vlist.yview("scroll", 3, "units")
+    gui.root.update()
+    texts = [int(btn.cget("text")) for btn in _placed(vlist)]
+    assert 5000 in texts and len(vlist._rows) == pool
+    vlist.yview("moveto", 1.0)
+    gui.root.update()
+    assert max(int(btn.cget("text")) for btn in _placed(vlist)) == 9999
+    vlist.destroy()
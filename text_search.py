@@ -0,0 +1,200 @@
+"""In-memory full-text index over recipe names, ingredients and instructions.
+
+Documents are scored with BM25 over field-weighted term frequencies (a name
+hit counts more than an instruction hit). The last query word is also matched
+as a prefix, so results update while the user is still typing. A word ending
+in ``*`` is always treated as a prefix.
+
+Each posting list is kept in document order (for random access by bisection)
+together with a cached impact order (BM25 contribution, descending). Queries
+run Fagin's threshold algorithm over the impact orders and stop as soon as no
+unseen document can reach the current top ``k``, so common terms do not force
+a scan of their whole posting list.
+"""
+import bisect
+import heapq
+import math
+import re
+from array import array
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+FIELD_WEIGHTS = (("name", 3), ("ingredients", 2), ("instructions", 1))
+K1 = 1.2
+B = 0.75
+MAX_PREFIX_TERMS = 64  # completions of one prefix, most common terms kept
+PREFIX_WEIGHT = 0.5  # a completion scores less than the exact word
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def _field_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return ""
+
+
+class TextIndex:
+    """BM25 inverted index; documents are keyed by recipe id."""
+
+    def __init__(self, recipes=()):
+        self._keys = []
+        self._doc_of = {}
+        self._lengths = array("I")
+        self._total_length = 0
+        self._postings = {}
+        self._deleted = set()
+        self._terms = None
+        self._impacts = {}
+        for pos, recipe in enumerate(recipes):
+            rid = recipe.get("id")
+            self.add(rid if rid is not None else pos, recipe)
+
+    def __len__(self):
+        return len(self._keys) - len(self._deleted)
+
+    def add(self, key, recipe):
+        """Index ``recipe`` under ``key``; re-adding a key replaces the old document."""
+        if key in self._doc_of:
+            self.remove(key)
+        tf = {}
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(_field_text(recipe.get(field, ""))):
+                tf[term] = tf.get(term, 0) + weight
+        doc = len(self._keys)
+        self._keys.append(key)
+        self._doc_of[key] = doc
+        length = sum(tf.values())
+        self._lengths.append(length)
+        self._total_length += length
+        for term, freq in tf.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array("I"), array("H"))
+                self._terms = None
+            posting[0].append(doc)
+            posting[1].append(min(freq, 0xFFFF))
+            self._impacts.pop(term, None)
+
+    def remove(self, key):
+        doc = self._doc_of.pop(key, None)
+        if doc is not None:
+            self._deleted.add(doc)
+            self._total_length -= self._lengths[doc]
+
+    def _sorted_terms(self):
+        if self._terms is None:
+            self._terms = sorted(self._postings)
+        return self._terms
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self._postings else []
+        terms = self._sorted_terms()
+        start = bisect.bisect_left(terms, token)
+        # every term starting with ``token`` sorts before token + U+10FFFF
+        end = bisect.bisect_left(terms, token + "\U0010ffff", start)
+        if end - start <= MAX_PREFIX_TERMS:
+            return terms[start:end]
+        # very short prefixes keep the completions found in the most documents (and the word itself)
+        postings = self._postings
+        common = heapq.nlargest(MAX_PREFIX_TERMS, terms[start:end], key=lambda t: (t == token, len(postings[t][0])))
+        return sorted(common)
+
+    def _stats(self):
+        n_docs = max(1, len(self))
+        return n_docs, max(1.0, self._total_length / n_docs)
+
+    def _term_impacts(self, term):
+        """(scores aligned with the posting list, indices by descending score)."""
+        n_docs, avgdl = self._stats()
+        cached = self._impacts.get(term)
+        # collection statistics drift slowly; recompute once they move by 5%
+        if cached is not None and abs(cached[2] - n_docs) <= 0.05 * n_docs \
+                and abs(cached[3] - avgdl) <= 0.05 * avgdl:
+            return cached
+        docs, freqs = self._postings[term]
+        df = len(docs)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        lengths = self._lengths
+        scores = array("d", (idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[doc] / avgdl))
+                             for doc, tf in zip(docs, freqs)))
+        order = array("I", sorted(range(df), key=scores.__getitem__, reverse=True))
+        cached = self._impacts[term] = (scores, order, n_docs, avgdl)
+        return cached
+
+    def finalize(self):
+        """Precompute impact orders for every term (otherwise done on first use)."""
+        for term in list(self._postings):
+            self._term_impacts(term)
+
+    def _impact_stream(self, term, weight):
+        docs = self._postings[term][0]
+        scores, order = self._term_impacts(term)[:2]
+        for i in order:
+            yield -weight * scores[i], docs[i]
+
+    def _sorted_access(self, group):
+        # one stream per query word: its expansions merged by descending impact
+        streams = [self._impact_stream(term, weight) for term, weight in group]
+        for neg_score, doc in heapq.merge(*streams):
+            yield -neg_score, doc
+
+    def _random_access(self, group, doc):
+        best = 0.0
+        for term, weight in group:
+            docs = self._postings[term][0]
+            i = bisect.bisect_left(docs, doc)
+            if i < len(docs) and docs[i] == doc:
+                score = weight * self._term_impacts(term)[0][i]
+                if score > best:
+                    best = score
+        return best
+
+    def search(self, query, k=50, prefix_last=True):
+        """Return [(key, score)] for the ``k`` best documents, best first."""
+        words = query.lower().split()
+        groups = []
+        for i, word in enumerate(words):
+            is_prefix = word.endswith("*") or (prefix_last and i == len(words) - 1)
+            for tok in tokenize(word):
+                # a query word scores its best matching term in each document
+                groups.append([(term, 1.0 if term == tok else PREFIX_WEIGHT)
+                               for term in self._expand(tok, is_prefix)])
+        groups = [g for g in groups if g]
+        if not groups or not len(self) or k <= 0:
+            return []
+
+        deleted = self._deleted
+        streams = [self._sorted_access(group) for group in groups]
+        heads = [0.0] * len(groups)
+        top = []
+        seen = set()
+        while True:
+            progressed = False
+            for w, stream in enumerate(streams):
+                item = next(stream, None)
+                if item is None:
+                    heads[w] = 0.0
+                    continue
+                progressed = True
+                score, doc = item
+                heads[w] = score
+                if doc in seen or doc in deleted:
+                    continue
+                seen.add(doc)
+                total = score + sum(self._random_access(group, doc)
+                                    for v, group in enumerate(groups) if v != w)
+                entry = (total, -doc)
+                if len(top) < k:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            # no unseen document can score above the sum of the current heads
+            if not progressed or (len(top) == k and top[0][0] >= sum(heads)):
+                break
+
+        return [(self._keys[-neg_doc], score) for score, neg_doc in sorted(top, reverse=True)]